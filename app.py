@@ -1,3 +1,4 @@
+import os
 import sys
 from pathlib import Path
 
@@ -5,13 +6,38 @@ from pathlib import Path
 project_root = Path(__file__).resolve().parent
 sys.path.append(str(project_root))
 
-from fastapi import FastAPI, WebSocket, Request
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from services.agents.sql_matic import SQLQueryAssistant
+from config import config
+from services.container import container
+from services.shared_state import open_checkpointer, shared_state_enabled, worker_count
+from tools.schema_getters import SchemaGetter
 import json
+import uuid
+from app_logging import configure_logging, get_logger, log_context
 
-app = FastAPI()
+# Every worker process imports this module, so each one starts its own log listener
+configure_logging()
+logger = get_logger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    checkpointer = None
+    deployment_config = config.deployment_config
+    if shared_state_enabled(deployment_config):
+        # Every worker reads and writes the same checkpoints and schema cache,
+        # so a websocket can reconnect to any worker and keep its conversation
+        SchemaGetter.set_shared_store(container.shared_store())
+        checkpointer = await open_checkpointer(deployment_config.get('checkpoint_path', 'cache/checkpoints.db'))
+        sql_assistant.set_checkpointer(checkpointer)
+        logger.info("worker %d using shared state", os.getpid())
+    yield
+    if checkpointer is not None:
+        await checkpointer.conn.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Mount static files directory
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -19,8 +45,18 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # Initialize templates
 templates = Jinja2Templates(directory="templates")
 
-# Initialize SQL assistant
-sql_assistant = SQLQueryAssistant()
+# Shared SQL assistant (one compiled graph and LLM client per process)
+sql_assistant = container.sql_assistant()
+rate_limiter = container.rate_limiter()
+thread_ids = container.thread_ids()
+
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex[:12]
+    with log_context(request_id=request_id):
+        response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
 
 @app.get("/")
 async def get_chat_page(request: Request):
@@ -29,14 +65,29 @@ async def get_chat_page(request: Request):
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
+    # The conversation is identified by its thread, not by the worker holding the socket.
+    # Only ids issued by this deployment resume a thread; anything else starts a new one
+    thread_id = thread_ids.verify(websocket.query_params.get("thread_id")) or thread_ids.issue()
+    client_id = websocket.client.host if websocket.client else "unknown"
+    await websocket.send_json({"type": "session", "thread_id": thread_id})
     
     try:
         while True:
             # Receive message from client
             query = await websocket.receive_text()
+
+            allowed, retry_after = await rate_limiter.aallow(client_id)
+            if not allowed:
+                await websocket.send_json({
+                    "type": "error",
+                    "content": f"Rate limit exceeded, try again in {retry_after:.0f} seconds"
+                })
+                continue
             
-            # Process query and get result
-            result = await sql_assistant.process_query(query)
+            # Process query and get result; everything logged meanwhile carries both ids
+            with log_context(request_id=uuid.uuid4().hex[:12], thread_id=thread_id):
+                logger.info("question received", extra={"client": client_id, "question_length": len(query)})
+                result = await sql_assistant.process_query(query, thread_id=thread_id)
             
             # Send response to client
             await websocket.send_json({
@@ -44,7 +95,10 @@ async def websocket_endpoint(websocket: WebSocket):
                 "content": result
             })
             
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
+        logger.exception("websocket session %s failed", thread_id)
         await websocket.send_json({
             "type": "error",
             "content": str(e)
@@ -57,4 +111,12 @@ async def websocket_endpoint(websocket: WebSocket):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    host = config.api_config.get('host', '0.0.0.0')
+    port = config.api_config.get('port', 8000)
+    workers = worker_count(config.deployment_config)
+    if workers > 1:
+        # Workers import the app themselves; WEB_CONCURRENCY tells each one it runs alongside others
+        os.environ["WEB_CONCURRENCY"] = str(workers)
+        uvicorn.run("app:app", host=host, port=port, workers=workers)
+    else:
+        uvicorn.run(app, host=host, port=port)
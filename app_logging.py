@@ -0,0 +1,282 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Dict, Optional
+
+# Add project root to Python path
+project_root = Path(__file__).resolve().parent
+sys.path.append(str(project_root))
+
+# Every logger of the application lives under this one; third-party loggers are left alone
+ROOT_LOGGER = "sql_assistant"
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('request_id', default=None)
+thread_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('thread_id', default=None)
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+@contextmanager
+def log_context(request_id: Optional[str] = None, thread_id: Optional[str] = None):
+    '''Attach request/conversation ids to every record logged inside the block (including executor threads it spawns).'''
+    tokens = []
+    if request_id is not None:
+        tokens.append((request_id_var, request_id_var.set(request_id)))
+    if thread_id is not None:
+        tokens.append((thread_id_var, thread_id_var.set(thread_id)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    '''Copies the request and thread ids onto the record; runs in the thread that logs, where the contextvars are set.'''
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.thread_id = thread_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    '''Keeps a fraction of DEBUG records (per logger name when configured); other levels always pass.'''
+
+    def __init__(self, default_rate: float = 1.0, rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.default_rate = default_rate
+        self.rates = rates or {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        rate = self.default_rate
+        name = record.name
+        # The most specific configured logger name wins
+        while name:
+            if name in self.rates:
+                rate = self.rates[name]
+                break
+            name = name.rpartition(".")[0]
+        return rate >= 1 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    '''One JSON object per line: time, level, logger, message, request/thread ids, process and any `extra` fields.'''
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "thread_id": getattr(record, "thread_id", None),
+            "pid": record.process
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    '''
+    QueueHandler on a bounded queue that drops (and counts) records instead of
+    blocking or raising when full. The message and traceback are rendered
+    before the record is queued; layout (JSON or text) is left to the
+    listener's formatters, so tracebacks stay a separate field.
+    '''
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render with args as they are now, not when the listener gets to the record (they may be
+        # mutated meanwhile), and keep no traceback frames alive in the queue. Unlike
+        # QueueHandler.prepare, the traceback goes to exc_text instead of into the message
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _TextFormatter(logging.Formatter):
+    '''The configured text format; request_id/thread_id may be used in it and show as "-" when unset.'''
+
+    def format(self, record: logging.LogRecord) -> str:
+        for key in ("request_id", "thread_id"):
+            if getattr(record, key, None) is None:
+                setattr(record, key, "-")
+        return super().format(record)
+
+
+_exception_formatter = logging.Formatter()
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging(logging_config: Dict) -> logging.Logger:
+    '''
+    Configure the application loggers from the `logging:` block of config.yaml.
+    Records are put on a bounded queue by the calling thread (never blocking
+    the event loop on I/O) and written by a QueueListener thread to a
+    rotating file (file, max_size, backup_count) and optionally the console.
+    Idempotent; LOG_LEVEL overrides `level`.
+    Returns:
+        logging.Logger: The application root logger
+    '''
+    global _listener, _queue_handler
+    root = logging.getLogger(ROOT_LOGGER)
+    with _setup_lock:
+        if _listener is not None:
+            return root
+
+        handlers = []
+        log_file = logging_config.get('file')
+        if log_file:
+            log_file = log_file.replace("{pid}", str(os.getpid()))
+            Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+            file_handler = RotatingFileHandler(
+                log_file,
+                maxBytes=logging_config.get('max_size', 10485760),
+                backupCount=logging_config.get('backup_count', 5),
+                encoding='utf-8'
+            )
+            text_format = _TextFormatter(logging_config.get('format', "%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+            file_handler.setFormatter(JsonFormatter() if logging_config.get('json', True) else text_format)
+            handlers.append(file_handler)
+        if logging_config.get('console_logging', True):
+            console_handler = logging.StreamHandler(sys.stderr)
+            console_handler.setFormatter(_TextFormatter(logging_config.get('console_format', '[%(name)s] %(message)s')))
+            handlers.append(console_handler)
+
+        _queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=logging_config.get('queue_size', 10000)))
+        # Filters run in the thread that logs: ids are read from its context, sampled records never reach the queue
+        _queue_handler.addFilter(SamplingFilter(
+            logging_config.get('debug_sample_rate', 1.0),
+            logging_config.get('sample_rates', {})
+        ))
+        _queue_handler.addFilter(ContextFilter())
+
+        root.handlers = [_queue_handler]
+        root.setLevel(os.getenv("LOG_LEVEL", logging_config.get('level', 'INFO')).upper())
+        root.propagate = False
+        _listener = QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+    return root
+
+
+def shutdown_logging():
+    '''Write out queued records and stop the listener thread.'''
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+
+def dropped_records() -> int:
+    return _queue_handler.dropped if _queue_handler else 0
+
+
+def configure_logging() -> logging.Logger:
+    '''setup_logging() with the `logging:` block of config.yaml; called by the app and CLI entry points.'''
+    from config import config
+    return setup_logging(config.logging_config)
+
+
+def get_logger(name: str) -> logging.Logger:
+    '''
+    Application logger, e.g. get_logger(__name__) -> "sql_assistant.tools.execute_sql".
+    Importing a module configures nothing: records reach the log file once an
+    entry point has called configure_logging() (until then only warnings and
+    errors show, through logging's last-resort handler).
+    '''
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def main():
+    """Log from many concurrent tasks: time in the event loop per record, queued vs direct file writes"""
+    import asyncio
+    import tempfile
+
+    count, tasks = 20000, 50
+
+    async def emit(logger: logging.Logger, task: int, stalls: list):
+        with log_context(request_id=f"req-{task}", thread_id=f"thread-{task % 5}"):
+            for i in range(count // tasks):
+                start = time.perf_counter()
+                logger.info("tool call: %s", "execute_sql_query", extra={"rows": i})
+                stalls.append(time.perf_counter() - start)
+                logger.debug("sql: %s", "SELECT * FROM Invoice WHERE InvoiceId = ?")
+                if i % 10 == 0:
+                    await asyncio.sleep(0)
+
+    async def run(logger: logging.Logger) -> tuple:
+        stalls = []
+        start = time.perf_counter()
+        await asyncio.gather(*(emit(logger, task, stalls) for task in range(tasks)))
+        stalls.sort()
+        return time.perf_counter() - start, stalls[int(0.99 * len(stalls))], stalls[-1]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        direct = logging.getLogger("logging_demo.direct")
+        direct.propagate = False
+        direct.setLevel(logging.DEBUG)
+        handler = RotatingFileHandler(os.path.join(tmp_dir, "direct.log"), maxBytes=1048576, backupCount=3)
+        handler.setFormatter(JsonFormatter())
+        handler.addFilter(ContextFilter())
+        direct.addHandler(handler)
+        direct_seconds, direct_p99, direct_max = asyncio.run(run(direct))
+        handler.close()
+
+        log_file = os.path.join(tmp_dir, "queued.log")
+        setup_logging({'level': 'DEBUG', 'file': log_file, 'max_size': 1048576, 'backup_count': 3,
+                       'console_logging': False, 'debug_sample_rate': 0.01, 'queue_size': 100000})
+        queued_seconds, queued_p99, queued_max = asyncio.run(run(get_logger("demo")))
+        shutdown_logging()
+
+        print(f"{count} INFO + {count} DEBUG records from {tasks} tasks")
+        print(f"direct rotating file handler: {direct_seconds / (2 * count) * 1e6:6.1f} us per record, INFO call p99 "
+              f"{direct_p99 * 1e6:6.1f} us, max {direct_max * 1e3:5.1f} ms")
+        print(f"queue handler (1% DEBUG):     {queued_seconds / (2 * count) * 1e6:6.1f} us per record, INFO call p99 "
+              f"{queued_p99 * 1e6:6.1f} us, max {queued_max * 1e3:5.1f} ms, {dropped_records()} dropped")
+        with open(log_file, encoding="utf-8") as records:
+            print(f"last record: {records.readlines()[-1].strip()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -74,6 +74,10 @@ class Config:
     def tool_execute_sql(self) -> Dict[str, Any]:
         return self._config.get('tool_execute_sql', {})
     
+    @property
+    def tool_validate_sql(self) -> Dict[str, Any]:
+        return self._config.get('tool_validate_sql', {})
+    
     @property
     def tool_get_schema(self) -> Dict[str, Any]:
         return self._config.get('tool_get_schema', {})
@@ -82,5 +86,13 @@ class Config:
     def assistant_config(self) -> Dict[str, Any]:
         return self._config.get('assistant', {})
 
+    @property
+    def logging_config(self) -> Dict[str, Any]:
+        return self._config.get('logging', {})
+
+    @property
+    def deployment_config(self) -> Dict[str, Any]:
+        return self._config.get('deployment', {})
+
 # Global config instance
 config = Config()
@@ -3,6 +3,7 @@ from tools.get_schema import SchemaAnalyzer
 import re
 import json
 from config import config
+from app_logging import configure_logging
 from typing import Dict, Any
 
 def validate_query(query: str) -> tuple[bool, str]:
@@ -14,16 +15,9 @@ def validate_query(query: str) -> tuple[bool, str]:
 
 def debug_query(assistant: SQLQueryAssistant, query: str) -> dict:
     print("\nDEBUG MODE:")
-    print("1. Analyzing query structure...")
-    
-    # Check for common SQL injection patterns
-    if any(pattern in query.lower() for pattern in ["drop", "delete", "--", ";"]):
-        print("⚠️ Warning: Potentially dangerous SQL operations detected")
-        proceed = input("Do you want to proceed? (y/n): ").lower()
-        if proceed != 'y':
-            return {"error": "Query cancelled by user"}
-    
-    print("2. Generating SQL...")
+    # Writes and multi-statement payloads are rejected by the SQL tools'
+    # read-only sessions (database.read_only), not by inspecting the question
+    print("1. Generating SQL...")
     result = assistant.process_query(query)
     
     if "error" in result:
@@ -177,4 +171,5 @@ def main():
                 print(traceback.format_exc())
 
 if __name__ == "__main__":
+    configure_logging()
     main()
@@ -1,8 +1,8 @@
-from langchain_openai import ChatOpenAI
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import MessagesState, START, StateGraph
 from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.prebuilt import tools_condition, ToolNode
+from services.container import container
 
 class MathTools:
     @staticmethod
@@ -48,11 +48,12 @@ class ChatAssistant:
     def __init__(self):
         # Setup tools and LLM
         self.tools = [MathTools.add, MathTools.multiply, MathTools.divide]
-        self.llm = ChatOpenAI(model="gpt-4o")
-        self.llm_with_tools = self.llm.bind_tools(self.tools)
+        self.llm_with_tools = container.chat_model("gpt-4o", tools=self.tools)
         
-        # Create base graph
-        self.graph = self._create_graph()
+        # One checkpointer and one compiled graph serve every user; the
+        # thread_id in the run config keeps their conversations apart
+        self.memory = MemorySaver()
+        self.graph = self._create_graph().compile(checkpointer=self.memory)
         
         # Store user sessions
         self.sessions = {}
@@ -77,10 +78,9 @@ class ChatAssistant:
     def get_user_session(self, user_id: str):
         """Get or create user session"""
         if user_id not in self.sessions:
-            memory = MemorySaver()
             self.sessions[user_id] = {
-                'memory': memory,
-                'graph': self.graph.compile(checkpointer=memory)
+                'memory': self.memory,
+                'graph': self.graph
             }
         return self.sessions[user_id]
 
@@ -133,13 +133,13 @@ CHAT MEMORY ARCHITECTURE NOTES
 
 1. Memory Management
 ------------------
-- Each user session has its own MemorySaver instance
-- Memory is stored in self.sessions[user_id]['memory']
+- One MemorySaver and one compiled graph are shared by every user session
+- Conversations are kept apart by the thread_id in each session's config
 - Current structure:
     {
         'user_id_1': {
-            'memory': MemorySaver instance,
-            'graph': Compiled graph instance
+            'memory': shared MemorySaver instance,
+            'graph': shared compiled graph instance
         }
     }
 
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, WebSocket
-from services.llm_service import LLMService
+from services.container import container
+from app_logging import get_logger
+
+logger = get_logger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["chat"])
-llm_service = LLMService()
 
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -10,7 +12,7 @@ async def websocket_endpoint(websocket: WebSocket):
     try:
         while True:
             data = await websocket.receive_text()
-            response = await llm_service.process_message(data)
+            response = await container.llm_service().process_message(data)
             await websocket.send_text(response)
     except Exception as e:
-        print(f"WebSocket error: {e}")
+        logger.warning("websocket error: %s", e)
@@ -10,8 +10,6 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.insert(0, project_root)
 
-from langchain_openai import ChatOpenAI
-from langchain_community.utilities import SQLDatabase
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from langgraph.graph import START, END, Graph
@@ -19,7 +17,7 @@ from typing import Dict, Any
 from config import config
 import yaml
 from pathlib import Path
-from langchain.chat_models import init_chat_model
+from services.container import container
 
 
 def load_config():
@@ -40,13 +38,9 @@ class SQLQueryAssistant:
     def __init__(self, db_path=None):
         self.db_path = db_path or config.database_config['default_path']
         
-        self.llm = init_chat_model(
-        config.llm_config['model'],
-        temperature=config.llm_config['temperature'],
-        max_tokens=config.llm_config['max_tokens'],
-        streaming=config.llm_config['streaming'])
+        self.llm = container.chat_model()
         
-        self.db = SQLDatabase.from_uri(f"sqlite:///{self.db_path}")
+        self.db = container.sql_database(self.db_path)
         self.setup_graph()
         self.ground_truth_path = Path(__file__).parent.parent.parent / config.evaluation_config['ground_truth_path']
 
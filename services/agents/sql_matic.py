@@ -1,5 +1,8 @@
+import asyncio
 import os
 import sys
+import json
+import uuid
 from pathlib import Path
 
 # Add project root to Python path
@@ -7,16 +10,28 @@ project_root = Path(__file__).resolve().parent.parent.parent
 sys.path.append(str(project_root))
 
 from langgraph.prebuilt import tools_condition, ToolNode
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from config import config
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain.chat_models import init_chat_model
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import START, MessagesState, StateGraph
-from tools.get_schema import get_schema
+from tools.get_schema import get_schema, load_schema
+from tools.schema_pruning import prune_schema
+from tools.schema_renderers import render_schema
 from tools.execute_sql import execute_sql_query
+from tools.query_log import current_question
+from tools.validate_sql import validate_sql_query
 from tools.query_data_dictionary import get_db_field_definition
 from langgraph.checkpoint.memory import MemorySaver
 from utils.evaluation_service import SQLEvaluationService
+from services.prompt_cache import PromptPrefix, PromptCacheStats
+from services.example_retriever import ExampleRetriever, format_examples
+from services.template_matcher import TemplateMatcher
+from services.model_router import ModelRouter
+from services.speculative import SpeculativeSQLGenerator
+from app_logging import configure_logging, get_logger
+
+logger = get_logger(__name__)
 
 class SQLQueryAssistant:
     '''We need to redefine graph again.
@@ -27,30 +42,154 @@ class SQLQueryAssistant:
     use or output the response.
     '''
     
-    def __init__(self, db_path=None):
+    def __init__(self, db_path=None, preload_schema: Optional[bool] = None):
         self.db_path = db_path or config.database_config['default_path']
+        self.preload_config = config.assistant_config.get('schema_preload', {})
+        # Graph variant: inject the pruned schema before the first LLM call
+        self.preload_schema = self.preload_config.get('enabled', False) if preload_schema is None else preload_schema
         self.memory = MemorySaver()
         self.evaluator = SQLEvaluationService()
         
-        self.llm = init_chat_model(
-            config.llm_config['model'],
-            temperature=config.llm_config['temperature'],
-            max_tokens=config.llm_config['max_tokens'],
-            streaming=config.llm_config['streaming']
+        self.tools = [get_schema, execute_sql_query, get_db_field_definition, validate_sql_query]
+        # Cheapest model first; escalate when its SQL fails verification (llm.models)
+        self.router = ModelRouter.from_config(config.llm_config, self.tools, config.database_config)
+        self.llm_with_tools = self.router.routes[0].llm
+        self.speculative = None
+        speculative_config = config.assistant_config.get('speculative', {})
+        if speculative_config.get('enabled') and config.database_config.get('type', 'sqlite') != 'mongodb':
+            from services.container import container
+
+            models = config.llm_config.get('models') or [{'model': config.llm_config['model']}]
+            self.speculative = SpeculativeSQLGenerator(
+                # Sampling temperature gives the candidates diversity; no tools, one query per answer
+                container.chat_model(models[0]['model'], temperature=speculative_config.get('temperature', 0.7)),
+                config.database_config,
+                num_candidates=speculative_config.get('num_candidates', 5),
+                min_votes=speculative_config.get('min_votes', 2),
+                timeout=speculative_config.get('timeout', 5),
+                max_rows=speculative_config.get('max_rows', 1000)
+            )
+        prefix_config = config.assistant_config.get('prompt_prefix', {})
+        if self.preload_schema and prefix_config.get('include_schema', False):
+            # The preloaded schema replaces the one in the prefix; sending both doubles the schema tokens
+            logger.info("schema_preload is enabled: leaving the schema out of the prompt prefix")
+            prefix_config = dict(prefix_config, include_schema=False)
+        self.prompt_prefix = PromptPrefix(
+            config.assistant_config['system_message'],
+            config.database_config,
+            config.tool_get_schema,
+            prefix_config
         )
-        
-        self.tools = [get_schema, execute_sql_query, get_db_field_definition]
-        self.llm_with_tools = self.llm.bind_tools(self.tools)
-        self.setup_graph()
+        self.prompt_cache_stats = PromptCacheStats(prefix_config.get('log_cache_usage', True))
         self.ground_truth_path = Path(__file__).parent.parent.parent / config.evaluation_config['ground_truth_path']
+        self.few_shot_config = config.assistant_config.get('few_shot', {})
+        self.example_retriever = None
+        if self.few_shot_config.get('enabled'):
+            self.example_retriever = ExampleRetriever(
+                str(self.ground_truth_path), self.few_shot_config.get('verified_log_path')
+            )
+        self.template_matcher = None
+        self.template_hits = 0
+        fast_path_config = config.assistant_config.get('template_fast_path', {})
+        if fast_path_config.get('enabled') and config.database_config.get('type', 'sqlite') != 'mongodb':
+            # Templates come from the reviewed ground truth only, never from the recorded examples
+            self.template_matcher = TemplateMatcher.from_ground_truth(
+                str(self.ground_truth_path), config.database_config,
+                fast_path_config.get('max_index_values', 10000)
+            )
+        self.setup_graph()
+
+    @property
+    def llm_calls(self) -> int:
+        '''LLM calls made so far, escalations included.'''
+        speculative_calls = self.speculative.calls if self.speculative else 0
+        return sum(stats["calls"] for stats in self.router.summary().values()) + speculative_calls
+
+    def _with_examples(self, messages: list, exclude_exact: bool = False) -> list:
+        '''
+        Prepend the most similar verified examples to the latest question (not stored in the thread).
+        exclude_exact leaves out the question itself (evaluation on the ground-truth set).
+        '''
+        if self.example_retriever is None:
+            return messages
+        for i in range(len(messages) - 1, -1, -1):
+            if isinstance(messages[i], HumanMessage):
+                break
+        else:
+            return messages
+        examples = self.example_retriever.search(
+            messages[i].content,
+            k=self.few_shot_config.get('top_k', 3),
+            min_similarity=self.few_shot_config.get('min_similarity', 0.2),
+            exclude_exact=exclude_exact
+        )
+        if not examples:
+            return messages
+        question = HumanMessage(content=f"{format_examples(examples)}\n\nQuestion: {messages[i].content}")
+        return messages[:i] + [question] + messages[i + 1:]
+
+    def _record_verified_sql(self, query: str, messages: list):
+        '''
+        Log the last SQL of this turn that validated or executed without error as a new example.
+        Nothing checks that it answers the question, hence few_shot.record_verified is off by default.
+        '''
+        turn_start = max(i for i, message in enumerate(messages) if isinstance(message, HumanMessage))
+        queries = {}
+        verified_sql = None
+        for message in messages[turn_start:]:
+            if isinstance(message, AIMessage):
+                for tool_call in message.tool_calls:
+                    if tool_call["name"] in ("execute_sql_query", "validate_sql_query"):
+                        queries[tool_call["id"]] = tool_call["args"].get("query")
+            elif isinstance(message, ToolMessage) and message.tool_call_id in queries:
+                try:
+                    output = json.loads(message.content)
+                except (TypeError, ValueError):
+                    continue  # Not a tool result dict, e.g. the text ToolNode returns when the tool raised
+                if isinstance(output, dict) and not output.get("error") and output.get("valid", True):
+                    verified_sql = queries[message.tool_call_id]
+        if verified_sql:
+            self.example_retriever.add_example(query, verified_sql)
 
     def setup_graph(self):
-        # Define the system message and tools
-        sys_msg = SystemMessage(
-            content=config.assistant_config['system_message']
-        )        
-        async def assistant(state: MessagesState):
-            return {"messages": [await self.llm_with_tools.ainvoke([sys_msg] + state["messages"])]}
+        # System message + schema form a stable prefix ahead of the conversation,
+        # so provider-side prompt caching hits on every turn
+        async def assistant(state: MessagesState, config: RunnableConfig):
+            messages = self._with_examples(
+                state["messages"], config["configurable"].get("evaluation", False)
+            )
+            response = await self.router.ainvoke([await self.prompt_prefix.amessage()] + messages)
+            self.prompt_cache_stats.record(response)
+            return {"messages": [response]}
+
+        def preload_schema(state: MessagesState):
+            # Answer the get_schema call the model would make anyway, without an LLM round trip.
+            # Only on a thread's first question: later turns already carry the schema in their history
+            if len(state["messages"]) > 1:
+                return {"messages": []}
+            question = state["messages"][-1].content
+            max_tables = self.preload_config.get('max_tables', 8)
+            try:
+                schema_info = prune_schema(
+                    load_schema(config.database_config, config.tool_get_schema), question, max_tables
+                )
+            except Exception as e:
+                logger.warning("schema preload failed: %s", e)
+                return {"messages": []}
+            call_id = f"preload_{uuid.uuid4().hex[:12]}"
+            tool_call = AIMessage(
+                content="",
+                tool_calls=[{"name": "get_schema", "args": {"max_tables": str(max_tables)}, "id": call_id}]
+            )
+            tool_result = ToolMessage(
+                content=json.dumps({
+                    "Tool Message: >>> ": "Schema of the tables relevant to the question. Call get_schema for the full schema.",
+                    "schema": render_schema(schema_info, self.preload_config.get('render_format', 'compact'))
+                }),
+                name="get_schema",
+                tool_call_id=call_id
+            )
+            return {"messages": [tool_call, tool_result]}
 
         # Graph
         builder = StateGraph(MessagesState)
@@ -60,7 +199,12 @@ class SQLQueryAssistant:
         builder.add_node("tools", ToolNode(self.tools))
         
         # Define edges
-        builder.add_edge(START, "assistant")
+        if self.preload_schema:
+            builder.add_node("preload_schema", preload_schema)
+            builder.add_edge(START, "preload_schema")
+            builder.add_edge("preload_schema", "assistant")
+        else:
+            builder.add_edge(START, "assistant")
         builder.add_conditional_edges(
             "assistant",
             tools_condition,
@@ -69,14 +213,53 @@ class SQLQueryAssistant:
         
         self.graph = builder.compile(checkpointer=self.memory)
 
-    async def process_query(self, query: str) -> str:
+    def set_checkpointer(self, checkpointer):
+        '''Recompile the graph on another checkpointer (e.g. the shared SQLite one of a multi-worker deployment).'''
+        self.memory = checkpointer
+        self.setup_graph()
+
+    async def process_query(self, query: str, thread_id: Optional[str] = None, evaluation: bool = False) -> str:
+        '''
+        Answer one question on a conversation thread.
+        Args:
+            evaluation (bool): Ground-truth evaluation run: the question's own example is
+                never retrieved and the template fast path (learned from it) is skipped
+        '''
+        # Queries run for this turn are logged with the question (context is per task, so per connection)
+        current_question.set(query)
         messages = [HumanMessage(content=query)]
         config_params = {
             "configurable": {
-                "thread_id": config.assistant_config['process']['default_thread_id']
+                "thread_id": thread_id or config.assistant_config['process']['default_thread_id'],
+                "evaluation": evaluation
             }
         }
+        if self.template_matcher is not None and not evaluation:
+            # Slot values are checked against the database; keep those lookups off the event loop
+            match = await asyncio.to_thread(self.template_matcher.match, query)
+            if match:
+                # Fast path: no LLM call; keep the turn in the thread for follow-up questions
+                logger.info("template matched: %s", match['template'])
+                self.template_hits += 1
+                await self.graph.aupdate_state(
+                    config_params, {"messages": messages + [AIMessage(content=match['sql'])]}, as_node="assistant"
+                )
+                return match['sql']
+        if self.speculative is not None:
+            state = await self.graph.aget_state(config_params)
+            history = state.values.get("messages", []) if state.values else []
+            outcome = await self.speculative.generate(
+                [await self.prompt_prefix.amessage()] + self._with_examples(history + messages, evaluation)
+            )
+            if outcome:
+                logger.info("speculative: %d/%d candidates agree", outcome['votes'], outcome['candidates'])
+                await self.graph.aupdate_state(
+                    config_params, {"messages": messages + [AIMessage(content=outcome['sql'])]}, as_node="assistant"
+                )
+                return outcome['sql']
         result = await self.graph.ainvoke({"messages": messages}, config_params)
+        if self.example_retriever is not None and self.few_shot_config.get('record_verified', False):
+            self._record_verified_sql(query, result['messages'])
         return result['messages'][-1].content
 
     async def evaluate_performance(self, num_queries: int = None) -> Dict[str, Any]:
@@ -135,6 +318,13 @@ async def main():
                 print(f"Success rate: {eval_results.get('success_rate', 0):.2f}%")
                 print(f"Average similarity: {eval_results.get('average_similarity', 0):.2f}")
                 print(f"Execution time: {eval_results['execution_time']:.2f} seconds")
+                print(f"Average LLM calls per question: {eval_results.get('average_llm_calls', 0):.2f}")
+                print(f"Average latency per question: {eval_results.get('average_latency', 0):.2f} seconds")
+                for route, stats in assistant.router.summary().items():
+                    print(f"Model {route}: {stats['calls']} calls, {stats['verification_failures']} failed verification, "
+                          f"{stats['average_latency']:.2f}s avg, ${stats['cost']:.4f}")
+                cache_summary = assistant.prompt_cache_stats.summary()
+                print(f"Prompt tokens: {cache_summary['input_tokens']} ({cache_summary['cached_tokens']} cached, {cache_summary['cache_hit_ratio']:.0%})")
                 
                 print("\n=== Detailed Results ===")
                 # Print successful cases
@@ -187,4 +377,5 @@ async def main():
             print("Please try again.")
 
 if __name__ == "__main__":
+    configure_logging()
     asyncio.run(main())
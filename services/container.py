@@ -0,0 +1,121 @@
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional
+
+# Add project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from config import config
+
+
+class ServiceContainer:
+    '''
+    Process-wide owner of the expensive objects: chat model clients (sharing
+    one pooled HTTP client), compiled assistants/graphs and database handles.
+    Everything is built lazily on first use, once per configuration, and shared
+    by app.py, the API/chat routes and the CLIs.
+    '''
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ServiceContainer, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        self._services: Dict[Hashable, Any] = {}
+        self._lock = threading.RLock()
+
+    def _get(self, key: Hashable, factory):
+        with self._lock:
+            if key not in self._services:
+                self._services[key] = factory()
+            return self._services[key]
+
+    def chat_model(self, model: Optional[str] = None, temperature: Optional[float] = None,
+                   max_tokens: Optional[int] = None, tools: Optional[List] = None) -> Any:
+        '''
+        A retrying, timeout-bounded chat model (ResilientChatModel), one per
+        model/temperature/max_tokens/tool set; llm config values are the defaults.
+        '''
+        llm_config = config.llm_config
+        model = model or llm_config['model']
+        temperature = llm_config['temperature'] if temperature is None else temperature
+        max_tokens = max_tokens or llm_config['max_tokens']
+        tool_names = tuple(getattr(tool, 'name', getattr(tool, '__name__', repr(tool))) for tool in tools or [])
+
+        def build():
+            from langchain.chat_models import init_chat_model
+            from services.llm_client import ResilientChatModel, chat_model_kwargs
+
+            llm = init_chat_model(
+                model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                streaming=llm_config['streaming'],
+                **chat_model_kwargs(llm_config)
+            )
+            return ResilientChatModel.from_config(llm.bind_tools(tools) if tools else llm, llm_config)
+
+        return self._get(("chat_model", model, temperature, max_tokens, tool_names), build)
+
+    def sql_assistant(self, preload_schema: Optional[bool] = None) -> Any:
+        '''The LangGraph SQL assistant; its graph is compiled once per variant.'''
+        from services.agents.sql_matic import SQLQueryAssistant
+
+        return self._get(("sql_assistant", preload_schema), lambda: SQLQueryAssistant(preload_schema=preload_schema))
+
+    def llm_service(self) -> Any:
+        from services.llm_service import LLMService
+
+        return self._get("llm_service", LLMService)
+
+    def sql_database(self, db_path: Optional[str] = None) -> Any:
+        '''LangChain SQLDatabase (one SQLAlchemy engine and connection pool per database file).'''
+        db_path = db_path or config.database_config['default_path']
+
+        def build():
+            from langchain_community.utilities import SQLDatabase
+            return SQLDatabase.from_uri(f"sqlite:///{db_path}")
+
+        return self._get(("sql_database", db_path), build)
+
+    def shared_store(self) -> Any:
+        '''SharedStore on deployment.state_path when state is shared between workers, else in memory.'''
+        from services.shared_state import SharedStore, shared_state_enabled
+
+        deployment_config = config.deployment_config
+
+        def build():
+            if shared_state_enabled(deployment_config):
+                return SharedStore(deployment_config.get('state_path', 'cache/shared_state.db'))
+            return SharedStore()
+
+        return self._get("shared_store", build)
+
+    def rate_limiter(self) -> Any:
+        from services.shared_state import RateLimiter
+
+        limit = int(os.getenv("RATE_LIMIT", config.api_config.get('rate_limit', 0)))
+        window = config.deployment_config.get('rate_limit_window', 60)
+        return self._get("rate_limiter", lambda: RateLimiter(self.shared_store(), limit, window))
+
+    def thread_ids(self) -> Any:
+        from services.shared_state import ThreadIdSigner
+
+        return self._get("thread_ids", lambda: ThreadIdSigner(self.shared_store()))
+
+    def clear(self):
+        '''Drop every built service (tests, config reloads).'''
+        with self._lock:
+            self._services.clear()
+
+
+container = ServiceContainer()
@@ -0,0 +1,175 @@
+import csv
+import json
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Add project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+import numpy as np
+from scipy.sparse import vstack
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+def _normalize(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+class ExampleRetriever:
+    '''
+    TF-IDF index over question -> SQL pairs: the ground-truth corpus plus a
+    JSONL log of pairs verified in production (SQL that validated or ran
+    without error). Rows are L2-normalized, so a sparse dot product with the
+    query vector gives cosine similarities. The matrix is kept in CSC form:
+    each column is a term's posting list, and a lookup only touches the
+    columns of the question's terms. Pairs added after the last fit live in a
+    small row-major tail matrix until the next refit.
+    '''
+
+    def __init__(self, ground_truth_path: Optional[str] = None, log_path: Optional[str] = None,
+                 rebuild_ratio: float = 0.2):
+        self.log_path = Path(log_path) if log_path else None
+        self.rebuild_ratio = rebuild_ratio
+        self._lock = threading.Lock()
+        self.examples: List[Tuple[str, str]] = []
+        self._seen = set()
+        self._vectorizer = None
+        self._matrix = None
+        self._tail = None
+        self._fitted_size = 0
+
+        examples = []
+        if ground_truth_path and Path(ground_truth_path).exists():
+            with open(ground_truth_path, newline='') as f:
+                examples.extend((row["User Input"], row["Ground Truth SQL"]) for row in csv.DictReader(f))
+        if self.log_path and self.log_path.exists():
+            with open(self.log_path) as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        examples.append((record["question"], record["sql"]))
+        self.build(examples)
+
+    def build(self, examples: List[Tuple[str, str]]):
+        '''(Re)fit the vectorizer and index on the given pairs, dropping duplicate questions.'''
+        with self._lock:
+            self.examples, self._seen = [], set()
+            for question, sql in examples:
+                if _normalize(question) not in self._seen:
+                    self._seen.add(_normalize(question))
+                    self.examples.append((question, sql))
+            self._fit()
+
+    def _fit(self):
+        if not self.examples:
+            self._vectorizer, self._matrix, self._tail, self._fitted_size = None, None, None, 0
+            return
+        # Word unigrams+bigrams capture the question shape ("customers who live in")
+        self._vectorizer = TfidfVectorizer(lowercase=True, strip_accents='unicode', ngram_range=(1, 2), sublinear_tf=True)
+        self._matrix = self._vectorizer.fit_transform([question for question, _ in self.examples]).tocsc()
+        self._tail = None
+        self._fitted_size = len(self.examples)
+
+    def add_example(self, question: str, sql: str):
+        '''Append a verified pair to the log and the index.'''
+        with self._lock:
+            key = _normalize(question)
+            if key in self._seen:
+                return
+            self._seen.add(key)
+            self.examples.append((question, sql))
+            if self.log_path:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.log_path, 'a') as f:
+                    f.write(json.dumps({"question": question, "sql": sql, "verified_at": time.time()}) + "\n")
+
+            if self._vectorizer is None or len(self.examples) > self._fitted_size * (1 + self.rebuild_ratio):
+                self._fit()
+            else:
+                # Vocabulary and IDF stay fixed until the next refit; unseen words are ignored
+                row = self._vectorizer.transform([question])
+                self._tail = row if self._tail is None else vstack([self._tail, row], format='csr')
+
+    def search(self, question: str, k: int = 3, min_similarity: float = 0.0,
+               exclude_exact: bool = False) -> List[Dict]:
+        '''
+        Top-k most similar examples.
+        Args:
+            question (str): The incoming question
+            k (int): Number of examples to return
+            min_similarity (float): Drop examples below this cosine similarity
+            exclude_exact (bool): Skip the question itself (evaluation on the ground-truth set)
+        Returns:
+            List[Dict]: {"question", "sql", "similarity"} ordered by similarity
+        '''
+        with self._lock:
+            if self._matrix is None:
+                return []
+            query = self._vectorizer.transform([question])
+            if not query.nnz:
+                return []
+            scores = self._matrix[:, query.indices] @ query.data
+            if self._tail is not None:
+                scores = np.concatenate([scores, (self._tail @ query.T).toarray().ravel()])
+            examples = self.examples
+        candidates = min(len(scores), k + 1 if exclude_exact else k)
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        top = top[np.argsort(-scores[top])]
+        key = _normalize(question)
+        results = []
+        for i in top:
+            if scores[i] < min_similarity or scores[i] <= 0:
+                break
+            if exclude_exact and _normalize(examples[i][0]) == key:
+                continue
+            results.append({"question": examples[i][0], "sql": examples[i][1], "similarity": round(float(scores[i]), 3)})
+        return results[:k]
+
+
+def format_examples(examples: List[Dict]) -> str:
+    '''Render retrieved pairs as a prompt block.'''
+    lines = ["Examples of similar questions and their verified SQL:"]
+    for example in examples:
+        lines.append(f"Q: {example['question']}\nSQL: {example['sql']}")
+    return "\n".join(lines)
+
+
+def main():
+    """Index build and lookup benchmark on 100k synthetic question -> SQL pairs"""
+    random.seed(0)
+    entities = ["customers", "invoices", "tracks", "albums", "artists", "employees", "genres", "playlists"]
+    filters = ["who live in {}", "created in {}", "with more than {} items", "named {}", "sold in {}", "from {}"]
+    values = [f"value{i}" for i in range(5000)]
+    shapes = ["List all {} {}", "How many {} {}?", "Show the top 10 {} {}", "Total sales of {} {}", "Average price of {} {}"]
+    examples = []
+    for i in range(100_000):
+        question = random.choice(shapes).format(
+            random.choice(entities), random.choice(filters).format(random.choice(values))
+        ) + f" #{i}"
+        examples.append((question, f"SELECT * FROM t WHERE id = {i}"))
+
+    retriever = ExampleRetriever()
+    start = time.perf_counter()
+    retriever.build(examples)
+    print(f"Index build: {len(examples)} examples in {time.perf_counter() - start:.2f}s")
+
+    queries = [random.choice(examples)[0] for _ in range(200)]
+    start = time.perf_counter()
+    for query in queries:
+        retriever.search(query, k=3)
+    elapsed = (time.perf_counter() - start) / len(queries)
+    print(f"Lookup: {elapsed * 1000:.2f} ms per question (top-3)")
+
+    start = time.perf_counter()
+    for i in range(100):
+        retriever.add_example(f"List all customers who live in city{i}", "SELECT 1")
+    print(f"Incremental add: {(time.perf_counter() - start) * 10:.2f} ms per example")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+import asyncio
+import collections
+import random
+import sys
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+import httpx
+from langchain_core.runnables import Runnable, RunnableConfig
+from app_logging import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+_http_clients: Dict[str, Any] = {}
+_http_lock = threading.Lock()
+
+
+class LoopLocalTransport(httpx.AsyncBaseTransport):
+    '''
+    Async transport keeping one connection pool per event loop. Pooled
+    connections belong to the loop that opened them, so a single AsyncClient
+    can be shared by code running under different loops (asyncio.run in CLIs
+    and tests, the server's loop, worker threads with their own loop).
+    '''
+
+    def __init__(self, limits: httpx.Limits):
+        self.limits = limits
+        self._transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]" = \
+            weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _transport(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.get(loop)
+            if transport is None:
+                transport = self._transports[loop] = httpx.AsyncHTTPTransport(limits=self.limits)
+            return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport().handle_async_request(request)
+
+    async def aclose(self):
+        '''Close the pool of the running loop; pools of other loops go away with their loop.'''
+        with self._lock:
+            transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+def get_http_clients(llm_config: Dict) -> Dict[str, Any]:
+    '''
+    One pooled sync and async httpx client for every chat model in the process,
+    so connections (and TLS sessions) to the provider are reused across calls.
+    The async client pools per event loop (LoopLocalTransport).
+    '''
+    with _http_lock:
+        if not _http_clients:
+            limits = httpx.Limits(
+                max_connections=llm_config.get('max_connections', 100),
+                max_keepalive_connections=llm_config.get('max_keepalive_connections', 20)
+            )
+            timeout = httpx.Timeout(llm_config.get('timeout', 30), connect=10.0)
+            _http_clients["sync"] = httpx.Client(limits=limits, timeout=timeout)
+            _http_clients["async"] = httpx.AsyncClient(transport=LoopLocalTransport(limits), timeout=timeout)
+        return dict(_http_clients)
+
+
+def chat_model_kwargs(llm_config: Dict) -> Dict:
+    '''
+    Keyword arguments for init_chat_model/ChatOpenAI: the shared HTTP clients
+    (OpenAI-compatible providers; set llm.share_http_client false for others)
+    and no SDK-level retries, since ResilientChatModel retries with jitter itself.
+    '''
+    kwargs = {"timeout": llm_config.get('timeout', 30), "max_retries": 0}
+    if llm_config.get('share_http_client', True):
+        clients = get_http_clients(llm_config)
+        kwargs.update(http_client=clients["sync"], http_async_client=clients["async"])
+    return kwargs
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, httpx.TimeoutException, httpx.TransportError)):
+        return True
+    try:
+        import openai
+        if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+            return True
+    except ImportError:
+        pass
+    return getattr(error, 'status_code', None) in RETRYABLE_STATUS_CODES
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+class ResilientChatModel(Runnable):
+    '''
+    Runnable wrapping a chat model (tools already bound) with:
+      - a per-attempt timeout,
+      - exponential backoff with full jitter on rate limits, timeouts and 5xx
+        (Retry-After is honoured when the provider sends it),
+      - optional hedging: if an attempt is still running after the observed p95
+        latency, a second identical request is sent and the first answer wins.
+    It composes like the wrapped model (prompt | model | parser); stats and
+    latencies are shared by concurrent calls from tasks and threads.
+    '''
+
+    def __init__(self, llm: Any, timeout: float = 30, retry_attempts: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 20.0, hedge: bool = False, hedge_min_samples: int = 20):
+        self.llm = llm
+        self.timeout = timeout
+        self.retry_attempts = retry_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.latencies = collections.deque(maxlen=200)
+        self.stats = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "timeouts": 0, "failures": 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, llm: Any, llm_config: Dict) -> "ResilientChatModel":
+        return cls(
+            llm,
+            timeout=llm_config.get('timeout', 30),
+            retry_attempts=llm_config.get('retry_attempts', 3),
+            backoff_base=llm_config.get('backoff_base', 0.5),
+            backoff_max=llm_config.get('backoff_max', 20.0),
+            hedge=llm_config.get('hedge_requests', False)
+        )
+
+    def __getattr__(self, name: str):
+        # Everything else (model_name, ...) is the wrapped model's
+        if name == 'llm':
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    @property
+    def InputType(self) -> Any:
+        return self.llm.InputType
+
+    @property
+    def OutputType(self) -> Any:
+        return self.llm.OutputType
+
+    def bind_tools(self, tools: List, **kwargs) -> "ResilientChatModel":
+        '''The wrapped model with tools bound, wrapped again with the same retry, timeout and hedging settings.'''
+        return ResilientChatModel(
+            self.llm.bind_tools(tools, **kwargs),
+            timeout=self.timeout,
+            retry_attempts=self.retry_attempts,
+            backoff_base=self.backoff_base,
+            backoff_max=self.backoff_max,
+            hedge=self.hedge,
+            hedge_min_samples=self.hedge_min_samples
+        )
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def hedge_delay(self) -> Optional[float]:
+        if not self.hedge:
+            return None
+        with self._lock:
+            if len(self.latencies) < self.hedge_min_samples:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    async def _attempt(self, input: Any, config: Optional[RunnableConfig], **kwargs) -> Any:
+        start = time.perf_counter()
+        response = await asyncio.wait_for(self.llm.ainvoke(input, config, **kwargs), self.timeout)
+        with self._lock:
+            self.latencies.append(time.perf_counter() - start)
+        return response
+
+    async def _hedged(self, input: Any, config: Optional[RunnableConfig], **kwargs) -> Any:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._attempt(input, config, **kwargs)
+        first = asyncio.ensure_future(self._attempt(input, config, **kwargs))
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+        self._count("hedges")
+        second = asyncio.ensure_future(self._attempt(input, config, **kwargs))
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if task is second:
+                        self._count("hedge_wins")
+                    return task.result()
+                error = task.exception()
+        raise error
+
+    def _retry_delay(self, attempt: int, error: Exception) -> Optional[float]:
+        '''Seconds to wait before retrying after a failed attempt, or None when the error is final.'''
+        if isinstance(error, asyncio.TimeoutError):
+            self._count("timeouts")
+        if attempt == self.retry_attempts or not is_retryable(error):
+            self._count("failures")
+            return None
+        delay = _retry_after(error)
+        if delay is None:
+            # Full jitter keeps many workers from retrying in lockstep
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        self._count("retries")
+        logger.warning("%s on attempt %d; retrying in %.2fs", type(error).__name__, attempt + 1, delay)
+        return delay
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs) -> Any:
+        self._count("calls")
+        attempt = 0
+        while True:
+            try:
+                return await self._hedged(input, config, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs) -> Any:
+        '''Synchronous calls get retries; the HTTP client timeout bounds each attempt, no hedging.'''
+        self._count("calls")
+        attempt = 0
+        while True:
+            try:
+                return self.llm.invoke(input, config, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+
+def main():
+    """Run 200 requests through a local fake OpenAI server that injects latency spikes and 429s"""
+    import socket
+    import uvicorn
+    from langchain_openai import ChatOpenAI
+    from langchain_core.messages import HumanMessage
+    from utils.fake_openai_server import create_app
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(base_latency=0.05, slow_rate=0.04, slow_latency=1.0, error_rate=0.1),
+        host="127.0.0.1", port=port, log_level="warning"
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    llm_config = {'timeout': 5, 'retry_attempts': 4, 'backoff_base': 0.05}
+
+    async def run(hedge: bool) -> Dict:
+        llm = ChatOpenAI(model="fake", api_key="fake", base_url=f"http://127.0.0.1:{port}/v1",
+                         **chat_model_kwargs(llm_config))
+        client = ResilientChatModel.from_config(llm, dict(llm_config, hedge_requests=hedge))
+        client.hedge_min_samples = 10
+        latencies, failures = [], 0
+        for i in range(200):
+            start = time.perf_counter()
+            try:
+                await client.ainvoke([HumanMessage(content=f"question {i}")])
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                failures += 1
+        latencies.sort()
+        return dict(client.stats, p50=latencies[len(latencies) // 2], p99=latencies[int(0.99 * (len(latencies) - 1))],
+                    failed_requests=failures)
+
+    for hedge in (False, True):
+        # A fresh event loop per run; the shared async client keeps a connection pool per loop
+        result = asyncio.run(run(hedge))
+        print(f"hedging={'on ' if hedge else 'off'}: p50 {result['p50']:.3f}s p99 {result['p99']:.3f}s, "
+              f"{result['retries']} retries, {result['hedges']} hedges ({result['hedge_wins']} won), "
+              f"{result['failed_requests']} failed")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    configure_logging()
+    main()
@@ -1,9 +1,10 @@
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 
+from services.container import container
+
 class LLMService:
     def __init__(self):
-        self.llm = ChatOpenAI()
+        self.llm = container.chat_model()
         
     async def process_message(self, message: str) -> str:
         # Basic implementation - expand based on your needs
@@ -11,6 +12,5 @@ class LLMService:
             ("system", "You are a helpful SQL assistant."),
             ("user", "{input}")
         ])
-        chain = prompt | self.llm
-        response = await chain.ainvoke({"input": message})
+        response = await self.llm.ainvoke(prompt.format_messages(input=message))
         return response.content
@@ -0,0 +1,266 @@
+import asyncio
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Add project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from app_logging import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+SQL_BLOCK_PATTERN = re.compile(r'```(?:sql)?\s*(.+?)```', re.IGNORECASE | re.DOTALL)
+SQL_START_PATTERN = re.compile(r'^\s*(select|with)\b', re.IGNORECASE | re.MULTILINE)
+
+
+SQL_END_PATTERN = re.compile(r';|\n\s*\n')
+
+
+def extract_sql(text: str) -> Optional[str]:
+    '''
+    The SQL statement in a final answer: a fenced block, else the text from the
+    first SELECT/WITH line up to the first semicolon or blank line.
+    '''
+    if not isinstance(text, str):
+        return None
+    block = SQL_BLOCK_PATTERN.search(text)
+    if block:
+        return block.group(1).strip()
+    start = SQL_START_PATTERN.search(text)
+    if not start:
+        return None
+    end = SQL_END_PATTERN.search(text, start.start())
+    return text[start.start():end.start() if end else len(text)].strip()
+
+
+def verify_sql(sql: Optional[str], database_config: Dict, execute: bool = False) -> Tuple[bool, Optional[str]]:
+    '''
+    Cheap check of a drafted query: parse, EXPLAIN and, if asked, run it
+    capped at one row. Only errors fail: a plan the full-scan guard would block
+    is still correct SQL, and a larger model would not write it differently.
+    Databases validate_sql can't plan pass.
+    Returns:
+        Tuple[bool, Optional[str]]: (passed, failure reason)
+    '''
+    from tools.validate_sql import explain_query
+    from tools.sql_rewriter import parse_statement, rewrite_query, SQLRewriteError
+    from tools.sql_sessions import database_session
+
+    if not sql:
+        return False, "no SQL in the answer"
+    db_type = database_config.get('type', 'sqlite')
+    if db_type not in ('sqlite', 'postgresql', 'mysql'):
+        return True, None
+    try:
+        parse_statement(sql, db_type)
+    except SQLRewriteError as e:
+        return False, str(e)
+    result = explain_query(sql, database_config, max_full_scan_rows=0)
+    if not result.get("valid"):
+        return False, result.get("error")
+    if execute:
+        try:
+            # The LIMIT injection of execute_sql_query, so checking never reads more than a row
+            capped = rewrite_query(sql, db_type, max_rows=1, read_only=database_config.get('read_only', True))
+            with database_session(database_config) as conn:
+                cursor = conn.cursor()
+                cursor.execute(capped["sql"])
+                cursor.fetchall()
+        except Exception as e:
+            return False, str(e)
+    return True, None
+
+
+def verify_answer(text: str, database_config: Dict, execute: bool = False) -> Tuple[bool, Optional[str]]:
+    '''verify_sql for the SQL in a final answer; answers without SQL (clarifications, explanations) pass.'''
+    sql = extract_sql(text)
+    if sql is None:
+        return True, None
+    return verify_sql(sql, database_config, execute)
+
+
+@dataclass
+class ModelRoute:
+    name: str
+    llm: Any  # Chat model with tools bound
+    input_cost_per_1m: float = 0.0
+    output_cost_per_1m: float = 0.0
+
+
+@dataclass
+class RouteStats:
+    calls: int = 0
+    final_answers: int = 0
+    verification_failures: int = 0
+    latency: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+
+
+class ModelRouter:
+    '''
+    Routes every assistant step to the cheapest model that can handle the turn.
+
+    Tool-calling steps are passed through. A final answer is verified; if its
+    SQL fails, the same messages go to the next model in the list and the rest
+    of the turn stays on that model. The level is read back from the turn's
+    AIMessages (response_metadata["model_route"]), so no per-thread state is kept.
+    '''
+
+    def __init__(self, routes: List[ModelRoute], verifier: Optional[Callable[[str], Tuple[bool, Optional[str]]]] = None):
+        self.routes = routes
+        self.verifier = verifier
+        self.stats: Dict[str, RouteStats] = {route.name: RouteStats() for route in routes}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, llm_config: Dict, tools: List, database_config: Dict) -> "ModelRouter":
+        '''One route per llm.models entry, or a single unverified route for llm.model.'''
+        from services.container import container
+
+        models = llm_config.get('models') or [{'model': llm_config['model']}]
+        routes = []
+        for model_config in models:
+            routes.append(ModelRoute(
+                name=model_config['model'],
+                llm=container.chat_model(
+                    model_config['model'],
+                    temperature=model_config.get('temperature'),
+                    max_tokens=model_config.get('max_tokens'),
+                    tools=tools
+                ),
+                input_cost_per_1m=model_config.get('input_cost_per_1m', 0.0),
+                output_cost_per_1m=model_config.get('output_cost_per_1m', 0.0)
+            ))
+        verifier = None
+        if len(routes) > 1:
+            execute = llm_config.get('verify_execute', False)
+            verifier = lambda text: verify_answer(text, database_config, execute)
+        return cls(routes, verifier)
+
+    def _turn_level(self, messages: List) -> int:
+        level = 0
+        names = [route.name for route in self.routes]
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            if isinstance(message, AIMessage):
+                route = message.response_metadata.get("model_route")
+                if route in names:
+                    level = max(level, names.index(route))
+        return level
+
+    def _record(self, route: ModelRoute, response: Any, elapsed: float):
+        usage = getattr(response, 'usage_metadata', None) or {}
+        input_tokens = usage.get('input_tokens', 0)
+        output_tokens = usage.get('output_tokens', 0)
+        with self._lock:
+            stats = self.stats[route.name]
+            stats.calls += 1
+            stats.latency += elapsed
+            stats.input_tokens += input_tokens
+            stats.output_tokens += output_tokens
+            stats.cost += (input_tokens * route.input_cost_per_1m + output_tokens * route.output_cost_per_1m) / 1_000_000
+
+    async def ainvoke(self, messages: List) -> AIMessage:
+        level = self._turn_level(messages)
+        while True:
+            route = self.routes[level]
+            start = time.perf_counter()
+            response = await route.llm.ainvoke(messages)
+            self._record(route, response, time.perf_counter() - start)
+            response.response_metadata = dict(response.response_metadata or {}, model_route=route.name)
+            if response.tool_calls:
+                return response
+
+            last_route = level == len(self.routes) - 1
+            if self.verifier is None or last_route:
+                with self._lock:
+                    self.stats[route.name].final_answers += 1
+                return response
+            # Verification hits the database; keep it off the event loop
+            passed, reason = await asyncio.to_thread(self.verifier, response.content)
+            with self._lock:
+                if passed:
+                    self.stats[route.name].final_answers += 1
+                else:
+                    self.stats[route.name].verification_failures += 1
+            if passed:
+                return response
+            logger.info("%s answer failed verification (%s); escalating to %s", route.name, reason, self.routes[level + 1].name)
+            level += 1
+
+    def summary(self) -> Dict[str, Dict]:
+        '''Per-route calls, verification failures, average latency, tokens and cost.'''
+        with self._lock:
+            return {
+                name: {
+                    "calls": stats.calls,
+                    "final_answers": stats.final_answers,
+                    "verification_failures": stats.verification_failures,
+                    "average_latency": round(stats.latency / stats.calls, 3) if stats.calls else 0.0,
+                    "input_tokens": stats.input_tokens,
+                    "output_tokens": stats.output_tokens,
+                    "cost": round(stats.cost, 6)
+                } for name, stats in self.stats.items()
+            }
+
+
+class ScriptedModel:
+    '''Fake chat model returning canned answers in order, then the last one again, with a fixed delay.'''
+
+    def __init__(self, answers: List[str], delay: float = 0.0, input_tokens: int = 1000, output_tokens: int = 50):
+        self.answers = list(answers)
+        self.delay = delay
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+    async def ainvoke(self, messages: List) -> AIMessage:
+        await asyncio.sleep(self.delay)
+        return AIMessage(
+            content=self.answers.pop(0) if len(self.answers) > 1 else self.answers[0],
+            usage_metadata={
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "total_tokens": self.input_tokens + self.output_tokens
+            }
+        )
+
+
+def main():
+    """Scripted routing run: the small model answers 3 of 4 questions, one is escalated"""
+    from config import config
+
+    small = ScriptedModel([
+        "SELECT * FROM Customer WHERE Country = 'Canada'",
+        "SELECT Nme FROM Artist",  # Misspelled column: EXPLAIN fails, the question is escalated
+        "SELECT COUNT(*) FROM Track",
+        "SELECT Title FROM Album LIMIT 5"
+    ], delay=0.2)
+    large = ScriptedModel(["SELECT Name FROM Artist"], delay=1.0)
+    router = ModelRouter(
+        [ModelRoute("small", small, 0.15, 0.6), ModelRoute("large", large, 2.5, 10.0)],
+        verifier=lambda text: verify_answer(text, config.database_config)
+    )
+
+    async def run():
+        for question in ["customers in Canada", "artist names", "number of tracks", "five album titles"]:
+            response = await router.ainvoke([HumanMessage(content=question)])
+            print(f"{question}: [{response.response_metadata['model_route']}] {response.content}")
+
+    asyncio.run(run())
+    for name, stats in router.summary().items():
+        print(f"{name}: {stats}")
+
+
+if __name__ == "__main__":
+    configure_logging()
+    main()
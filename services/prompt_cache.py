@@ -0,0 +1,152 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from langchain_core.messages import SystemMessage
+
+from tools.get_schema import load_schema
+from tools.schema_refresh import subscribe_schema_changes
+from tools.schema_renderers import render_schema
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+SCHEMA_HEADER = "\n\n## Database schema\nCall get_schema only if this looks incomplete or outdated.\n"
+
+
+class PromptPrefix:
+    '''
+    The system message plus the rendered schema as one byte-stable SystemMessage.
+
+    Provider prompt caches (OpenAI, Anthropic, ...) match on an exact prefix, so
+    everything that does not change between turns goes first and is rebuilt only
+    when the schema itself changes: on a schema diff event or, without incremental
+    refresh, when the schema cache expires and the rendering differs.
+    Async callers use amessage(): schema loading runs in a worker thread, and
+    once a prefix exists a stale one keeps being served while it is rebuilt
+    in the background.
+    '''
+
+    def __init__(self, system_message: str, database_config: Dict, tool_config: Dict, prefix_config: Dict):
+        self.system_message = system_message.rstrip()
+        self.database_config = database_config
+        self.tool_config = tool_config
+        self.include_schema = prefix_config.get('include_schema', False)
+        self.render_format = prefix_config.get('schema_render_format', 'compact')
+        self.rebuild_interval = tool_config.get('cache_timeout', 300)
+        self._message: Optional[SystemMessage] = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()  # One schema load at a time; never held by readers
+        self._refreshing = False
+        subscribe_schema_changes(self._on_schema_change)
+
+    def _on_schema_change(self, diff: Dict):
+        with self._lock:
+            self._built_at = 0.0
+
+    def _render(self) -> str:
+        if not self.include_schema:
+            return self.system_message
+        try:
+            schema_info = load_schema(self.database_config, self.tool_config)
+        except Exception as e:
+            # Keep serving the last good prefix; the get_schema tool still works
+            logger.warning("schema preload failed: %s", e)
+            return self._message.content if self._message else self.system_message
+        return self.system_message + SCHEMA_HEADER + render_schema(schema_info, self.render_format)
+
+    def _fresh(self) -> bool:
+        return self._message is not None and time.time() - self._built_at < self.rebuild_interval
+
+    def _rebuild(self) -> SystemMessage:
+        with self._build_lock:
+            with self._lock:
+                if self._fresh():
+                    return self._message  # Rebuilt by another caller meanwhile
+            content = self._render()
+            with self._lock:
+                if self._message is None or content != self._message.content:
+                    self._message = SystemMessage(content=content)
+                self._built_at = time.time()
+                return self._message
+
+    def _rebuild_in_background(self):
+        try:
+            self._rebuild()
+        except Exception as e:
+            logger.warning("prompt prefix rebuild failed: %s", e)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def message(self) -> SystemMessage:
+        '''The current prefix; the same object (and bytes) until the schema changes. Rebuilds inline when stale.'''
+        with self._lock:
+            if self._fresh():
+                return self._message
+        return self._rebuild()
+
+    async def amessage(self) -> SystemMessage:
+        '''message() for the event loop: the first build runs in a thread, later ones in the background.'''
+        with self._lock:
+            if self._fresh():
+                return self._message
+            current = self._message
+            if current is not None:
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._rebuild_in_background, name="prompt-prefix-rebuild",
+                                     daemon=True).start()
+                return current
+        return await asyncio.to_thread(self._rebuild)
+
+
+class PromptCacheStats:
+    '''Cached vs uncached prompt tokens per LLM call, from the response usage_metadata.'''
+
+    def __init__(self, log_calls: bool = True):
+        self.log_calls = log_calls
+        self.calls: List[Dict[str, int]] = []
+        self._lock = threading.Lock()
+
+    def record(self, response: Any) -> Optional[Dict[str, int]]:
+        usage = getattr(response, 'usage_metadata', None)
+        if not usage:
+            return None  # Streaming without usage, or a provider that doesn't report it
+        details = usage.get('input_token_details') or {}
+        input_tokens = usage.get('input_tokens', 0)
+        cached_tokens = details.get('cache_read', 0) or 0
+        call = {
+            "input_tokens": input_tokens,
+            "cached_tokens": cached_tokens,
+            "uncached_tokens": input_tokens - cached_tokens,
+            "output_tokens": usage.get('output_tokens', 0)
+        }
+        with self._lock:
+            self.calls.append(call)
+        if self.log_calls:
+            # One record per LLM call: DEBUG, so it is sampled by logging.debug_sample_rate
+            logger.debug("prompt tokens: %d (%d cached), output tokens: %d", input_tokens, cached_tokens,
+                         call['output_tokens'], extra=call)
+        return call
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = list(self.calls)
+        input_tokens = sum(call["input_tokens"] for call in calls)
+        cached_tokens = sum(call["cached_tokens"] for call in calls)
+        return {
+            "calls": len(calls),
+            "input_tokens": input_tokens,
+            "cached_tokens": cached_tokens,
+            "uncached_tokens": input_tokens - cached_tokens,
+            "cache_hit_ratio": round(cached_tokens / input_tokens, 3) if input_tokens else 0.0
+        }
@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+# Add project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+
+def worker_count(deployment_config: Dict) -> int:
+    '''Worker processes: WEB_CONCURRENCY (set by uvicorn --workers / gunicorn setups) wins over deployment.workers.'''
+    return int(os.getenv("WEB_CONCURRENCY", deployment_config.get('workers', 1)))
+
+
+def shared_state_enabled(deployment_config: Dict) -> bool:
+    '''More than one worker can't work from per-process state, so it implies shared_state.'''
+    return deployment_config.get('shared_state', False) or worker_count(deployment_config) > 1
+
+
+class SharedStore:
+    '''
+    Small key/value + counter store in one SQLite file (WAL), shared by every
+    worker process on the host. Values are JSON with an expiry time; ":memory:"
+    gives the same API for a single process.
+    '''
+
+    def __init__(self, path: str = ":memory:", busy_timeout: float = 5.0):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # One connection per process; every operation is a single short statement
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters (key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, default=str), expires_at)
+            )
+
+    def setdefault(self, key: str, value: Any) -> Any:
+        '''Store value unless the key exists (first writer wins across processes); returns the stored value.'''
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO kv (key, value, expires_at) VALUES (?, ?, NULL)",
+                (key, json.dumps(value, default=str))
+            )
+        return self.get(key)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def incr(self, key: str, ttl: float) -> int:
+        '''Atomically add 1 to a counter that expires ttl seconds after its first increment; returns the new value.'''
+        now = time.time()
+        with self._lock:
+            return self._conn.execute(
+                '''INSERT INTO counters (key, value, expires_at) VALUES (?, 1, ?)
+                   ON CONFLICT(key) DO UPDATE SET
+                       value = CASE WHEN expires_at <= ? THEN 1 ELSE value + 1 END,
+                       expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END
+                   RETURNING value''',
+                (key, now + ttl, now, now)
+            ).fetchone()[0]
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM kv WHERE expires_at <= ?", (now,)).rowcount
+            removed += self._conn.execute("DELETE FROM counters WHERE expires_at <= ?", (now,)).rowcount
+        return removed
+
+
+class RateLimiter:
+    '''
+    Fixed-window request limit per client. The counter lives in the
+    SharedStore, so the limit holds across all workers, not per process.
+    Every window gets its own counter key; expired ones are purged at most
+    once per window so the store doesn't grow with traffic.
+    '''
+
+    def __init__(self, store: SharedStore, limit: int, window: float = 60):
+        self.store = store
+        self.limit = limit
+        self.window = window
+        self._next_purge = 0.0
+
+    def allow(self, client_id: str) -> Tuple[bool, float]:
+        '''
+        Returns:
+            Tuple[bool, float]: (allowed, seconds until the current window ends)
+        '''
+        if not self.limit:
+            return True, 0.0
+        now = time.time()
+        if now >= self._next_purge:
+            self._next_purge = now + self.window
+            self.store.purge_expired()
+        window_start = now - now % self.window
+        count = self.store.incr(f"rate:{client_id}:{int(window_start)}", self.window)
+        return count <= self.limit, window_start + self.window - now
+
+    async def aallow(self, client_id: str) -> Tuple[bool, float]:
+        '''allow() for the event loop: the SQLite write (and any busy wait on the file lock) runs in a worker thread.'''
+        if not self.limit:
+            return True, 0.0
+        return await asyncio.to_thread(self.allow, client_id)
+
+
+class ThreadIdSigner:
+    '''
+    Conversation ids handed to websocket clients, signed with a secret so a
+    client can only resume threads this deployment issued to it, not attach to
+    a guessed or copied one. The secret comes from SESSION_SECRET or is
+    generated once and kept in the SharedStore, so every worker accepts it.
+    '''
+
+    def __init__(self, store: SharedStore, secret: Optional[str] = None):
+        secret = secret or os.getenv("SESSION_SECRET") or store.setdefault("session_secret", secrets.token_hex(32))
+        self._key = secret.encode("utf-8")
+
+    def _signature(self, thread_id: str) -> str:
+        return hmac.new(self._key, thread_id.encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+
+    def issue(self) -> str:
+        thread_id = secrets.token_hex(16)
+        return f"{thread_id}.{self._signature(thread_id)}"
+
+    def verify(self, token: Optional[str]) -> Optional[str]:
+        '''The token when this deployment issued it, else None.'''
+        if not token or token.count(".") != 1:
+            return None
+        thread_id, signature = token.split(".")
+        return token if hmac.compare_digest(signature, self._signature(thread_id)) else None
+
+
+async def open_checkpointer(path: str) -> Any:
+    '''
+    LangGraph checkpointer on a SQLite file shared by the workers, so any
+    worker can continue any conversation. Must be called inside the event loop.
+    '''
+    try:
+        import aiosqlite
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    except ImportError:
+        raise RuntimeError("Shared checkpoints need langgraph-checkpoint-sqlite (pip install langgraph-checkpoint-sqlite)")
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = await aiosqlite.connect(path, timeout=30)
+    await conn.execute("PRAGMA journal_mode=WAL")
+    checkpointer = AsyncSqliteSaver(conn)
+    await checkpointer.setup()
+    return checkpointer
@@ -0,0 +1,256 @@
+import asyncio
+import csv
+import hashlib
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from services.model_router import extract_sql
+from tools.sql_rewriter import rewrite_query
+from tools.sql_sessions import database_session
+from app_logging import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+CANDIDATE_INSTRUCTION = "\n\nReply with a single SQL query and nothing else."
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(max_workers: int) -> ThreadPoolExecutor:
+    '''
+    Shared candidate executor. Its threads are long-lived, so each keeps its
+    cached read-only SQLite connection (sql_sessions) between questions.
+    '''
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sql-candidate")
+        return _executor
+
+
+def _set_timeout(conn, db_type: str, timeout: float) -> Optional[Any]:
+    if db_type == 'sqlite':
+        deadline = time.monotonic() + timeout
+        # A non-zero return aborts the statement with "interrupted"
+        conn.set_progress_handler(lambda: int(time.monotonic() > deadline), 10000)
+    elif db_type == 'postgresql':
+        conn.cursor().execute("SET statement_timeout = %s", [int(timeout * 1000)])
+    elif db_type == 'mysql':
+        conn.cursor().execute("SET SESSION max_execution_time = %s", [int(timeout * 1000)])
+
+
+def execute_candidate(sql: str, database_config: Dict, timeout: float = 5.0, max_rows: int = 1000) -> Dict:
+    '''
+    Run one candidate read-only with a time limit.
+    Returns:
+        Dict: {"sql", "columns", "rows", "error", "elapsed"}
+    '''
+    db_type = database_config.get('type', 'sqlite')
+    result = {"sql": sql, "columns": [], "rows": [], "error": None, "elapsed": 0.0}
+    start = time.perf_counter()
+    try:
+        statement = rewrite_query(sql, db_type, max_rows, read_only=True)["sql"]
+        with database_session(database_config) as conn:
+            _set_timeout(conn, db_type, timeout)
+            try:
+                cursor = conn.cursor()
+                cursor.execute(statement)
+                result["columns"] = [description[0] for description in cursor.description or []]
+                result["rows"] = cursor.fetchmany(max_rows)
+            finally:
+                if db_type == 'sqlite':
+                    conn.set_progress_handler(None, 0)
+    except Exception as e:
+        result["error"] = str(e)
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def result_fingerprint(result: Dict) -> str:
+    '''Order-insensitive hash of a result set; column names don't count, values do.'''
+    def normalize(value):
+        return round(value, 6) if isinstance(value, float) else value
+
+    rows = sorted(repr(tuple(normalize(value) for value in row)) for row in result["rows"])
+    return hashlib.sha1(f"{len(result['columns'])}|{'|'.join(rows)}".encode()).hexdigest()
+
+
+def vote(results: List[Dict]) -> Optional[Dict]:
+    '''
+    Pick the result most candidates agree on; ties go to the group holding the
+    earliest candidate. Failed candidates don't vote, and an empty result only
+    wins when no candidate returned rows (wrong filters tend to agree on nothing).
+    Returns:
+        Optional[Dict]: {"sql", "votes", "succeeded", "candidates"} or None if every candidate failed
+    '''
+    groups = defaultdict(list)
+    for index, result in enumerate(results):
+        if result["error"] is None:
+            groups[result_fingerprint(result)].append(index)
+    if not groups:
+        return None
+    winner = max(groups.values(), key=lambda indexes: (bool(results[indexes[0]]["rows"]), len(indexes), -indexes[0]))
+    return {
+        "sql": results[winner[0]]["sql"],
+        "votes": len(winner),
+        "succeeded": sum(len(indexes) for indexes in groups.values()),
+        "candidates": len(results)
+    }
+
+
+class SpeculativeSQLGenerator:
+    '''
+    Drafts N candidate queries concurrently, runs them in parallel and answers
+    with the result set most candidates agree on: one LLM round trip instead
+    of a serial generate -> execute -> repair loop.
+    '''
+
+    def __init__(self, llm: Any, database_config: Dict, num_candidates: int = 5, min_votes: int = 2,
+                 timeout: float = 5.0, max_rows: int = 1000):
+        self.llm = llm
+        self.database_config = database_config
+        self.num_candidates = num_candidates
+        self.min_votes = min_votes
+        self.timeout = timeout
+        self.max_rows = max_rows
+        self.calls = 0
+
+    async def _candidate(self, messages: List) -> Optional[str]:
+        self.calls += 1
+        try:
+            response = await self.llm.ainvoke(messages)
+        except Exception as e:
+            logger.warning("candidate generation failed: %s", e)
+            return None
+        return extract_sql(response.content)
+
+    async def generate(self, messages: List) -> Optional[Dict]:
+        '''
+        Args:
+            messages (List): Prompt ending with the user question
+        Returns:
+            Optional[Dict]: vote() result, or None when too few candidates agree
+        '''
+        question = messages[-1]
+        messages = messages[:-1] + [HumanMessage(content=question.content + CANDIDATE_INSTRUCTION)]
+        drafts = await asyncio.gather(*(self._candidate(messages) for _ in range(self.num_candidates)))
+        candidates = [sql for sql in drafts if sql]
+        if not candidates:
+            return None
+
+        loop = asyncio.get_running_loop()
+        executor = get_executor(self.num_candidates)
+        results = await asyncio.gather(*(
+            loop.run_in_executor(executor, execute_candidate, sql, self.database_config, self.timeout, self.max_rows)
+            for sql in candidates
+        ))
+        outcome = vote(results)
+        if outcome is None or outcome["votes"] < self.min_votes:
+            return None
+        return outcome
+
+
+class NoisyCandidateModel:
+    '''
+    Fake LLM for the benchmark: answers with the ground-truth SQL of the
+    question, or a broken/wrong variant, after a random delay.
+    '''
+
+    def __init__(self, ground_truth: Dict[str, str], accuracy: float = 0.6, latency: float = 0.3, seed: int = 0):
+        self.ground_truth = ground_truth
+        self.accuracy = accuracy
+        self.latency = latency
+        self.random = random.Random(seed)
+
+    def _noisy(self, sql: str) -> str:
+        kind = self.random.choice(["syntax", "column", "filter"])
+        if kind == "syntax":
+            return sql.replace("SELECT", "SELEC", 1)
+        if kind == "column":
+            return re.sub(r'\bFROM\b', ", MissingColumn FROM", sql, count=1)
+        # Plausible but wrong: the filter constant or the limit changes
+        changed = re.sub(r"'[^']*'", "'Unknown'", sql, count=1)
+        return changed if changed != sql else re.sub(r'\b(\d+)\b', lambda m: str(int(m.group(1)) + 1), sql, count=1)
+
+    async def ainvoke(self, messages: List) -> AIMessage:
+        await asyncio.sleep(self.latency * self.random.uniform(0.7, 1.6))
+        question = messages[-1].content.replace(CANDIDATE_INSTRUCTION, "")
+        sql = self.ground_truth[question]
+        return AIMessage(content=sql if self.random.random() < self.accuracy else self._noisy(sql))
+
+
+async def _serial_repair(model: NoisyCandidateModel, question: str, database_config: Dict, max_attempts: int = 4):
+    '''Baseline agent loop: draft, execute, redraft on error.'''
+    for attempt in range(1, max_attempts + 1):
+        response = await model.ainvoke([HumanMessage(content=question)])
+        result = await asyncio.to_thread(execute_candidate, response.content, database_config)
+        if result["error"] is None:
+            return result, attempt
+    return None, max_attempts
+
+
+def main():
+    """Serial repair loop vs speculative voting on the ground-truth set with a noisy fake LLM"""
+    from config import config
+
+    database_config = config.database_config
+    with open(project_root / config.evaluation_config['ground_truth_path'], newline='') as f:
+        ground_truth = {row["User Input"]: row["Ground Truth SQL"] for row in csv.DictReader(f)}
+    expected = {}
+    for question, sql in ground_truth.items():
+        result = execute_candidate(sql, database_config)
+        if result["error"] is None:
+            expected[question] = result_fingerprint(result)
+    print(f"{len(expected)}/{len(ground_truth)} ground-truth queries run on this database")
+
+    async def run():
+        serial_model = NoisyCandidateModel(ground_truth, seed=1)
+        speculative = SpeculativeSQLGenerator(NoisyCandidateModel(ground_truth, seed=2), database_config, 5, 2)
+        serial_times, serial_correct, serial_calls = [], 0, 0
+        speculative_times, speculative_correct, fallbacks = [], 0, 0
+        for question, fingerprint in expected.items():
+            start = time.perf_counter()
+            result, attempts = await _serial_repair(serial_model, question, database_config)
+            serial_times.append(time.perf_counter() - start)
+            serial_calls += attempts
+            serial_correct += result is not None and result_fingerprint(result) == fingerprint
+
+            start = time.perf_counter()
+            outcome = await speculative.generate([HumanMessage(content=question)])
+            speculative_times.append(time.perf_counter() - start)
+            if outcome is None:
+                fallbacks += 1
+            else:
+                chosen = execute_candidate(outcome["sql"], database_config)
+                speculative_correct += result_fingerprint(chosen) == fingerprint
+
+        def p95(times):
+            return sorted(times)[int(0.95 * (len(times) - 1))]
+
+        total = len(expected)
+        print(f"serial repair: {serial_correct}/{total} correct, {serial_calls / total:.2f} LLM calls/question, "
+              f"p50 {statistics.median(serial_times):.2f}s p95 {p95(serial_times):.2f}s")
+        print(f"speculative x5: {speculative_correct}/{total} correct, {fallbacks} fell back to the agent, "
+              f"5 concurrent calls/question, p50 {statistics.median(speculative_times):.2f}s p95 {p95(speculative_times):.2f}s")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    configure_logging()
+    main()
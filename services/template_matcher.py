@@ -0,0 +1,323 @@
+import csv
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+import sqlglot
+from sqlglot import exp
+
+from tools.sql_rewriter import SQL_DIALECTS
+from tools.sql_sessions import database_session
+from tools.schema_refresh import subscribe_schema_changes
+from app_logging import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+NUMBER_PATTERN = r'\d+(?:\.\d+)?'
+STRING_PATTERN = r'.+?'
+COMPARISONS = (exp.EQ, exp.NEQ, exp.GT, exp.GTE, exp.LT, exp.LTE)
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.strip().rstrip("?.!").split())
+
+
+@dataclass
+class Slot:
+    name: str
+    numeric: bool
+    table: Optional[str] = None
+    column: Optional[str] = None
+
+
+@dataclass
+class QuestionTemplate:
+    '''A question shape learned from one question -> SQL pair; slots are the literals shared by both.'''
+    question: str
+    pattern: re.Pattern
+    tree: exp.Expression
+    slots: List[Slot]
+    literal_slots: Dict[str, str] = field(default_factory=dict)  # literal value -> slot name
+    spans: List[Tuple[int, int, str]] = field(default_factory=list)  # slot positions in the normalized question
+
+    def fill(self, values: Dict[str, Any]) -> str:
+        '''The template question with other slot values.'''
+        text, position = "", 0
+        normalized = normalize_question(self.question)
+        numeric = {slot.name for slot in self.slots if slot.numeric}
+        for start, end, name in self.spans:
+            text += normalized[position:start] + (str(values[name]) if name in numeric else f"'{values[name]}'")
+            position = end
+        return text + normalized[position:]
+
+    def render(self, values: Dict[str, Any], dialect: Optional[str]) -> Dict:
+        '''SQL with the slot values inlined, and the same statement with placeholders + params.'''
+        def substitute(node, placeholder):
+            if isinstance(node, exp.Literal) and node.this in self.literal_slots:
+                name = self.literal_slots[node.this]
+                if placeholder:
+                    return placeholder(name)
+                value = values[name]
+                return exp.Literal.number(value) if node.is_number else exp.Literal.string(str(value))
+            return node
+
+        sql = self.tree.transform(lambda node: substitute(node, None)).sql(dialect=dialect)
+        parameterized_sql = self.tree.transform(
+            lambda node: substitute(node, lambda name: exp.Placeholder())
+        ).sql(dialect=dialect)
+        # Params follow the placeholders' order in the text (a LIMIT slot comes after WHERE ones),
+        # which the tree walk doesn't give; named markers rendered once tell the order
+        marked = self.tree.transform(
+            lambda node: substitute(node, lambda name: exp.Placeholder(this=f"__{name}"))
+        ).sql(dialect='sqlite')
+        params = [values[name] for name in re.findall(r':__(slot\d+)', marked)]
+        return {"sql": sql, "parameterized_sql": parameterized_sql, "params": params}
+
+
+def _slot_column(literal: exp.Literal) -> Tuple[Optional[str], Optional[str]]:
+    '''(table, column) the literal is compared against, when it can be resolved.'''
+    comparison = literal.parent
+    if not isinstance(comparison, COMPARISONS):
+        return None, None
+    column = comparison.left if comparison.right is literal else comparison.right
+    if not isinstance(column, exp.Column):
+        return None, None
+    select = literal.find_ancestor(exp.Select)
+    if select is None:
+        return None, None
+    tables = {}
+    for table in select.find_all(exp.Table):
+        if table.find_ancestor(exp.Select) is select:
+            tables[(table.alias or table.name).lower()] = table.name
+    if column.table:
+        return tables.get(column.table.lower()), column.name
+    if len(set(tables.values())) == 1:
+        return next(iter(tables.values())), column.name
+    return None, None
+
+
+def learn_template(question: str, sql: str, dialect: Optional[str]) -> Optional[QuestionTemplate]:
+    '''Turn a question -> SQL pair into a template, or None if a string slot can't be tied to a column.'''
+    try:
+        tree = sqlglot.parse_one(sql, read=dialect)
+    except sqlglot.errors.ParseError:
+        return None
+    text = normalize_question(question)
+
+    spans, slots, literal_slots = [], [], {}
+    for literal in tree.find_all(exp.Literal):
+        value = literal.this
+        if value in literal_slots or not value:
+            continue
+        quoted = re.search(r"""['"]%s['"]""" % re.escape(value), text)
+        match = quoted or re.search(r'(?<!\w)%s(?!\w)' % re.escape(value), text)
+        if not match or any(start < match.end() and match.start() < end for start, end, _ in spans):
+            continue
+        slot = Slot(name=f"slot{len(slots)}", numeric=literal.is_number)
+        if not slot.numeric:
+            slot.table, slot.column = _slot_column(literal)
+            if slot.column is None:
+                return None  # An unvalidated free-text slot would match anything
+        slots.append(slot)
+        literal_slots[value] = slot.name
+        spans.append((match.start(), match.end(), slot))
+
+    spans.sort(key=lambda span: span[0])
+    pattern, position = "", 0
+    for start, end, slot in spans:
+        pattern += re.escape(text[position:start]).replace(r'\ ', r'\s+')
+        value_pattern = NUMBER_PATTERN if slot.numeric else STRING_PATTERN
+        pattern += r"""['"]?(?P<%s>%s)['"]?""" % (slot.name, value_pattern)
+        position = end
+    pattern += re.escape(text[position:]).replace(r'\ ', r'\s+')
+    return QuestionTemplate(
+        question=question,
+        pattern=re.compile(rf'^{pattern}$', re.IGNORECASE),
+        tree=tree,
+        slots=slots,
+        literal_slots=literal_slots,
+        spans=[(start, end, slot.name) for start, end, slot in spans]
+    )
+
+
+class ColumnValueIndex:
+    '''
+    Distinct values of the columns used by string slots, loaded on first use.
+    Columns with more than max_values distinct values are checked with a
+    point query instead.
+    '''
+
+    def __init__(self, database_config: Dict, max_values: int = 10000, ttl: float = 3600):
+        self.database_config = database_config
+        self.dialect = SQL_DIALECTS.get(database_config.get('type', 'sqlite'))
+        self.max_values = max_values
+        self.ttl = ttl
+        self._values: Dict[Tuple[str, str], Tuple[float, Optional[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+        subscribe_schema_changes(self._on_schema_change)
+
+    def _on_schema_change(self, diff: Dict):
+        changed = set(diff["dropped"] + diff["altered"])
+        with self._lock:
+            for key in [key for key in self._values if key[0] in changed]:
+                del self._values[key]
+
+    def _query(self, statement: exp.Expression) -> List[tuple]:
+        with database_session(self.database_config) as conn:
+            cursor = conn.cursor()
+            cursor.execute(statement.sql(dialect=self.dialect))
+            return cursor.fetchall()
+
+    def lookup(self, table: str, column: str, value: str) -> Optional[Any]:
+        '''The stored value matching `value` (case-insensitive), or None if the column has no such value.'''
+        key = (table, column)
+        with self._lock:
+            cached = self._values.get(key)
+        if cached is None or time.time() - cached[0] > self.ttl:
+            try:
+                rows = self._query(
+                    exp.select(exp.column(column)).distinct().from_(table).limit(self.max_values + 1)
+                )
+            except Exception:
+                # Don't retry a missing table/column on every question until the TTL expires
+                with self._lock:
+                    self._values[key] = (time.time(), {})
+                raise
+            values = None if len(rows) > self.max_values else {
+                str(row[0]).lower(): row[0] for row in rows if row[0] is not None
+            }
+            cached = (time.time(), values)
+            with self._lock:
+                self._values[key] = cached
+
+        values = cached[1]
+        if values is not None:
+            return values.get(value.lower())
+        rows = self._query(
+            exp.select(exp.column(column)).from_(table).where(
+                exp.column(column).eq(exp.Literal.string(value))
+            ).limit(1)
+        )
+        return rows[0][0] if rows else None
+
+
+class TemplateMatcher:
+    '''
+    Fast path ahead of the agent: answers questions that fit a learned
+    template with zero LLM calls. A match needs every string slot value to
+    exist in its column, so near-miss questions fall through to the agent.
+    '''
+
+    def __init__(self, examples: List[Tuple[str, str]], database_config: Dict, max_index_values: int = 10000):
+        self.dialect = SQL_DIALECTS.get(database_config.get('type', 'sqlite'))
+        self.value_index = ColumnValueIndex(database_config, max_index_values)
+        self.templates: List[QuestionTemplate] = []
+        seen = set()
+        for question, sql in examples:
+            template = learn_template(question, sql, self.dialect)
+            if template is not None and template.pattern.pattern not in seen:
+                seen.add(template.pattern.pattern)
+                self.templates.append(template)
+
+    @classmethod
+    def from_ground_truth(cls, path: str, database_config: Dict, max_index_values: int = 10000) -> "TemplateMatcher":
+        with open(path, newline='') as f:
+            examples = [(row["User Input"], row["Ground Truth SQL"]) for row in csv.DictReader(f)]
+        return cls(examples, database_config, max_index_values)
+
+    def match(self, question: str) -> Optional[Dict]:
+        '''
+        Args:
+            question (str): The user question
+        Returns:
+            Optional[Dict]: {"sql", "parameterized_sql", "params", "template"} or None
+        '''
+        text = normalize_question(question)
+        for template in self.templates:
+            match = template.pattern.match(text)
+            if not match:
+                continue
+            values = {}
+            for slot in template.slots:
+                raw = match.group(slot.name)
+                if slot.numeric:
+                    values[slot.name] = raw
+                    continue
+                try:
+                    value = self.value_index.lookup(slot.table, slot.column, raw)
+                except Exception as e:
+                    logger.warning("value lookup failed for %s.%s: %s", slot.table, slot.column, e)
+                    value = None
+                if value is None:
+                    break
+                values[slot.name] = value
+            else:
+                return dict(template.render(values, self.dialect), template=template.question)
+        return None
+
+
+def main():
+    """Coverage and latency of the template fast path on the ground-truth set"""
+    from config import config
+
+    ground_truth_path = project_root / config.evaluation_config['ground_truth_path']
+    with open(ground_truth_path, newline='') as f:
+        examples = [(row["User Input"], row["Ground Truth SQL"]) for row in csv.DictReader(f)]
+    database_config = config.database_config
+    matcher = TemplateMatcher(examples, database_config)
+    with_slots = [template for template in matcher.templates if template.slots]
+    print(f"Learned {len(matcher.templates)} templates from {len(examples)} pairs ({len(with_slots)} with slots)")
+
+    # Held-out: each question against templates learned from the other pairs
+    covered = 0
+    for i, (question, _) in enumerate(examples):
+        held_out = TemplateMatcher(examples[:i] + examples[i + 1:], database_config)
+        held_out.value_index = matcher.value_index
+        covered += held_out.match(question) is not None
+    print(f"Leave-one-out coverage: {covered}/{len(examples)} ({covered / len(examples):.0%})")
+
+    # Variants: the same shapes with other values taken from the slot columns
+    variants = []
+    for template in with_slots:
+        substitutions = {}
+        for slot in template.slots:
+            if slot.numeric:
+                substitutions[slot.name] = "3"
+                continue
+            try:
+                matcher.value_index.lookup(slot.table, slot.column, "")
+            except Exception:
+                substitutions[slot.name] = None  # Table missing from this database
+                continue
+            values = list((matcher.value_index._values[(slot.table, slot.column)][1] or {}).values())
+            substitutions[slot.name] = values[len(values) // 2] if values else None
+        if None not in substitutions.values():
+            variants.append(template.fill(substitutions))
+
+    start = time.perf_counter()
+    hits = [matcher.match(variant) for variant in variants]
+    elapsed = time.perf_counter() - start
+    print(f"Value variants matched: {sum(hit is not None for hit in hits)}/{len(variants)}")
+    for variant, hit in list(zip(variants, hits))[:5]:
+        print(f"  {variant}\n    -> {hit['sql'] if hit else 'agent'}")
+
+    start = time.perf_counter()
+    for _ in range(100):
+        for question, _ in examples:
+            matcher.match(question)
+    per_question = (time.perf_counter() - start) / (100 * len(examples))
+    print(f"Match latency: {per_question * 1000:.3f} ms per question (warm value index), "
+          f"first variant pass {elapsed * 1000 / max(len(variants), 1):.2f} ms; every hit skips all LLM calls")
+
+
+if __name__ == "__main__":
+    configure_logging()
+    main()
@@ -5,7 +5,10 @@ function connectWebSocket() {
     if (ws !== null || isConnecting) return;
 
     isConnecting = true;
-    ws = new WebSocket(`ws://${window.location.host}/ws`);
+    // Reconnects resume the same conversation on whichever worker accepts them
+    const threadId = sessionStorage.getItem('thread_id');
+    const query = threadId ? `?thread_id=${encodeURIComponent(threadId)}` : '';
+    ws = new WebSocket(`ws://${window.location.host}/ws${query}`);
 
     ws.onopen = () => {
         console.log('Connected to WebSocket');
@@ -32,6 +35,11 @@ function connectWebSocket() {
 }
 
 function handleMessage(data) {
+    if (data.type === 'session') {
+        sessionStorage.setItem('thread_id', data.thread_id);
+        return;
+    }
+
     const typingIndicator = document.getElementById('typing-indicator');
     typingIndicator.style.display = 'none';
 
@@ -0,0 +1,10 @@
+import os
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+# config.Config refuses to load without a key; no test talks to OpenAI
+os.environ.setdefault("OPENAI_API_KEY", "test")
@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import time
+
+import pytest
+
+from tools.analytical_engine import AnalyticalRoutingBackend, SnapshotNotReady
+
+pytest.importorskip("duckdb")
+pytest.importorskip("pandas")
+
+QUERY = "SELECT category, SUM(amount) FROM sales GROUP BY category ORDER BY category"
+
+
+def fetch(backend, query):
+    with backend.stream(query, 100) as (_, batches):
+        return [tuple(row) for batch in batches for row in batch]
+
+
+@pytest.mark.parametrize("mode", ["snapshot", "parquet"])
+def test_queries_run_on_sqlite_while_the_snapshot_builds_in_the_background(tmp_path, mode):
+    db_path = tmp_path / "sales.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE sales (category TEXT, amount INTEGER)")
+        conn.executemany("INSERT INTO sales VALUES (?, ?)", [("a", 1), ("b", 2), ("a", 3)])
+    backend = AnalyticalRoutingBackend({
+        'type': 'sqlite', 'default_path': str(db_path), 'read_only': True,
+        'analytical_engine': {'enabled': True, 'mode': mode, 'min_table_rows': 0,
+                              'snapshot_path': str(tmp_path / "analytical.duckdb")}
+    })
+    try:
+        assert fetch(backend, QUERY) == [("a", 4), ("b", 2)]
+        assert backend.stats == {"sqlite": 1, "duckdb": 0, "fallbacks": 0}
+
+        backend.duckdb._builder.join(30)
+        assert fetch(backend, QUERY) == [("a", 4), ("b", 2)]
+        assert backend.stats == {"sqlite": 1, "duckdb": 1, "fallbacks": 0}
+        assert not list(tmp_path.glob("*.building*"))
+    finally:
+        backend.close()
+
+
+def make_backend(tmp_path, mode="snapshot"):
+    db_path = tmp_path / "store.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE items (name TEXT, quantity INTEGER, weight REAL, price NUMERIC(10,2))")
+        conn.executemany("INSERT INTO items VALUES (?, ?, ?, ?)",
+                         [("Bolt", 5, 1.5, 0.1), ("bolt", -7, 2.0, 0.2), ("Nut", 3, 0.5, 0.7)])
+    backend = AnalyticalRoutingBackend({
+        'type': 'sqlite', 'default_path': str(db_path), 'read_only': True,
+        'analytical_engine': {'enabled': True, 'mode': mode, 'min_table_rows': 0,
+                              'snapshot_path': str(tmp_path / "analytical.duckdb")}
+    })
+    backend.duckdb.ensure_snapshot()
+    return backend, db_path
+
+
+@pytest.mark.parametrize("query, engine", [
+    ("SELECT 5 / NULLIF(2, 0), COUNT(*) FROM items", "duckdb"),
+    ("SELECT SUM(quantity) / COUNT(*), MIN(quantity) / 2 FROM items", "duckdb"),
+    ("SELECT name, SUM(weight) / 2, AVG(quantity) / 2 FROM items GROUP BY name ORDER BY name", "duckdb"),
+    ("SELECT COUNT(*) FROM items WHERE name LIKE 'bolt'", "duckdb"),
+    ("SELECT SUM(price) / 2 FROM items", "sqlite"),
+    ("SELECT MAX(name) / 2 FROM items", "sqlite")
+])
+def test_routed_queries_return_what_sqlite_returns(tmp_path, query, engine):
+    backend, db_path = make_backend(tmp_path)
+    try:
+        with sqlite3.connect(db_path) as conn:
+            expected = [tuple(row) for row in conn.execute(query)]
+        assert fetch(backend, query) == expected
+        assert backend.stats[engine] == 1 and backend.stats["fallbacks"] == 0
+    finally:
+        backend.close()
+
+
+def test_numeric_columns_with_a_precision_stay_exact(tmp_path):
+    backend, _ = make_backend(tmp_path)
+    try:
+        with backend.duckdb.stream("SELECT SUM(price) FROM items", 10) as (_, batches):
+            assert str(next(batches)[0][0]) == "1.00"
+    finally:
+        backend.close()
+
+
+def test_streams_keep_reading_after_the_sqlite_file_changes(tmp_path):
+    backend, db_path = make_backend(tmp_path)
+    try:
+        with backend.duckdb.stream("SELECT name FROM items ORDER BY name", 1) as (_, batches):
+            first = next(batches)
+            with sqlite3.connect(db_path) as conn:
+                conn.execute("INSERT INTO items VALUES ('Washer', 1, 0.1, 0.05)")
+            os.utime(db_path, (time.time() + 5, time.time() + 5))
+            # The next query retires the outdated snapshot; this stream still reads it
+            with pytest.raises(SnapshotNotReady):
+                with backend.duckdb.stream("SELECT COUNT(*) FROM items GROUP BY name", 10):
+                    pass
+            rest = [row for batch in batches for row in batch]
+        assert [tuple(row) for row in first + rest] == [("Bolt",), ("Nut",), ("bolt",)]
+        assert backend.duckdb._retired == {} and backend.duckdb._in_use == {}
+        backend.duckdb._builder.join(30)
+        assert fetch(backend, "SELECT COUNT(*) FROM items") == [(4,)]
+    finally:
+        backend.close()
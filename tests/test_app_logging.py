@@ -0,0 +1,54 @@
+import io
+import json
+import logging
+import queue
+from logging.handlers import QueueListener
+
+from app_logging import JsonFormatter, NonBlockingQueueHandler
+
+
+def test_queued_records_keep_exceptions_and_are_formatted_by_the_listener():
+    stream = io.StringIO()
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JsonFormatter())
+    handler = NonBlockingQueueHandler(queue.Queue())
+    listener = QueueListener(handler.queue, output)
+    logger = logging.getLogger("sql_assistant.tests.queue")
+    logger.handlers = [handler]
+    logger.propagate = False
+    listener.start()
+    try:
+        try:
+            raise ValueError("bad query")
+        except ValueError:
+            logger.exception("query %s failed", "q1", extra={"tool": "execute_sql_query"})
+    finally:
+        listener.stop()
+        logger.handlers = []
+
+    entry = json.loads(stream.getvalue())
+    assert entry["message"] == "query q1 failed"
+    assert entry["tool"] == "execute_sql_query"
+    assert "ValueError: bad query" in entry["exception"]
+
+
+def test_messages_are_rendered_before_queueing():
+    handler = NonBlockingQueueHandler(queue.Queue())
+    logger = logging.getLogger("sql_assistant.tests.prepare")
+    logger.handlers = [handler]
+    logger.propagate = False
+    rows = [1, 2]
+    try:
+        try:
+            raise KeyError("Invoice")
+        except KeyError:
+            logger.error("rows: %s", rows, exc_info=True)
+        rows.append(3)
+    finally:
+        logger.handlers = []
+
+    record = handler.queue.get_nowait()
+    assert (record.msg, record.args, record.exc_info) == ("rows: [1, 2]", None, None)
+    text = logging.Formatter("%(levelname)s %(message)s").format(record)
+    assert text.startswith("ERROR rows: [1, 2]\nTraceback") and "KeyError: 'Invoice'" in text
+    assert "KeyError: 'Invoice'" in json.loads(JsonFormatter().format(record))["exception"]
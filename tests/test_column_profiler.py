@@ -0,0 +1,110 @@
+import sqlite3
+from contextlib import contextmanager
+
+from tools import column_profiler
+from tools.column_profiler import annotate_schema, profile_database
+
+
+class ScriptedCursor:
+    '''DB-API cursor stand-in: each execute() answers with the next scripted (description, rows); exceptions are raised.'''
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.statements = []
+        self.rows = []
+        self.description = None
+
+    def execute(self, statement, params=None):
+        self.statements.append((" ".join(statement.split()), params))
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        self.description, self.rows = result
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+
+class ScriptedConnection:
+    def __init__(self, results):
+        self.cursor_ = ScriptedCursor(results)
+        self.rollbacks = 0
+
+    def cursor(self):
+        return self.cursor_
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def catalog(*rows):
+    return [("value",)], list(rows)
+
+
+def sample(*rows):
+    return [("id",), ("status",)], list(rows)
+
+
+def test_postgresql_samples_schema_qualified_tables_and_skips_missing_ones(monkeypatch):
+    conn = ScriptedConnection([
+        catalog(),  # "gone" no longer exists
+        catalog(("sales", 2)), sample((1, "paid"), (2, None)),
+        catalog(("public", 1)), sample((7, "new"))
+    ])
+
+    @contextmanager
+    def session(database_config):
+        yield conn
+
+    monkeypatch.setattr(column_profiler, "database_session", session)
+    schema_info = {"tables": [{"name": "gone"}, {"name": "sales.orders"}, {"name": "orders"}]}
+    stats = profile_database({'type': 'postgresql'}, schema_info, sample_rows=100)
+
+    assert set(stats) == {"sales.orders", "orders"}
+    assert stats["sales.orders"]["columns"]["status"]["null_fraction"] == 0.5
+    assert conn.rollbacks == 1
+    statements = conn.cursor_.statements
+    assert "JOIN pg_namespace n" in statements[1][0] and statements[1][1] == ["sales", "orders"]
+    assert statements[2][0] == 'SELECT * FROM "sales"."orders" LIMIT %s'
+    assert statements[3][1] == [None, "orders"]
+    assert statements[4][0] == 'SELECT * FROM "public"."orders" LIMIT %s'
+
+
+def test_mysql_samples_large_tables_by_primary_key_ranges(monkeypatch):
+    monkeypatch.setattr(column_profiler, "MYSQL_SAMPLE_RANGES", 4)
+    conn = ScriptedConnection([catalog((1000000,)), catalog(("id", "bigint")), catalog((1, 1000000)), sample((5, "a"))])
+    row_estimate, _, method = column_profiler._sample_mysql(conn, "orders", 100)
+    assert (row_estimate, method) == (1000000, "random")
+    query, params = conn.cursor_.statements[-1]
+    assert query.count("(SELECT * FROM `orders` WHERE `id` >= %s ORDER BY `id` LIMIT %s)") == 4
+    assert " UNION " in query and params[1::2] == [25, 25, 25, 25]
+
+
+def test_mysql_without_an_integer_key_reads_first_rows_and_says_so():
+    conn = ScriptedConnection([catalog((1000000,)), catalog(("code", "varchar")), sample((5, "a"))])
+    assert column_profiler._sample_mysql(conn, "orders", 100)[2] == "first_rows"
+    stats = {"orders": {"row_estimate": 1000000, "sampled_rows": 100, "sample": "first_rows",
+                        "columns": {"id": {"distinct": 100, "null_fraction": 0.0, "min": 1, "max": 100,
+                                           "top_values": []}}}}
+    annotated = annotate_schema({"tables": [{"name": "orders", "columns": [{"name": "id"}]}]}, stats)
+    assert annotated["tables"][0]["stats_sample"] == "first_rows"
+
+
+def test_sqlite_profile_covers_every_table(tmp_path):
+    path = tmp_path / "shop.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, status TEXT)")
+        conn.executemany("INSERT INTO orders (status) VALUES (?)", [("paid",), ("paid",), (None,), ("new",)])
+    stats = profile_database({'type': 'sqlite', 'default_path': str(path)}, {"tables": [{"name": "orders"}]})
+    assert stats["orders"]["sample"] == "all"
+    assert stats["orders"]["columns"]["status"] == {
+        "distinct": 2, "null_fraction": 0.25, "min": "new", "max": "paid", "top_values": ["paid", "new"]
+    }
@@ -0,0 +1,67 @@
+import csv
+
+from services.example_retriever import ExampleRetriever
+
+EXAMPLES = [
+    ("List all customers who live in Paris", "SELECT * FROM customers WHERE city = 'Paris'"),
+    ("How many invoices were created in 2021?", "SELECT COUNT(*) FROM invoices WHERE strftime('%Y', date) = '2021'"),
+    ("Show the top 5 albums by sales", "SELECT album FROM sales ORDER BY total DESC LIMIT 5"),
+    ("List all employees hired in 2003", "SELECT * FROM employees WHERE strftime('%Y', hired) = '2003'")
+]
+
+
+def write_ground_truth(path, examples):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["User Input", "Ground Truth SQL"])
+        writer.writeheader()
+        writer.writerows({"User Input": question, "Ground Truth SQL": sql} for question, sql in examples)
+    return str(path)
+
+
+def test_most_similar_examples_come_first(tmp_path):
+    retriever = ExampleRetriever(write_ground_truth(tmp_path / "truth.csv", EXAMPLES + EXAMPLES[:1]))
+    assert len(retriever.examples) == 4  # Repeated questions are indexed once
+    results = retriever.search("list all customers who live in Lyon", k=2)
+    assert [result["question"] for result in results] == [EXAMPLES[0][0], EXAMPLES[3][0]]
+    assert results[0]["sql"] == EXAMPLES[0][1]
+    assert results[0]["similarity"] > results[1]["similarity"]
+    threshold = (results[0]["similarity"] + results[1]["similarity"]) / 2
+    assert retriever.search("list all customers who live in Lyon", k=2, min_similarity=threshold) == results[:1]
+    assert retriever.search("zzz qqq") == []
+
+
+def test_exclude_exact_skips_the_question_itself_but_still_returns_k(tmp_path):
+    retriever = ExampleRetriever(write_ground_truth(tmp_path / "truth.csv", EXAMPLES))
+    question = "  list ALL customers who live in paris "
+    assert retriever.search(question, k=1)[0]["question"] == EXAMPLES[0][0]
+    results = retriever.search(question, k=2, exclude_exact=True)
+    assert EXAMPLES[0][0] not in [result["question"] for result in results]
+    assert len(results) == 2
+
+
+def test_added_examples_are_searchable_from_the_tail_and_logged(tmp_path):
+    log_path = tmp_path / "verified.jsonl"
+    retriever = ExampleRetriever(write_ground_truth(tmp_path / "truth.csv", EXAMPLES), str(log_path), rebuild_ratio=1.0)
+    retriever.add_example("How many invoices were created in 2022?", "SELECT 2022")
+    retriever.add_example("how many invoices were created in 2022?", "SELECT 'duplicate'")
+    assert retriever._tail is not None and retriever._tail.shape[0] == 1
+    tail_results = retriever.search("How many invoices were created in 2022?", k=2)
+    assert tail_results[0]["sql"] == "SELECT 2022" and tail_results[0]["similarity"] >= 0.999
+    assert tail_results[1]["question"] == EXAMPLES[1][0]
+    # exclude_exact applies to tail rows too
+    assert retriever.search("How many invoices were created in 2022?", k=1, exclude_exact=True)[0]["question"] == EXAMPLES[1][0]
+
+    # A restart reads the log back; the refit ranks the same way
+    reloaded = ExampleRetriever(str(tmp_path / "truth.csv"), str(log_path))
+    assert reloaded._tail is None and len(reloaded.examples) == 5
+    assert [result["sql"] for result in reloaded.search("How many invoices were created in 2022?", k=2)] == \
+        [result["sql"] for result in tail_results]
+
+
+def test_tail_is_folded_into_the_index_past_the_rebuild_ratio(tmp_path):
+    retriever = ExampleRetriever(write_ground_truth(tmp_path / "truth.csv", EXAMPLES), rebuild_ratio=0.25)
+    retriever.add_example("Show the top 3 artists by sales", "SELECT 3")
+    assert retriever._tail is not None
+    retriever.add_example("Show the top 7 genres by sales", "SELECT 7")
+    assert retriever._tail is None and retriever._fitted_size == 6
+    assert retriever.search("top genres by sales", k=1)[0]["sql"] == "SELECT 7"
@@ -0,0 +1,69 @@
+import sqlite3
+import time
+
+import pytest
+
+from config import config
+from tools import execution_backends, query_log
+from tools.execute_sql import ExecutionTimer, execute_sql_query
+
+
+@pytest.fixture
+def sqlite_database(tmp_path, monkeypatch):
+    path = tmp_path / "numbers.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE numbers (n INTEGER)")
+        conn.executemany("INSERT INTO numbers VALUES (?)", [(n,) for n in range(500)])
+    monkeypatch.setitem(config._config, 'database', {'type': 'sqlite', 'default_path': str(path)})
+    monkeypatch.setattr(execution_backends, '_backends', {})
+    return path
+
+
+def run(tool_config, monkeypatch, query):
+    monkeypatch.setitem(config._config, 'tool_execute_sql', tool_config)
+    return execute_sql_query.invoke({"query": query})
+
+
+def test_summary_cut_off_by_the_injected_limit_is_marked_partial(sqlite_database, monkeypatch):
+    result = run({'max_results': 100, 'summarize_threshold': 10}, monkeypatch, "SELECT n FROM numbers")
+    assert result["format"] == "summary"
+    assert result["row_count"] == 101
+    assert result["row_count_is_lower_bound"] is True
+    assert result["summary"]["truncated"] is True
+    assert "first 101 rows only" in result["message"]
+
+
+def test_complete_summary_is_not_marked_partial(sqlite_database, monkeypatch):
+    result = run({'max_results': 100, 'summarize_threshold': 10}, monkeypatch, "SELECT n FROM numbers WHERE n < 50")
+    assert result["format"] == "summary"
+    assert result["row_count"] == 50
+    assert "row_count_is_lower_bound" not in result
+    assert "truncated" not in result["summary"]
+
+
+def test_query_log_keeps_the_asked_and_executed_sql_and_timings_of_failures(sqlite_database, monkeypatch, tmp_path):
+    monkeypatch.setattr(query_log, '_logs', {})
+    log_config = {'enabled': True, 'path': str(tmp_path / "queries.jsonl")}
+    run({'max_results': 100, 'query_log': log_config}, monkeypatch, "SELECT n FROM numbers")
+    # Fails on its first row, after counting to 200000
+    failing = ("WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 200000) "
+               "SELECT abs(-9223372036854775808 + (x - x)) FROM c WHERE x = 200000")
+    assert "error" in run({'max_results': 100, 'query_log': log_config}, monkeypatch, failing)
+    query_log._logs[log_config['path']].close()
+
+    ok, error = list(query_log.read_query_log(log_config['path']))
+    assert (ok["sql"], ok["executed_sql"], ok["rows"]) == ("SELECT n FROM numbers", "SELECT n FROM numbers LIMIT 101", 101)
+    assert error["sql"] == failing and "LIMIT 101" in error["executed_sql"]
+    assert "overflow" in error["error"] and error["elapsed_ms"] > 1
+
+
+def test_execution_timer_leaves_out_time_spent_on_rows():
+    def fetch():
+        for batch in ([1], [2]):
+            time.sleep(0.05)
+            yield batch
+
+    timer = ExecutionTimer()
+    for _ in timer.batches(fetch()):
+        time.sleep(0.1)
+    assert 0.1 <= timer.seconds < 0.2
@@ -0,0 +1,120 @@
+import json
+import sqlite3
+
+import pytest
+
+from tools.execution_backends import MongoDBExecutionBackend, SQLiteExecutionBackend, get_execution_backend
+from tools.result_profiler import ResultProfiler
+from tools.sql_rewriter import SQLRewriteError
+from tools.sql_sessions import sqlite_session
+
+mongomock = pytest.importorskip("mongomock")
+
+MONGO_CONFIG = {'type': 'mongodb', 'connection_string': 'mongodb://localhost', 'database_name': 'test'}
+
+
+@pytest.fixture
+def mongo_backend():
+    with mongomock.patch(servers=(('localhost', 27017),)):
+        backend = MongoDBExecutionBackend(MONGO_CONFIG)
+        yield backend
+        backend.close()
+
+
+def fetch(backend, query, max_rows=100, batch_size=100):
+    prepared = backend.prepare(query, max_rows)
+    with backend.stream(prepared["query"], batch_size) as (columns, batches):
+        rows = [row for batch in batches for row in batch]
+    return columns, rows
+
+
+def test_nested_documents_become_json_text_and_can_be_profiled(mongo_backend):
+    mongo_backend.client['test']['orders'].insert_one(
+        {"customer": {"name": "Ann", "city": "Lyon"}, "items": [1, 2], "total": 3.5}
+    )
+    columns, rows = fetch(mongo_backend, '{"collection": "orders", "pipeline": [{"$project": {"_id": 0}}]}')
+    row = dict(zip(columns, rows[0]))
+    assert json.loads(row["customer"]) == {"name": "Ann", "city": "Lyon"}
+    assert json.loads(row["items"]) == [1, 2]
+
+    profiler = ResultProfiler(columns)
+    profiler.update(rows)
+    assert profiler.summary()["row_count"] == 1
+
+
+def test_limit_goes_before_a_terminal_out_stage():
+    with mongomock.patch(servers=(('localhost', 27017),)):
+        backend = MongoDBExecutionBackend(dict(MONGO_CONFIG, read_only=False))
+        prepared = backend.prepare('{"collection": "orders", "pipeline": [{"$match": {}}, {"$out": "copy"}]}', 10)
+    pipeline = json.loads(prepared["query"])["pipeline"]
+    assert pipeline == [{"$match": {}}, {"$limit": 10}, {"$out": "copy"}]
+
+
+def test_columns_include_fields_first_seen_in_later_batches(mongo_backend):
+    mongo_backend.client['test']['events'].insert_many([{"a": 1}, {"a": 2}, {"a": 3, "b": "late"}])
+    columns, rows = fetch(mongo_backend, '{"collection": "events", "pipeline": [{"$project": {"_id": 0}}]}',
+                          batch_size=2)
+    assert columns == ["a", "b"]
+    assert rows == [(1,), (2,), (3, "late")]
+
+
+def test_execute_sql_query_summarizes_nested_mongodb_documents(monkeypatch):
+    from config import config
+    from tools import execution_backends
+    from tools.execute_sql import execute_sql_query
+
+    monkeypatch.setitem(config._config, 'database', dict(MONGO_CONFIG))
+    monkeypatch.setitem(config._config, 'tool_execute_sql', {'max_results': 100, 'summarize_threshold': 2})
+    monkeypatch.setattr(execution_backends, '_backends', {})
+    with mongomock.patch(servers=(('localhost', 27017),)):
+        execution_backends.get_execution_backend(config.database_config).client['test']['orders'].insert_many(
+            [{"n": n, "tags": ["a", "b"]} for n in range(3)] + [{"n": 3, "tags": ["a"], "extra": {"k": 1}}]
+        )
+        result = execute_sql_query.invoke({"query": '{"collection": "orders", "pipeline": [{"$project": {"_id": 0}}]}'})
+    assert "error" not in result, result
+    assert result["format"] == "summary"
+    assert [column["name"] for column in result["summary"]["columns"]] == ["n", "tags", "extra"]
+
+
+@pytest.fixture
+def sqlite_config(tmp_path):
+    path = tmp_path / "shop.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, total REAL)")
+        conn.executemany("INSERT INTO orders (total) VALUES (?)", [(n,) for n in range(5)])
+    return {'type': 'sqlite', 'default_path': str(path)}
+
+
+def test_sqlite_backend_caps_rows_and_streams_batches(sqlite_config):
+    backend = SQLiteExecutionBackend(sqlite_config)
+    prepared = backend.prepare("SELECT id FROM orders ORDER BY id", max_rows=3)
+    assert prepared["limit_applied"]
+    with backend.stream(prepared["query"], 2) as (columns, batches):
+        assert columns == ["id"]
+        assert list(batches) == [[(1,), (2,)], [(3,)]]
+    with pytest.raises(SQLRewriteError):
+        backend.prepare("DELETE FROM orders", max_rows=3)
+
+
+def test_sqlite_reads_reuse_one_query_only_connection_per_thread(sqlite_config):
+    backend = SQLiteExecutionBackend(sqlite_config)
+    seen = []
+    for _ in range(2):
+        with backend.stream("SELECT 1", 10) as (columns, batches):
+            list(batches)
+        with sqlite_session(backend.db_path, sqlite_config) as conn:
+            seen.append(conn)
+    assert seen[0] is seen[1]
+    with pytest.raises(sqlite3.OperationalError):
+        seen[0].execute("DELETE FROM orders")
+
+
+def test_backends_are_shared_per_configuration(sqlite_config, monkeypatch):
+    from tools import execution_backends
+
+    monkeypatch.setattr(execution_backends, '_backends', {})
+    backend = get_execution_backend(sqlite_config)
+    assert get_execution_backend(dict(sqlite_config)) is backend
+    assert get_execution_backend(dict(sqlite_config, read_only=False)) is not backend
+    with pytest.raises(ValueError):
+        get_execution_backend({'type': 'oracle'})
@@ -0,0 +1,73 @@
+import json
+import sqlite3
+
+from tools.index_advisor import SQLiteIndexAdvisor, analyze_predicates, candidate_indexes, load_workload
+
+
+def test_predicates_are_attributed_to_their_tables():
+    usage = analyze_predicates(
+        "SELECT c.name, SUM(total) FROM customers c JOIN orders o ON o.customer_id = c.customer_id "
+        "WHERE c.city = 'Lyon' AND status IN ('paid') AND o.created_at >= '2024-01-01' "
+        "GROUP BY c.name ORDER BY c.name",
+        {"customers": ["customer_id", "name", "city"], "orders": ["customer_id", "status", "total", "created_at"]}
+    )
+    assert usage == {
+        "customers": {"equality": ["city"], "range": [], "join": ["customer_id"], "order": ["name"], "group": ["name"]},
+        "orders": {"equality": ["status"], "range": ["created_at"], "join": ["customer_id"], "order": [], "group": []}
+    }
+    assert candidate_indexes(usage) == [
+        ("customers", ("city",)), ("customers", ("city", "name")), ("customers", ("customer_id",)),
+        ("customers", ("name",)),
+        ("orders", ("status", "created_at")), ("orders", ("customer_id",))
+    ]
+
+
+def test_workload_groups_successful_reads_by_shape_most_total_time_first(tmp_path):
+    log_path = tmp_path / "queries.jsonl"
+    entries = [
+        {"database": "sqlite", "sql": "SELECT * FROM orders WHERE id = 1", "elapsed_ms": 2.0},
+        {"database": "sqlite", "sql": "SELECT * FROM orders WHERE id = 2", "elapsed_ms": 4.0},
+        {"database": "sqlite", "sql": "SELECT * FROM orders WHERE id = 2", "elapsed_ms": 4.0},
+        {"database": "sqlite", "sql": "SELECT COUNT(*) FROM customers", "elapsed_ms": 9.0},
+        {"database": "sqlite", "sql": "SELECT * FROM missing", "elapsed_ms": 1.0, "error": "no such table"},
+        {"database": "sqlite", "sql": "PRAGMA table_info(orders)", "elapsed_ms": 50.0},
+        {"database": "postgresql", "sql": "SELECT 1", "elapsed_ms": 99.0}
+    ]
+    log_path.write_text("".join(json.dumps(entry) + "\n" for entry in entries))
+    workload = load_workload(str(log_path))
+    assert [(group["queries"], group["count"], group["total_ms"]) for group in workload] == [
+        (["SELECT * FROM orders WHERE id = 1", "SELECT * FROM orders WHERE id = 2"], 3, 10.0),
+        (["SELECT COUNT(*) FROM customers"], 1, 9.0)
+    ]
+    assert workload[0]["avg_ms"] == 10.0 / 3
+
+
+def test_advisor_keeps_indexes_that_speed_up_the_log_and_leaves_the_source_alone(tmp_path):
+    db_path = tmp_path / "shop.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript("""
+            CREATE TABLE orders (order_id INTEGER PRIMARY KEY, customer_id INTEGER, status TEXT, total REAL);
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000)
+            INSERT INTO orders SELECT i, i % 5000, CASE i % 4 WHEN 0 THEN 'paid' ELSE 'new' END, i % 100 FROM n;
+        """)
+    workload = [
+        {"fingerprint": "by customer", "queries": [f"SELECT total FROM orders WHERE customer_id = {n}" for n in (7, 42)],
+         "count": 20, "total_ms": 200.0, "avg_ms": 10.0},
+        {"fingerprint": "by key", "queries": ["SELECT total FROM orders WHERE order_id = 7"],
+         "count": 5, "total_ms": 1.0, "avg_ms": 0.2}
+    ]
+
+    report = SQLiteIndexAdvisor(str(db_path), str(tmp_path / "dev.db"), repeats=2).advise(workload)
+
+    assert [(item["table"], item["columns"]) for item in report["recommendations"]] == [("orders", ["customer_id"])]
+    assert report["recommendations"][0]["statement"] == \
+        'CREATE INDEX "idx_advisor_orders_customer_id" ON "orders" ("customer_id");'
+    by_customer = report["queries"][0]
+    assert by_customer["after_ms"] < by_customer["before_ms"]
+    assert by_customer["indexes"] == ["idx_advisor_orders_customer_id"]
+    assert any(detail.startswith("SCAN") for detail in by_customer["plan_before"])
+    # The primary key lookup needs nothing; the source database and the dev copy are left as they were
+    assert report["queries"][1]["indexes"] == [] and report["rejected"] == []
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index'").fetchone()[0] == 0
+    assert not (tmp_path / "dev.db").exists()
@@ -0,0 +1,171 @@
+import asyncio
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import openai
+import pytest
+import uvicorn
+from langchain_core.messages import HumanMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
+
+from services.llm_client import LoopLocalTransport, ResilientChatModel
+from utils.fake_openai_server import create_app
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_shared_async_client_works_across_event_loops():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    transport = LoopLocalTransport(httpx.Limits(max_connections=4, max_keepalive_connections=2))
+    client = httpx.AsyncClient(transport=transport)
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    async def fetch():
+        responses = [await client.get(url) for _ in range(2)]  # The second reuses the pooled connection
+        return [response.text for response in responses], transport._transport()
+
+    try:
+        first_texts, first_pool = asyncio.run(fetch())
+        # A pooled connection from the closed first loop would fail here
+        second_texts, second_pool = asyncio.run(fetch())
+    finally:
+        server.shutdown()
+    assert first_texts == second_texts == ["ok", "ok"]
+    assert first_pool is not second_pool
+
+
+class FakeModel:
+    def __init__(self, tools=None):
+        self.tools = tools
+
+    def bind_tools(self, tools, **kwargs):
+        return FakeModel(tools)
+
+
+def test_bind_tools_keeps_the_resilient_wrapper():
+    model = ResilientChatModel(FakeModel(), timeout=5, retry_attempts=2, backoff_base=0.1, backoff_max=1.0,
+                               hedge=True, hedge_min_samples=3)
+    bound = model.bind_tools(["get_schema"])
+    assert isinstance(bound, ResilientChatModel)
+    assert bound.llm.tools == ["get_schema"]
+    assert (bound.timeout, bound.retry_attempts, bound.backoff_base, bound.backoff_max, bound.hedge,
+            bound.hedge_min_samples) == (5, 2, 0.1, 1.0, True, 3)
+
+
+@contextmanager
+def fake_openai(**options):
+    '''utils/fake_openai_server.py on a free port; yields (base_url, app).'''
+    app = create_app(base_latency=0.01, slow_rate=0, error_rate=0, **options)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}/v1", app
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def resilient(base_url, **options):
+    llm = ChatOpenAI(model="fake", api_key="fake", base_url=base_url, max_retries=0, timeout=5)
+    return ResilientChatModel(llm, **dict({"timeout": 5, "retry_attempts": 3, "backoff_base": 0.01}, **options))
+
+
+def test_rate_limits_and_server_errors_are_retried():
+    with fake_openai(script=[429, 503]) as (base_url, app):
+        model = resilient(base_url)
+        response = asyncio.run(model.ainvoke([HumanMessage(content="hi")]))
+    assert response.content == "SELECT 1 -- hi"
+    assert app.state.requests == 3
+    assert (model.stats["retries"], model.stats["failures"]) == (2, 0)
+
+
+def test_retry_after_is_honoured():
+    with fake_openai(script=[429], retry_after=0.3) as (base_url, app):
+        model = resilient(base_url)
+        start = time.perf_counter()
+        model.invoke([HumanMessage(content="hi")])
+        elapsed = time.perf_counter() - start
+    assert elapsed >= 0.3
+    assert model.stats["retries"] == 1
+
+
+def test_final_error_is_reraised_after_the_last_attempt():
+    with fake_openai(script=[429, 429]) as (base_url, app):
+        model = resilient(base_url, retry_attempts=1)
+        with pytest.raises(openai.RateLimitError) as error:
+            asyncio.run(model.ainvoke([HumanMessage(content="hi")]))
+    assert error.value.status_code == 429
+    assert (model.stats["retries"], model.stats["failures"]) == (1, 1)
+
+
+def test_slow_attempts_time_out_and_are_retried():
+    with fake_openai(script=["slow"], slow_latency=2.0) as (base_url, app):
+        model = resilient(base_url, timeout=0.3)
+        response = asyncio.run(model.ainvoke([HumanMessage(content="hi")]))
+    assert response.content == "SELECT 1 -- hi"
+    assert (model.stats["timeouts"], model.stats["retries"]) == (1, 1)
+
+
+def test_hedged_request_wins_over_a_slow_one():
+    with fake_openai(script=["ok", "ok", "ok", "slow"], slow_latency=2.0) as (base_url, app):
+        model = resilient(base_url, hedge=True, hedge_min_samples=3)
+
+        async def run():
+            for _ in range(3):  # Latency samples for the p95 hedge delay
+                await model.ainvoke([HumanMessage(content="warm up")])
+            start = time.perf_counter()
+            response = await model.ainvoke([HumanMessage(content="hi")])
+            return response, time.perf_counter() - start
+
+        response, elapsed = asyncio.run(run())
+    assert response.content == "SELECT 1 -- hi"
+    assert elapsed < 1.0
+    assert (model.stats["hedges"], model.stats["hedge_wins"]) == (1, 1)
+    assert app.state.requests == 5
+
+
+def test_composes_with_prompts_and_parsers():
+    with fake_openai(script=[503]) as (base_url, app):
+        chain = ChatPromptTemplate.from_template("{question}") | resilient(base_url) | StrOutputParser()
+        assert chain.invoke({"question": "hi"}) == "SELECT 1 -- hi"
+        assert asyncio.run(chain.ainvoke({"question": "again"})) == "SELECT 1 -- again"
+
+
+def test_stats_are_exact_under_concurrent_calls():
+    with fake_openai() as (base_url, app):
+        model = resilient(base_url)
+
+        async def burst():
+            await asyncio.gather(*(model.ainvoke([HumanMessage(content="hi")]) for _ in range(20)))
+
+        threads = [threading.Thread(target=asyncio.run, args=(burst(),)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert model.stats["calls"] == app.state.requests == 80
+    assert len(model.latencies) == 80
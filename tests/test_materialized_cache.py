@@ -0,0 +1,131 @@
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+import sqlite3
+from uuid import UUID
+
+from tools.execution_backends import ExecutionBackend, SQLiteExecutionBackend
+from tools.materialized_cache import MaterializedCache, MaterializedCacheBackend, table_change_tokens
+
+
+class FakeBackend(ExecutionBackend):
+    '''Records the statements it is asked to run and answers with canned rows.'''
+
+    def __init__(self, database_config, rows):
+        super().__init__(database_config)
+        self.rows = rows
+        self.queries = []
+
+    def cache_key(self) -> str:
+        return "fake"
+
+    @contextmanager
+    def stream(self, query, batch_size):
+        self.queries.append(query)
+        yield ["token"], iter([self.rows])
+
+
+def read_back(cache, info, tokens):
+    entry = cache.lookup(info, tokens)
+    with cache.read(entry, 2) as (columns, batches):
+        return columns, [row for batch in batches for row in batch]
+
+
+def test_driver_types_survive_materialization(tmp_path):
+    cache = MaterializedCache(str(tmp_path / "cache.db"), {'type': 'sqlite', 'default_path': 'unused.db'})
+    info = cache.describe("SELECT * FROM orders")
+    rows = [
+        (Decimal("10.10"), datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc), date(2024, 5, 1), True,
+         [1, {"a": 2}], UUID(int=7), timedelta(days=1, microseconds=3), "text", None),
+        (None, None, None, False, None, None, None, None, 2.5)
+    ]
+    columns = ["amount", "created", "day", "paid", "items", "id", "age", "note", "score"]
+    cache.materialize(info, columns, rows, {"orders": "t1"})
+    assert read_back(cache, info, {"orders": "t1"}) == (columns, rows)
+    assert cache.lookup(info, {"orders": "t2"}) is None
+
+
+def test_results_with_types_that_cannot_round_trip_are_not_materialized(tmp_path):
+    cache = MaterializedCache(str(tmp_path / "cache.db"), {'type': 'sqlite', 'default_path': 'unused.db'})
+    info = cache.describe("SELECT * FROM orders")
+    cache.materialize(info, ["value"], [(object(),)], {"orders": "t1"})
+    cache.materialize(cache.describe("SELECT * FROM items"), ["value"], [(1,), (True,)], {"items": "t1"})
+    assert cache.summary()["materialized"] == 0
+
+
+def test_tables_keep_their_schema_and_server_entries_expire(tmp_path):
+    cache = MaterializedCache(str(tmp_path / "cache.db"), {'type': 'postgresql'}, ttl=0, server_ttl=30)
+    info = cache.describe('SELECT * FROM sales.orders o JOIN "Items" i ON i.order_id = o.id')
+    assert info["tables"] == ['"Items"', 'sales.orders']
+    assert cache.ttl == 30
+    assert MaterializedCache(str(tmp_path / "other.db"), {'type': 'postgresql'}, ttl=600, server_ttl=30).ttl == 30
+
+
+def test_postgresql_tokens_come_from_the_backend_pool_and_include_the_file_node():
+    backend = FakeBackend({'type': 'postgresql'}, [('sales.orders', 5, 1, 0, 16384)])
+    tokens = table_change_tokens(backend.database_config, ['"Items"', 'sales.orders'], backend)
+    assert tokens == {'"Items"': "unknown", 'sales.orders': "5:1:0:16384"}
+    assert "to_regclass(t.name)" in backend.queries[0]
+    assert "pg_relation_filenode" in backend.queries[0]
+    assert """('"Items"')""" in backend.queries[0]
+
+
+def test_mysql_tokens_match_schema_and_table():
+    backend = FakeBackend({'type': 'mysql'}, [
+        ("shop", "shop", "orders", "2024-05-01 12:00:00", 10, "2024-01-01 00:00:00"),
+        ("shop", "archive", "orders", "2023-01-01 00:00:00", 99, "2022-01-01 00:00:00")
+    ])
+    tokens = table_change_tokens(backend.database_config, ["orders", "archive.orders"], backend)
+    assert tokens == {"orders": "2024-05-01 12:00:00:10:2024-01-01 00:00:00",
+                      "archive.orders": "2023-01-01 00:00:00:99:2022-01-01 00:00:00"}
+    assert "TABLE_SCHEMA = 'archive' AND TABLE_NAME = 'orders'" in backend.queries[0]
+
+
+class CountingBackend(SQLiteExecutionBackend):
+    '''SQLite backend that counts the queries reaching the source database.'''
+
+    def __init__(self, database_config):
+        super().__init__(database_config)
+        self.queries = []
+
+    @contextmanager
+    def stream(self, query, batch_size):
+        self.queries.append(query)
+        with super().stream(query, batch_size) as result:
+            yield result
+
+
+def run(backend, query, batch_size=10):
+    with backend.stream(query, batch_size) as (columns, batches):
+        return columns, [row for batch in batches for row in batch]
+
+
+def test_hot_queries_are_served_from_the_cache_until_the_source_changes(tmp_path):
+    db_path = tmp_path / "shop.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, total REAL)")
+        conn.executemany("INSERT INTO orders (total) VALUES (?)", [(n,) for n in range(5)])
+    source = CountingBackend({'type': 'sqlite', 'default_path': str(db_path)})
+    backend = MaterializedCacheBackend(
+        source, MaterializedCache(str(tmp_path / "cache.db"), source.database_config, min_executions=2, min_cost=0)
+    )
+    query = "SELECT id, total FROM orders ORDER BY id"
+    expected = (["id", "total"], [(n + 1, float(n)) for n in range(5)])
+
+    assert run(backend, query) == expected
+    # Hot from the second run, but a result only partly read is never stored
+    with backend.stream(query, 2) as (columns, batches):
+        next(batches)
+    assert backend.cache.summary()["materialized"] == 0
+    assert run(backend, query) == expected
+    assert backend.cache.summary()["materialized"] == 1
+    assert len(source.queries) == 3
+
+    assert run(backend, query.lower()) == expected  # Same normalized query, read from the cache
+    assert len(source.queries) == 3
+    assert backend.cache.summary()["hits"] == 1
+
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("INSERT INTO orders (total) VALUES (?)", [(n,) for n in range(1000)])
+    assert len(run(backend, query)[1]) == 1005
+    assert len(source.queries) == 4
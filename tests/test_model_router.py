@@ -0,0 +1,89 @@
+import asyncio
+import sqlite3
+from contextlib import contextmanager
+
+from langchain_core.messages import HumanMessage
+
+from config import config
+from tools import sql_sessions
+from services.model_router import ModelRoute, ModelRouter, ScriptedModel, extract_sql, verify_answer, verify_sql
+
+
+def fake_verifier(text):
+    '''Passes answers whose SQL doesn't mention the misspelled column Nme; answers without SQL pass.'''
+    sql = extract_sql(text)
+    if sql is not None and "Nme" in sql:
+        return False, "no such column: Nme"
+    return True, None
+
+
+def ask(router, question):
+    return asyncio.run(router.ainvoke([HumanMessage(content=question)]))
+
+
+def test_extract_sql_stops_at_the_statement_end():
+    assert extract_sql("SELECT Name FROM Artist; this lists every artist") == "SELECT Name FROM Artist"
+    assert extract_sql("Here it is:\nSELECT Name\nFROM Artist\n\nIt lists every artist.") == "SELECT Name\nFROM Artist"
+    assert extract_sql("```sql\nSELECT 1;\n```\nDone") == "SELECT 1;"
+    assert extract_sql("Which country do you mean?") is None
+
+
+def test_answers_without_sql_are_not_verified():
+    assert verify_answer("Which country do you mean?", {'type': 'sqlite'}) == (True, None)
+
+
+def test_failed_verification_escalates_and_the_rest_of_the_turn_stays_on_the_larger_model():
+    small = ScriptedModel(["SELECT Nme FROM Artist", "SELECT COUNT(*) FROM Track", "Which country do you mean?"])
+    large = ScriptedModel(["SELECT Name FROM Artist"])
+    router = ModelRouter([ModelRoute("small", small, 0.15, 0.6), ModelRoute("large", large, 2.5, 10.0)], fake_verifier)
+
+    assert ask(router, "artist names").response_metadata["model_route"] == "large"
+    assert ask(router, "number of tracks").response_metadata["model_route"] == "small"
+    # A clarifying question is a valid final answer, not a verification failure
+    assert ask(router, "customers in the country").response_metadata["model_route"] == "small"
+
+    summary = router.summary()
+    assert summary["small"]["calls"] == 3
+    assert summary["small"]["verification_failures"] == 1
+    assert summary["small"]["final_answers"] == 2
+    assert summary["large"]["calls"] == 1
+    assert summary["large"]["final_answers"] == 1
+
+
+def test_scripted_model_repeats_its_last_answer_on_later_escalations():
+    small = ScriptedModel(["SELECT Nme FROM Artist"])
+    large = ScriptedModel(["SELECT Name FROM Artist"])
+    router = ModelRouter([ModelRoute("small", small), ModelRoute("large", large)], fake_verifier)
+
+    for _ in range(2):
+        response = ask(router, "artist names")
+        assert response.content == "SELECT Name FROM Artist"
+        assert response.response_metadata["model_route"] == "large"
+    assert router.summary()["small"]["verification_failures"] == 2
+
+
+def test_verification_fails_only_on_errors_and_executes_at_most_one_row(tmp_path, monkeypatch):
+    path = tmp_path / "music.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE Track (TrackId INTEGER PRIMARY KEY, Name TEXT)")
+        conn.executemany("INSERT INTO Track (Name) VALUES (?)", [(f"track {i}",) for i in range(50)])
+    database_config = {'type': 'sqlite', 'default_path': str(path)}
+    # The validate_sql_query tool would block this scan; the query is still correct
+    monkeypatch.setitem(config._config, 'tool_validate_sql', {'max_full_scan_rows': 10})
+    executed = []
+    session = sql_sessions.database_session
+
+    @contextmanager
+    def tracing_session(database_config):
+        with session(database_config) as conn:
+            conn.set_trace_callback(executed.append)
+            try:
+                yield conn
+            finally:
+                conn.set_trace_callback(None)
+
+    monkeypatch.setattr(sql_sessions, "database_session", tracing_session)
+    assert verify_sql("SELECT Name FROM Track", database_config, execute=True) == (True, None)
+    assert executed == ["SELECT Name FROM Track LIMIT 1"]
+    passed, error = verify_sql("SELECT Nme FROM Track", database_config, execute=True)
+    assert not passed and "Nme" in error
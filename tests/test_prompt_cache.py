@@ -0,0 +1,42 @@
+import asyncio
+import threading
+import time
+
+from services import prompt_cache
+from services.prompt_cache import PromptPrefix
+
+
+def test_stale_prefix_is_served_while_the_schema_reloads_in_the_background(monkeypatch):
+    schemas = iter([{"tables": {"Artist": {}}}, {"tables": {"Album": {}}}])
+    release = threading.Event()
+    loaded_in = []
+
+    def load_schema(database_config, tool_config):
+        loaded_in.append(threading.current_thread().name)
+        schema = next(schemas)
+        if "Album" in schema["tables"]:
+            release.wait(5)
+        return schema
+
+    monkeypatch.setattr(prompt_cache, "load_schema", load_schema)
+    monkeypatch.setattr(prompt_cache, "render_schema", lambda schema, render_format: ",".join(schema["tables"]))
+    prefix = PromptPrefix("system", {}, {'cache_timeout': 300}, {'include_schema': True})
+
+    async def scenario():
+        first = await prefix.amessage()
+        prefix._built_at = 0.0  # Expired
+        start = time.perf_counter()
+        stale = await prefix.amessage()
+        served_in = time.perf_counter() - start
+        release.set()
+        for _ in range(100):
+            if prefix._fresh():
+                break
+            await asyncio.sleep(0.01)
+        return first, stale, served_in, await prefix.amessage()
+
+    first, stale, served_in, rebuilt = asyncio.run(scenario())
+    assert stale is first and first.content.endswith("Artist")
+    assert served_in < 1
+    assert rebuilt.content.endswith("Album")
+    assert threading.main_thread().name not in loaded_in
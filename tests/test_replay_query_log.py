@@ -0,0 +1,51 @@
+import json
+import sqlite3
+
+from tools.execution_backends import get_execution_backend
+from utils.replay_query_log import find_regressions, load_entries, replay, summarize
+
+
+def write_log(path, entries):
+    with open(path, "w", encoding="utf-8") as log_file:
+        for entry in entries:
+            log_file.write(json.dumps(entry) + "\n")
+
+
+def test_replay_runs_the_executed_sql_and_reports_per_shape(tmp_path):
+    database = tmp_path / "numbers.db"
+    with sqlite3.connect(database) as conn:
+        conn.execute("CREATE TABLE numbers (n INTEGER)")
+        conn.executemany("INSERT INTO numbers VALUES (?)", [(n,) for n in range(50)])
+    log_path = tmp_path / "queries.jsonl"
+    write_log(log_path, [
+        {"ts": 3, "database": "sqlite", "sql": "SELECT n FROM numbers WHERE n < 30",
+         "executed_sql": "SELECT n FROM numbers WHERE n < 30 LIMIT 11", "elapsed_ms": 0.5, "rows": 11},
+        {"ts": 1, "database": "sqlite", "sql": "SELECT n FROM numbers WHERE n < 5", "elapsed_ms": 0.5, "rows": 4},
+        {"ts": 2, "database": "sqlite", "sql": "SELECT missing FROM numbers", "error": "no such column"},
+        {"ts": 4, "database": "postgresql", "sql": "SELECT 1", "elapsed_ms": 0.1, "rows": 1}
+    ])
+    entries = load_entries(str(log_path), "sqlite")
+    # Failed and other-database entries are skipped, the rest come back in execution order
+    assert [entry["ts"] for entry in entries] == [1, 3]
+    assert entries[0]["normalized"] == entries[1]["normalized"]
+
+    backend = get_execution_backend({'type': 'sqlite', 'default_path': str(database)})
+    outcome = replay(backend, entries, concurrency=2)
+    assert sorted(result["rows"] for result in outcome["results"]) == [5, 11]
+
+    summary = summarize(outcome["results"], outcome["elapsed"])
+    shape = summary["shapes"][entries[0]["normalized"]]
+    assert (summary["queries"], summary["errors"], shape["runs"], shape["row_changes"]) == (2, 0, 2, 1)
+    assert shape["logged_p50_ms"] == 0.5
+
+
+def test_regressions_against_a_baseline_report():
+    summary = {"shapes": {
+        "SELECT ?": {"errors": 0, "p50_ms": 9.0, "logged_p50_ms": 1.0},
+        "SELECT n FROM t": {"errors": 1, "p50_ms": None, "logged_p50_ms": None},
+        "SELECT m FROM t": {"errors": 0, "p50_ms": 2.0, "logged_p50_ms": 1.9}
+    }}
+    assert [r["normalized"] for r in find_regressions(summary)] == ["SELECT ?", "SELECT n FROM t"]
+    baseline = {"shapes": {"SELECT ?": {"p50_ms": 8.5}, "SELECT n FROM t": {"errors": 1}, "SELECT m FROM t": {"p50_ms": 0.5}}}
+    regressions = find_regressions(summary, baseline)
+    assert regressions == [{"normalized": "SELECT m FROM t", "reason": "p50 0.5 -> 2.0 ms"}]
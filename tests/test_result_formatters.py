@@ -0,0 +1,40 @@
+import datetime
+import json
+
+import numpy as np
+
+from tools import result_formatters
+from tools.result_formatters import dumps, to_columnar
+
+
+def test_columns_are_emitted_once_with_repeated_strings_dictionary_encoded():
+    rows = [(1, "paid", "Lyon"), (2, "paid", "Oslo"), (3, None, "Rome"), (4, "paid", "Kyiv")]
+    payload = to_columnar(["id", "status", "city"], rows)
+    assert payload == {
+        "columns": ["id", "status", "city"],
+        "data": [[1, 2, 3, 4], {"dictionary": ["paid"], "codes": [0, 0, None, 0]}, ["Lyon", "Oslo", "Rome", "Kyiv"]]
+    }
+
+
+def test_encoding_can_be_switched_off_and_empty_results_keep_their_columns():
+    rows = [("a",), ("a",)]
+    assert to_columnar(["x"], rows, dictionary_encode=False) == {"columns": ["x"], "data": [["a", "a"]]}
+    assert to_columnar(["x", "y"], []) == {"columns": ["x", "y"], "data": [[], []]}
+
+
+def test_numpy_columns_serialize_like_plain_ones(monkeypatch):
+    rows = [(1, 0.5, "a", True), (2, 1.5, "a", False), (3, 2.5, "b", True), (4, 3.5, "a", None)]
+    columnar = to_columnar(["i", "f", "s", "b"], rows, use_numpy=True)
+    assert isinstance(columnar["data"][0], np.ndarray)
+    assert columnar["data"][3] == [True, False, True, None]  # bools and NULLs are not numeric columns
+    expected = to_columnar(["i", "f", "s", "b"], rows)
+    assert json.loads(dumps(columnar)) == expected
+    # Same JSON through the stdlib fallback
+    monkeypatch.setattr(result_formatters, "orjson", None)
+    assert json.loads(dumps(columnar)) == expected
+
+
+def test_driver_values_without_a_json_type_are_stringified():
+    assert json.loads(dumps({"blob": b"\x01\xff", "when": datetime.date(2024, 1, 2)})) == {
+        "blob": "01ff", "when": "2024-01-02"
+    }
@@ -0,0 +1,39 @@
+from tools.result_profiler import ResultProfiler
+
+
+def test_nested_values_are_profiled_instead_of_raising():
+    profiler = ResultProfiler(['a', 'b'])
+    profiler.update([({'x': 1}, [1, 2]), ({'x': 1}, [1, 2]), (None, [3])])
+    summary = profiler.summary()
+    assert summary["row_count"] == 3
+    first, second = summary["columns"]
+    assert first["nulls"] == 1 and first["distinct"] == 1
+    assert first["top_values"] == [["{'x': 1}", 2]]
+    assert second["distinct"] == 2
+
+
+def test_columns_added_between_batches_count_earlier_rows_as_null():
+    columns = ['a']
+    profiler = ResultProfiler(columns)
+    profiler.update([(1,), (2,)])
+    columns.append('b')
+    profiler.update([(3, 'x')])
+    summary = profiler.summary()
+    assert [column["name"] for column in summary["columns"]] == ['a', 'b']
+    assert summary["columns"][1]["nulls"] == 2
+
+
+def test_summary_over_several_batches():
+    profiler = ResultProfiler(['id', 'status', 'value'], top_k=2, sample_rows=3, max_distinct=4)
+    profiler.update([(1, 'paid', 5), (2, 'paid', 'n/a')])
+    profiler.update([(3, 'new', None), (4, 'paid', 7), (5, None, 1)])
+    summary = profiler.summary()
+    assert summary["row_count"] == 5
+    assert summary["sample"] == [[1, 'paid', 5], [2, 'paid', 'n/a'], [3, 'new', None]]
+    ids, status, value = summary["columns"]
+    # Five distinct ids overflow max_distinct; nothing repeats, so no top values
+    assert ids == {"name": "id", "type": "int", "nulls": 0, "min": 1, "max": 5, "distinct": ">4"}
+    assert status == {"name": "status", "type": "str", "nulls": 1, "min": "new", "max": "paid", "distinct": 2,
+                      "top_values": [["paid", 3], ["new", 1]]}
+    # SQLite dynamic typing: mixed values have no order
+    assert (value["type"], value["min"], value["max"], value["nulls"]) == ("mixed(int,str)", None, None, 1)
@@ -0,0 +1,142 @@
+import sqlite3
+
+import mongomock
+
+from tools import schema_getters
+from tools.schema_getters import (MongoDBSchemaGetter, MultiDatabaseSchemaGetter, MySQLSchemaGetter, PostgreSQLSchemaGetter,
+                                  SQLiteSchemaGetter)
+
+
+class RecordingCursor:
+    '''DB-API cursor stand-in: records statements and returns canned rows.'''
+
+    def __init__(self, rows, one=None):
+        self.rows = rows
+        self.one = one
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        self.statements.append((" ".join(statement.split()), params))
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.one
+
+    def close(self):
+        pass
+
+
+class RecordingConnection:
+    def __init__(self, rows, one=None):
+        self.cursor_ = RecordingCursor(rows, one)
+
+    def cursor(self, **kwargs):
+        return self.cursor_
+
+
+def test_mysql_fingerprints_raise_the_group_concat_limit_and_cover_indexes_and_keys():
+    getter = MySQLSchemaGetter("localhost", 3306, "root", "", "shop", {})
+    conn = RecordingConnection([("orders", "a1"), ("items", "b2")])
+    assert getter._table_fingerprints(conn, ["orders", "customers"]) == {"orders": "a1", "customers": ""}
+    (set_limit, _), (query, _) = conn.cursor_.statements
+    assert set_limit.startswith("SET SESSION group_concat_max_len")
+    assert "information_schema.statistics" in query
+    assert "information_schema.key_column_usage" in query
+    assert "FROM information_schema.tables t" in query
+
+
+def test_postgresql_lists_every_non_system_schema_and_describes_qualified_tables():
+    getter = PostgreSQLSchemaGetter("localhost", 5432, "postgres", "", "shop", {'include_relationships': True})
+    conn = RecordingConnection([("orders",), ("sales.orders",)])
+    assert getter._list_tables(conn) == ["orders", "sales.orders"]
+    query, _ = conn.cursor_.statements[0]
+    assert "'public'" not in query
+    assert "schemaname || '.' || tablename" in query
+
+    conn = RecordingConnection([], one=("sales",))
+    getter._describe_table(conn, "sales.orders")
+    params = [params for _, params in conn.cursor_.statements]
+    assert params[0] == ["sales"]
+    assert params[1] == ["sales", "orders", "sales", "orders"]
+    assert params[2] == ["sales", "orders"]
+    assert getter._split_name("orders") == (None, "orders")
+
+
+def create_database(path, statements):
+    with sqlite3.connect(path) as conn:
+        for statement in statements:
+            conn.execute(statement)
+    return str(path)
+
+
+def test_multi_database_getter_keys_each_schema_by_database_name(tmp_path):
+    config = {'include_relationships': True, 'include_indexes': False, 'exclude_system_tables': True,
+              'incremental_refresh': False, 'cache_timeout': 0}
+    sales = create_database(tmp_path / "sales.db", [
+        "CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT)",
+        "CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER REFERENCES customers(id))"
+    ])
+    analytics = create_database(tmp_path / "analytics.db", ["CREATE TABLE events (id INTEGER, kind TEXT NOT NULL)"])
+    getter = MultiDatabaseSchemaGetter(
+        {"sales": SQLiteSchemaGetter(sales, config), "analytics": SQLiteSchemaGetter(analytics, config)}, config
+    )
+
+    schema = getter.get_schema()
+    assert sorted(schema["databases"]) == ["analytics", "sales"]
+    assert [table["name"] for table in schema["databases"]["sales"]["tables"]] == ["customers", "orders"]
+    orders = schema["databases"]["sales"]["tables"][1]
+    assert orders["foreign_keys"] == [{"from": "customer_id", "to_table": "customers", "to_column": "id"}]
+    events = schema["databases"]["analytics"]["tables"][0]
+    assert [(column["name"], column["notnull"]) for column in events["columns"]] == [("id", False), ("kind", True)]
+    assert getter.cache_key() == f"multi:analytics=sqlite:{analytics},sales=sqlite:{sales}"
+
+
+def test_parallel_introspection_of_a_thousand_tables_matches_the_sequential_path(tmp_path):
+    statements = []
+    for i in range(1000):
+        reference = f", parent_id INTEGER REFERENCES t{i - 1}(id)" if i else ""
+        statements.append(f"CREATE TABLE t{i} (id INTEGER PRIMARY KEY, name_{i} TEXT NOT NULL{reference})")
+        if i % 10 == 0:
+            statements.append(f"CREATE INDEX t{i}_name ON t{i} (name_{i})")
+    path = create_database(tmp_path / "wide.db", statements)
+    config = {'include_relationships': True, 'include_indexes': True, 'exclude_system_tables': True,
+              'max_tables': 2000}
+
+    sequential = SQLiteSchemaGetter(path, dict(config, sqlite_parallel_workers=1)).get_schema()
+    parallel = SQLiteSchemaGetter(path, dict(config, sqlite_parallel_workers=8)).get_schema()
+
+    assert parallel == sequential
+    assert [table["name"] for table in parallel["tables"]] == [f"t{i}" for i in range(1000)]
+    for i, table in enumerate(parallel["tables"]):
+        assert [column["name"] for column in table["columns"]] == ["id", f"name_{i}"] + (["parent_id"] if i else [])
+    assert len(parallel["indexes"]) == 100
+
+
+def test_mongodb_fields_are_merged_across_sampled_documents(monkeypatch):
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(schema_getters.pymongo, "MongoClient", lambda connection_string: client)
+    client.shop.orders.insert_many([
+        {"status": "paid", "total": 10, "customer": {"name": "Ana", "tags": ["vip"]}, "items": [{"sku": "a"}]},
+        {"status": "new", "total": 12.5, "customer": {"name": "Bo"}, "items": []},
+        {"status": None, "total": 7, "note": "gift", "items": [{"sku": "b", "qty": 2}]},
+        {"status": "paid", "total": 3, "customer": {"name": None}, "items": [{"sku": "c"}]}
+    ])
+    client.shop.empty.insert_one({"x": 1})
+    client.shop.empty.delete_many({})
+
+    getter = MongoDBSchemaGetter("mongodb://shop", "shop", {'mongodb_sample_size': 100, 'include_indexes': True})
+    schema = getter.get_schema()
+    assert [collection["name"] for collection in schema["collections"]] == ["orders"]  # Empty ones are left out
+    orders = schema["collections"][0]
+    assert orders["sampled_documents"] == 4
+    assert [index["name"] for index in orders["indexes"]] == ["_id_"]
+    fields = {field["name"]: field for field in orders["fields"]}
+    assert sorted(fields) == ["customer.name", "customer.tags", "customer.tags[]", "items", "items[].qty",
+                              "items[].sku", "note", "status", "total"]
+    assert fields["status"] == {"name": "status", "type": "str", "types": {"str": 0.75, "NoneType": 0.25},
+                                "frequency": 1.0, "optional": False}
+    assert fields["total"]["type"] == "int" and fields["total"]["types"] == {"int": 0.75, "float": 0.25}
+    assert (fields["note"]["frequency"], fields["note"]["optional"]) == (0.25, True)
+    assert (fields["customer.name"]["frequency"], fields["items[].sku"]["frequency"]) == (0.75, 0.75)
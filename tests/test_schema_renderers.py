@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from tools.schema_renderers import render_schema
+
+SCHEMA = {
+    "tables": [
+        {"name": "Track", "columns": [
+            {"name": "TrackId", "type": "INTEGER", "notnull": True, "pk": True},
+            {"name": "Name", "type": "NVARCHAR(200)", "notnull": True, "pk": False},
+            {"name": "AlbumId", "type": "INTEGER", "notnull": False, "pk": False, "stats": "distinct 347"}
+        ], "foreign_keys": [{"from": "AlbumId", "to_table": "Album", "to_column": "AlbumId"}], "row_estimate": 3503},
+        {"name": "Album", "columns": [
+            {"name": "AlbumId", "type": "INTEGER", "notnull": True, "pk": True},
+            {"name": "Title", "type": "NVARCHAR(160)", "notnull": True, "pk": False}
+        ], "foreign_keys": []}
+    ],
+    "indexes": [
+        {"table": "Track", "name": "IFK_TrackAlbumId", "unique": False},
+        {"table": "Album", "name": "sqlite_autoindex_Album_1", "unique": True}
+    ]
+}
+
+
+def test_compact_is_one_line_per_table_in_name_order():
+    assert render_schema(SCHEMA, 'compact') == (
+        "Album(AlbumId INTEGER PK, Title NVARCHAR(160)!)\n"
+        "Track(TrackId INTEGER PK, Name NVARCHAR(200)!, AlbumId INTEGER ->Album.AlbumId [distinct 347]) "
+        "~3503 rows idx:IFK_TrackAlbumId"
+    )
+
+
+def test_ddl_reads_like_create_table_statements():
+    assert render_schema(SCHEMA, 'ddl').splitlines() == [
+        "CREATE TABLE Album (",
+        "  AlbumId INTEGER PRIMARY KEY NOT NULL,",
+        "  Title NVARCHAR(160) NOT NULL",
+        ");",
+        "-- UNIQUE INDEX sqlite_autoindex_Album_1",
+        "CREATE TABLE Track ( -- ~3503 rows",
+        "  TrackId INTEGER PRIMARY KEY NOT NULL,",
+        "  Name NVARCHAR(200) NOT NULL,",
+        "  AlbumId INTEGER REFERENCES Album(AlbumId) -- distinct 347",
+        ");",
+        "-- INDEX IFK_TrackAlbumId"
+    ]
+
+
+def test_rendering_does_not_depend_on_catalog_order():
+    shuffled = dict(SCHEMA, tables=SCHEMA["tables"][::-1], indexes=SCHEMA["indexes"][::-1])
+    for render_format in ('json', 'ddl', 'compact'):
+        assert render_schema(shuffled, render_format) == render_schema(SCHEMA, render_format)
+    assert [table["name"] for table in json.loads(render_schema(shuffled, 'json'))["tables"]] == ["Album", "Track"]
+
+
+def test_collections_and_multi_database_documents():
+    mongo = {"collections": [{"name": "orders", "fields": [
+        {"name": "status", "type": "str", "optional": False},
+        {"name": "items[].sku", "type": "str", "optional": True}
+    ]}]}
+    assert render_schema(mongo, 'compact') == "orders{status str, items[].sku str?}"
+    multi = {"databases": {"sales": SCHEMA, "events": mongo}}
+    assert render_schema(multi, 'compact') == "\n".join([
+        "# database: events", render_schema(mongo, 'compact'),
+        "# database: sales", render_schema(SCHEMA, 'compact')
+    ])
+
+
+def test_unknown_formats_are_rejected():
+    with pytest.raises(ValueError):
+        render_schema(SCHEMA, 'yaml')
@@ -0,0 +1,38 @@
+import asyncio
+import time
+
+from services.shared_state import RateLimiter, SharedStore, ThreadIdSigner
+
+
+def test_rate_limiter_purges_counters_of_past_windows():
+    store = SharedStore()
+    limiter = RateLimiter(store, limit=2, window=0.05)
+    assert [limiter.allow("a")[0] for _ in range(3)] == [True, True, False]
+    for client in range(20):
+        limiter.allow(f"client{client}")
+    time.sleep(0.06)
+    assert limiter.allow("a")[0]
+    counters = store._conn.execute("SELECT COUNT(*) FROM counters").fetchone()[0]
+    assert counters == 1
+
+
+def test_thread_ids_are_only_accepted_when_issued_by_the_deployment(tmp_path):
+    path = str(tmp_path / "state.db")
+    issued = ThreadIdSigner(SharedStore(path)).issue()
+    # Another worker on the same state file shares the generated secret
+    other_worker = ThreadIdSigner(SharedStore(path))
+    assert other_worker.verify(issued) == issued
+    thread_id, _ = issued.split(".")
+    assert other_worker.verify(thread_id) is None
+    assert other_worker.verify(f"{thread_id}.{'0' * 32}") is None
+    assert other_worker.verify("1") is None
+    assert ThreadIdSigner(SharedStore(), secret="elsewhere").verify(issued) is None
+
+
+def test_async_allow_counts_in_the_same_window():
+    limiter = RateLimiter(SharedStore(), limit=2, window=60)
+
+    async def burst():
+        return [allowed for allowed, _ in await asyncio.gather(*(limiter.aallow("a") for _ in range(3)))]
+
+    assert sorted(asyncio.run(burst())) == [False, True, True]
@@ -0,0 +1,101 @@
+import asyncio
+import sqlite3
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from services.speculative import SpeculativeSQLGenerator, execute_candidate, result_fingerprint, vote
+
+
+@pytest.fixture
+def database_config(tmp_path):
+    path = tmp_path / "shop.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, city TEXT, total REAL)")
+        conn.executemany("INSERT INTO orders (city, total) VALUES (?, ?)",
+                         [("Lyon", 10.0), ("Oslo", 20.0), ("Lyon", 5.5)])
+    return {'type': 'sqlite', 'default_path': str(path)}
+
+
+def result(rows, sql="SELECT 1", columns=("a",), error=None):
+    return {"sql": sql, "columns": list(columns), "rows": rows, "error": error, "elapsed": 0.0}
+
+
+def test_fingerprint_ignores_row_order_and_column_names_but_not_values():
+    assert result_fingerprint(result([(1, 0.1 + 0.2), (2, 1.0)], columns=("a", "b"))) == \
+        result_fingerprint(result([(2, 1.0), (1, 0.3)], columns=("x", "y")))
+    assert result_fingerprint(result([(1,)])) != result_fingerprint(result([(2,)]))
+    assert result_fingerprint(result([(1,)])) != result_fingerprint(result([(1, None)], columns=("a", "b")))
+
+
+def test_vote_picks_the_result_most_candidates_agree_on():
+    results = [
+        result([(5,)], sql="wrong"),
+        result([(1,), (2,)], sql="first"),
+        result([], sql="empty"), result([], sql="empty again"), result([], sql="still empty"),
+        result([(2,), (1,)], sql="second"),
+        result([], error="no such column", sql="broken")
+    ]
+    # Three empty results agree, but an empty answer only wins when nothing returned rows
+    assert vote(results) == {"sql": "first", "votes": 2, "succeeded": 6, "candidates": 7}
+    # Ties go to the earliest candidate; failures never vote
+    assert vote([result([(1,)], sql="a"), result([(2,)], sql="b")])["sql"] == "a"
+    assert vote([result([], sql="empty"), result([], error="x")])["sql"] == "empty"
+    assert vote([result([], error="x")]) is None
+
+
+def test_candidates_run_read_only_capped_and_time_limited(database_config):
+    capped = execute_candidate("SELECT city FROM orders ORDER BY id", database_config, max_rows=2)
+    assert (capped["error"], capped["columns"], capped["rows"]) == (None, ["city"], [("Lyon",), ("Oslo",)])
+    assert execute_candidate("DELETE FROM orders", database_config)["error"]
+    slow = execute_candidate(
+        "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT COUNT(*) FROM c",
+        database_config, timeout=0.05
+    )
+    assert "interrupted" in slow["error"] and slow["elapsed"] < 2
+    with sqlite3.connect(database_config['default_path']) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 3
+
+
+class ScriptedModel:
+    '''Answers candidate requests with the scripted replies in order; exceptions are raised.'''
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.prompts = []
+
+    async def ainvoke(self, messages):
+        self.prompts.append(messages)
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return AIMessage(content=reply)
+
+
+def generate(model, database_config, **options):
+    generator = SpeculativeSQLGenerator(model, database_config, **dict({"num_candidates": 4}, **options))
+    messages = [SystemMessage(content="system"), HumanMessage(content="Total sales in Lyon?")]
+    return asyncio.run(generator.generate(messages))
+
+
+def test_agreeing_candidates_win_even_when_written_differently(database_config):
+    model = ScriptedModel([
+        "SELECT SUM(total) FROM orders WHERE city = 'Lyon'",
+        "```sql\nSELECT SUM(o.total) FROM orders o WHERE o.city IN ('Lyon')\n```",
+        "SELECT SUM(total) FROM orders WHERE city = 'Oslo'",
+        TimeoutError("model timed out")
+    ])
+    outcome = generate(model, database_config)
+    assert outcome == {"sql": "SELECT SUM(total) FROM orders WHERE city = 'Lyon'", "votes": 2, "succeeded": 3,
+                       "candidates": 3}
+    assert model.prompts[0][-1].content.startswith("Total sales in Lyon?\n\nReply with a single SQL query")
+
+
+def test_no_answer_without_enough_agreement(database_config):
+    model = ScriptedModel([
+        "SELECT SUM(total) FROM orders WHERE city = 'Lyon'",
+        "SELECT SUM(total) FROM orders",
+        "SELECT missing FROM orders",
+        "SELECT SUM(total) FROM orders WHERE city = 'Oslo'"
+    ])
+    assert generate(model, database_config) is None
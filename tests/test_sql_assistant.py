@@ -0,0 +1,84 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from config import config
+from tools import execution_backends
+
+
+@pytest.fixture
+def assistant(tmp_path, monkeypatch):
+    from services.agents.sql_matic import SQLQueryAssistant
+    from services.model_router import ModelRoute, ModelRouter, ScriptedModel
+
+    path = tmp_path / "music.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE Artist (ArtistId INTEGER PRIMARY KEY, Name TEXT)")
+    monkeypatch.setitem(config._config, 'database', {'type': 'sqlite', 'default_path': str(path)})
+    monkeypatch.setitem(config._config, 'tool_get_schema', dict(
+        config.tool_get_schema, include_column_stats=False, column_stats_refresh_interval=0
+    ))
+    monkeypatch.setitem(config._config, 'assistant', dict(
+        config.assistant_config,
+        few_shot={'enabled': False},
+        template_fast_path={'enabled': False},
+        speculative={'enabled': False},
+        prompt_prefix={'include_schema': True, 'log_cache_usage': False}
+    ))
+    monkeypatch.setattr(execution_backends, '_backends', {})
+    assistant = SQLQueryAssistant(preload_schema=True)
+    assistant.router = ModelRouter([ModelRoute("scripted", ScriptedModel(["SELECT Name FROM Artist"]))])
+    return assistant
+
+
+def test_schema_is_preloaded_once_per_thread_and_left_out_of_the_prefix(assistant):
+    async def conversation():
+        await assistant.process_query("artist names", thread_id="t1")
+        await assistant.process_query("and their ids", thread_id="t1")
+        state = await assistant.graph.aget_state({"configurable": {"thread_id": "t1"}})
+        return state.values["messages"]
+
+    messages = asyncio.run(conversation())
+    preloads = [message for message in messages if getattr(message, "name", None) == "get_schema"]
+    assert len(preloads) == 1
+    assert "Artist" in preloads[0].content
+    assert "Artist" not in assistant.prompt_prefix.message().content
+
+
+def test_evaluation_runs_every_question_on_its_own_thread(assistant, tmp_path):
+    ground_truth = tmp_path / "ground_truth.csv"
+    ground_truth.write_text('User Input,Ground Truth SQL\n'
+                            'artist names,SELECT Name FROM Artist\n'
+                            'all artists,SELECT Name FROM Artist\n')
+    assistant.evaluator.ground_truth_path = ground_truth
+    searches = []
+
+    class Retriever:
+        def search(self, question, k, min_similarity, exclude_exact=False):
+            searches.append(exclude_exact)
+            return []
+
+    assistant.example_retriever = Retriever()
+    threads = []
+    process_query = assistant.process_query
+
+    async def recording_process_query(query, thread_id=None, evaluation=False):
+        threads.append(thread_id)
+        return await process_query(query, thread_id=thread_id, evaluation=evaluation)
+
+    assistant.process_query = recording_process_query
+
+    async def evaluate():
+        results = await assistant.evaluate_performance()
+        await assistant.process_query("artist names", thread_id="chat")
+        states = [await assistant.graph.aget_state({"configurable": {"thread_id": thread}}) for thread in threads[:2]]
+        return results, states
+
+    results, states = asyncio.run(evaluate())
+    assert results["successful_queries"] == 2
+    assert len(set(threads[:2])) == 2
+    for state in states:
+        assert [message.name for message in state.values["messages"] if message.type == "tool"] == ["get_schema"]
+    # Exact matches are excluded for the evaluation only, not for the chat question that follows
+    assert searches == [True, True, False]
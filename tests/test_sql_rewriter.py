@@ -0,0 +1,102 @@
+import sqlite3
+
+import pytest
+
+from tools.sql_rewriter import MultipleStatementsError, SQLRewriteError, classify_statement, rewrite_query
+
+
+@pytest.mark.parametrize("db_type, query, expected", [
+    ("sqlite", "SELECT * FROM t", "SELECT * FROM t LIMIT 101"),
+    ("sqlite", "SELECT * FROM t LIMIT 5000", "SELECT * FROM t LIMIT 101"),
+    ("postgresql", "SELECT * FROM t FETCH FIRST 1000 ROWS ONLY", "SELECT * FROM t FETCH FIRST 101 ROWS ONLY"),
+    ("postgresql", "SELECT * FROM t FETCH FIRST 5 ROWS WITH TIES",
+     "SELECT * FROM (SELECT * FROM t FETCH FIRST 5 ROWS WITH TIES) AS _capped LIMIT 101"),
+    ("sqlite", "SELECT * FROM t LIMIT (SELECT 1000)",
+     "SELECT * FROM (SELECT * FROM t LIMIT (SELECT 1000)) AS _capped LIMIT 101")
+])
+def test_row_cap_is_injected_or_clamped(db_type, query, expected):
+    result = rewrite_query(query, db_type, max_rows=101)
+    assert result == {"sql": expected, "normalized": result["normalized"], "limit_applied": True}
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM t LIMIT 10",
+    "SELECT * FROM t FETCH FIRST ROW ONLY",
+    "PRAGMA table_info(t)"
+])
+def test_tighter_limits_and_non_queries_are_left_alone(query):
+    assert rewrite_query(query, "sqlite", max_rows=101) == {
+        "sql": query, "normalized": rewrite_query(query, "sqlite")["normalized"], "limit_applied": False
+    }
+
+
+def test_limit_is_pushed_into_a_plain_projection_of_a_subquery():
+    result = rewrite_query("SELECT a, b + 1 AS c FROM (SELECT a, b FROM t) s", "sqlite", max_rows=101)
+    assert result["sql"] == "SELECT a, b + 1 AS c FROM (SELECT a, b FROM t LIMIT 101) AS s LIMIT 101"
+
+
+@pytest.mark.parametrize("db_type, outer", [
+    ("postgresql", "SELECT UNNEST(x) FROM"),
+    ("postgresql", "SELECT jsonb_array_elements(x) FROM"),
+    ("postgresql", "SELECT generate_series(1, x) FROM"),
+    ("sqlite", "SELECT DISTINCT x FROM"),
+    ("sqlite", "SELECT COUNT(*) FROM"),
+    ("sqlite", "SELECT x, ROW_NUMBER() OVER () FROM")
+])
+def test_limit_is_not_pushed_below_projections_that_change_row_counts(db_type, outer):
+    result = rewrite_query(f"{outer} (SELECT x FROM t) AS s", db_type, max_rows=101)
+    assert "(SELECT x FROM t) AS s" in result["sql"]
+
+
+@pytest.mark.parametrize("tail", ["JOIN u ON u.x = s.x", "WHERE s.x > 1", "ORDER BY s.x"])
+def test_limit_is_not_pushed_below_filters_joins_or_sorts(tail):
+    result = rewrite_query(f"SELECT s.x FROM (SELECT x FROM t) AS s {tail}", "sqlite", max_rows=101)
+    assert "(SELECT x FROM t) AS s" in result["sql"]
+
+
+def test_pushed_down_limit_keeps_the_results():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(10)])
+    for query in ("SELECT x * 2 FROM (SELECT x FROM t) s",
+                  "SELECT s.x FROM (SELECT x FROM t) s JOIN t u ON u.x >= s.x",
+                  "SELECT s.x FROM (SELECT x FROM t) s WHERE s.x > 6"):
+        rewritten = rewrite_query(query, "sqlite", max_rows=3)["sql"]
+        assert conn.execute(rewritten).fetchall() == conn.execute(query).fetchall()[:3]
+
+
+@pytest.mark.parametrize("db_type, query", [
+    ("sqlite", "SELECT 1"),
+    ("sqlite", "EXPLAIN QUERY PLAN SELECT * FROM t"),
+    ("sqlite", "EXPLAIN DELETE FROM t"),
+    ("sqlite", "PRAGMA table_info(t)"),
+    ("sqlite", 'PRAGMA main.index_list("t")'),
+    ("postgresql", "EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM t"),
+    ("postgresql", "SHOW search_path"),
+    ("mysql", "EXPLAIN FORMAT=JSON SELECT 1"),
+    ("mysql", "SHOW TABLES"),
+    ("mysql", "DESCRIBE t")
+])
+def test_reads(db_type, query):
+    assert classify_statement(query, db_type) == "read"
+
+
+@pytest.mark.parametrize("db_type, query", [
+    ("sqlite", "INSERT INTO t VALUES (1)"),
+    ("sqlite", "PRAGMA journal_mode = WAL"),
+    ("sqlite", "VACUUM"),
+    ("postgresql", "EXPLAIN ANALYZE DELETE FROM t"),
+    ("postgresql", "EXPLAIN (ANALYZE) INSERT INTO t VALUES (1)"),
+    ("postgresql", "WITH d AS (DELETE FROM t RETURNING *) SELECT * FROM d"),
+    ("postgresql", "SELECT * INTO t2 FROM t"),
+    ("mysql", "EXPLAIN ANALYZE DELETE FROM t")
+])
+def test_writes(db_type, query):
+    assert classify_statement(query, db_type) == "write"
+    with pytest.raises(SQLRewriteError):
+        rewrite_query(query, db_type, max_rows=101)
+
+
+def test_several_statements_are_rejected():
+    with pytest.raises(MultipleStatementsError):
+        rewrite_query("SELECT 1; DROP TABLE t", "sqlite", read_only=False)
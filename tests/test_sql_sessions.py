@@ -0,0 +1,86 @@
+import sqlite3
+import sys
+import threading
+import types
+
+import pytest
+
+from tools.sql_sessions import database_session, postgresql_session, sqlite_session, sqlite_uri
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "shop.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY)")
+        conn.execute("INSERT INTO orders VALUES (1)")
+    return str(path)
+
+
+@pytest.mark.parametrize("statement", [
+    "INSERT INTO orders VALUES (2)",
+    "DROP TABLE orders",
+    "CREATE TABLE t (x)",
+    "PRAGMA user_version = 5"
+])
+def test_read_only_sqlite_session_refuses_writes(db_path, statement):
+    with pytest.raises(sqlite3.OperationalError):
+        with sqlite_session(db_path, {}) as conn:
+            conn.execute(statement)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 1
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+
+
+def test_read_only_connections_are_reused_per_thread_and_dropped_after_errors(db_path):
+    def connection():
+        with sqlite_session(db_path, {}) as conn:
+            return conn
+
+    first = connection()
+    assert connection() is first
+    other = []
+    thread = threading.Thread(target=lambda: other.append(connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not first
+
+    with pytest.raises(sqlite3.OperationalError):
+        with sqlite_session(db_path, {}) as conn:
+            conn.execute("SELECT * FROM missing")
+    assert connection() is not first
+
+
+def test_writable_session_commits_when_read_only_is_off(db_path):
+    with database_session({'type': 'sqlite', 'default_path': db_path, 'read_only': False}) as conn:
+        conn.execute("INSERT INTO orders VALUES (2)")
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 2
+
+
+def test_sqlite_uri_options():
+    assert sqlite_uri("a.db", {}) == "file:a.db?mode=ro"
+    assert sqlite_uri("a.db", {'sqlite_immutable': True, 'sqlite_shared_cache': True}) == \
+        "file:a.db?mode=ro&immutable=1&cache=shared"
+
+
+def test_postgresql_session_is_read_only_and_always_rolled_back(monkeypatch):
+    calls = []
+
+    class Connection:
+        def set_session(self, **kwargs):
+            calls.append(("set_session", kwargs))
+
+        def commit(self):
+            calls.append(("commit", None))
+
+        def rollback(self):
+            calls.append(("rollback", None))
+
+        def close(self):
+            calls.append(("close", None))
+
+    monkeypatch.setitem(sys.modules, "psycopg2", types.SimpleNamespace(connect=lambda **kwargs: Connection()))
+    with postgresql_session({'host': 'db'}):
+        pass
+    assert calls == [("set_session", {"readonly": True}), ("rollback", None), ("close", None)]
@@ -0,0 +1,72 @@
+import sqlite3
+
+import pytest
+
+from services.template_matcher import TemplateMatcher, learn_template
+
+EXAMPLES = [
+    ("List all customers who live in Paris",
+     "SELECT c.FirstName FROM Customer c WHERE c.City = 'Paris'"),
+    ("Show the 5 longest tracks of the genre 'Rock'",
+     "SELECT Name FROM Track WHERE GenreName = 'Rock' ORDER BY Milliseconds DESC LIMIT 5")
+]
+
+
+@pytest.fixture
+def database_config(tmp_path):
+    path = tmp_path / "music.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE Customer (FirstName TEXT, City TEXT)")
+        conn.executemany("INSERT INTO Customer VALUES (?, ?)", [("Ana", "Paris"), ("Bo", "São Paulo"), ("Cy", "Oslo")])
+        conn.execute("CREATE TABLE Track (Name TEXT, GenreName TEXT, Milliseconds INTEGER)")
+        conn.executemany("INSERT INTO Track VALUES (?, ?, ?)", [("a", "Rock", 1), ("b", "Jazz", 2)])
+    return {'type': 'sqlite', 'default_path': str(path)}
+
+
+def test_slots_are_the_literals_shared_by_question_and_sql():
+    template = learn_template(*EXAMPLES[1], dialect='sqlite')
+    assert [(slot.name, slot.numeric, slot.table, slot.column) for slot in template.slots] == [
+        ("slot0", True, None, None), ("slot1", False, "Track", "GenreName")
+    ]
+    assert template.literal_slots == {"5": "slot0", "Rock": "slot1"}
+    match = template.pattern.match("show the 10  longest tracks of the genre \"Jazz\"")
+    assert (match.group("slot0"), match.group("slot1")) == ("10", "Jazz")
+    assert template.fill({"slot0": 3, "slot1": "Jazz"}) == "Show the 3 longest tracks of the genre 'Jazz'"
+    # The alias resolves to its table
+    assert learn_template(*EXAMPLES[0], dialect='sqlite').slots[0].table == "Customer"
+
+
+def test_string_slots_that_cannot_be_tied_to_a_column_are_not_learned():
+    assert learn_template("Say hello", "SELECT 'hello'", dialect='sqlite') is None
+    assert learn_template("Customers in Paris", "SELECT * FROM Customer WHERE lower(City) = 'Paris'",
+                          dialect='sqlite') is None
+
+
+@pytest.mark.parametrize("max_index_values", [10000, 0])  # Cached distinct values, then point lookups
+def test_match_fills_values_found_in_the_slot_columns(database_config, max_index_values):
+    matcher = TemplateMatcher(EXAMPLES, database_config, max_index_values)
+    assert matcher.match("List all customers who live in São Paulo?") == {
+        "sql": "SELECT c.FirstName FROM Customer AS c WHERE c.City = 'São Paulo'",
+        "parameterized_sql": "SELECT c.FirstName FROM Customer AS c WHERE c.City = ?",
+        "params": ["São Paulo"],
+        "template": EXAMPLES[0][0]
+    }
+    tracks = matcher.match("Show the 2 longest tracks of the genre Jazz")
+    assert tracks["sql"].endswith("WHERE GenreName = 'Jazz' ORDER BY Milliseconds DESC LIMIT 2")
+    # Params bind in placeholder order: WHERE before LIMIT
+    assert tracks["parameterized_sql"].endswith("WHERE GenreName = ? ORDER BY Milliseconds DESC LIMIT ?")
+    assert tracks["params"] == ["Jazz", "2"]
+    with sqlite3.connect(database_config['default_path']) as conn:
+        assert conn.execute(tracks["parameterized_sql"], tracks["params"]).fetchall() == \
+            conn.execute(tracks["sql"]).fetchall() == [("b",)]
+
+
+def test_cached_values_match_case_insensitively_and_keep_the_stored_spelling(database_config):
+    matcher = TemplateMatcher(EXAMPLES, database_config)
+    assert matcher.match("list all customers who live in OSLO")["params"] == ["Oslo"]
+
+
+def test_values_missing_from_the_column_fall_through(database_config):
+    matcher = TemplateMatcher(EXAMPLES, database_config)
+    assert matcher.match("List all customers who live in Atlantis") is None
+    assert matcher.match("List every customer living in Paris") is None
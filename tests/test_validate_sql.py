@@ -0,0 +1,82 @@
+import sqlite3
+from contextlib import contextmanager
+
+import pytest
+
+from tools import validate_sql
+from tools.validate_sql import explain_query
+
+
+@pytest.fixture
+def database_config(tmp_path):
+    path = tmp_path / "shop.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER, total REAL)")
+        conn.executemany("INSERT INTO customers (name) VALUES (?)", [(f"c{i}",) for i in range(50)])
+        conn.executemany("INSERT INTO orders (customer_id, total) VALUES (?, ?)", [(i % 50, i) for i in range(500)])
+    return {'type': 'sqlite', 'default_path': str(path)}
+
+
+def test_sqlite_plan_lists_referenced_columns_and_full_scans(database_config):
+    result = explain_query(
+        "SELECT c.name, o.total FROM orders o JOIN customers c ON c.id = o.customer_id", database_config,
+        max_full_scan_rows=0
+    )
+    assert result["valid"] and not result["blocked"]
+    assert result["tables"] == ["customers", "orders"]
+    assert result["columns"] == ["customers.id", "customers.name", "orders.customer_id", "orders.total"]
+    assert [(scan["table"], scan["estimated_rows"]) for scan in result["full_scans"]] == [("orders", 500)]
+    assert result["estimated_cost"] == 500
+
+
+def test_full_scans_over_the_limit_are_blocked_but_key_lookups_are_not(database_config):
+    blocked = explain_query("SELECT * FROM orders WHERE total > 10", database_config, max_full_scan_rows=100)
+    assert (blocked["valid"], blocked["blocked"]) == (False, True)
+    assert "orders (~500 rows) exceeds 100 rows" in blocked["error"]
+    lookup = explain_query("SELECT * FROM orders WHERE id = 10", database_config, max_full_scan_rows=100)
+    assert lookup["valid"] and lookup["full_scans"] == []
+
+
+@pytest.mark.parametrize("query, error", [
+    ("SELECT * FROM missing", "no such table"),
+    ("SELECT FROM WHERE", "syntax error"),
+    ("SELECT 1; DELETE FROM orders", "one")
+])
+def test_invalid_queries_are_reported_without_running(database_config, query, error):
+    result = explain_query(query, database_config, max_full_scan_rows=0)
+    assert result["valid"] is False and error in result["error"].lower()
+    with sqlite3.connect(database_config['default_path']) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 500
+
+
+def test_postgresql_plan_is_walked_for_relations_and_seq_scans(monkeypatch):
+    plan = [{"Plan": {"Node Type": "Hash Join", "Total Cost": 42.5, "Output": ["o.total"], "Plans": [
+        {"Node Type": "Seq Scan", "Relation Name": "orders", "Plan Rows": 5000, "Output": ["o.total", "o.customer_id"]},
+        {"Node Type": "Index Scan", "Relation Name": "customers", "Plan Rows": 1, "Output": ["c.id"]}
+    ]}}]
+    statements = []
+
+    class Cursor:
+        def execute(self, statement):
+            statements.append(statement)
+
+        def fetchone(self):
+            return (plan,)
+
+    class Connection:
+        def cursor(self):
+            return Cursor()
+
+    @contextmanager
+    def session(database_config):
+        yield Connection()
+
+    monkeypatch.setattr(validate_sql, "postgresql_session", session)
+    result = explain_query("SELECT o.total FROM orders o JOIN customers c ON c.id = o.customer_id",
+                           {'type': 'postgresql'}, max_full_scan_rows=1000)
+    assert statements[0].startswith("EXPLAIN (FORMAT JSON, VERBOSE) SELECT")
+    assert result["tables"] == ["customers", "orders"]
+    assert result["columns"] == ["c.id", "o.customer_id", "o.total"]
+    assert result["estimated_cost"] == 42.5
+    assert result["blocked"] and "orders (~5000 rows)" in result["error"]
@@ -0,0 +1,456 @@
+from contextlib import contextmanager, ExitStack
+import itertools
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+# Add the project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.optimizer.annotate_types import annotate_types
+from sqlglot.optimizer.qualify import qualify
+
+from tools.execution_backends import ExecutionBackend, SQLiteExecutionBackend, _batches
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+SQLITE_TO_DUCKDB_TYPES = (
+    ('INT', 'BIGINT'),
+    ('CHAR', 'VARCHAR'),
+    ('CLOB', 'VARCHAR'),
+    ('TEXT', 'VARCHAR'),
+    ('BLOB', 'BLOB'),
+    ('REAL', 'DOUBLE'),
+    ('FLOA', 'DOUBLE'),
+    ('DOUB', 'DOUBLE')
+)
+
+DECIMAL_PRECISION = re.compile(r'\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\)')
+
+
+def duckdb_type(sqlite_type: str) -> str:
+    '''
+    DuckDB column type for a declared SQLite type (SQLite affinity rules; dates
+    stay text like in SQLite). NUMERIC/DECIMAL with a declared precision become
+    an exact DECIMAL; without one SQLite keeps integers and 8-byte floats, so DOUBLE.
+    '''
+    declared = (sqlite_type or '').upper()
+    for marker, target in SQLITE_TO_DUCKDB_TYPES:
+        if marker in declared:
+            return target
+    if 'NUMERIC' in declared or 'DECIMAL' in declared:
+        precision = DECIMAL_PRECISION.search(declared)
+        if precision and 0 < int(precision.group(1)) <= 38:
+            return f"DECIMAL({precision.group(1)}, {min(int(precision.group(2) or 0), int(precision.group(1)))})"
+        return 'DOUBLE'
+    return 'VARCHAR'
+
+
+class NotPortable(ValueError):
+    '''The query could return a different result on DuckDB than on SQLite.'''
+
+
+def to_duckdb(tree: exp.Expression, column_types: Dict[str, Dict[str, str]]) -> str:
+    '''
+    DuckDB SQL with SQLite semantics for a parsed SQLite query. `/` of two
+    integers is integer division in SQLite and becomes `//`; `/` with a float
+    operand stays; any other division (NUMERIC columns, which hold integers or
+    floats per value, text, untyped expressions) raises NotPortable.
+    LIKE is case-insensitive for ASCII in SQLite and becomes ILIKE.
+    Args:
+        column_types (Dict): {table: {column: DuckDB type}}
+    '''
+    tree = tree.copy()
+    divisions = list(tree.find_all(exp.Div))
+    if divisions:
+        try:
+            typed = annotate_types(
+                qualify(tree.copy(), schema=column_types, dialect='sqlite', validate_qualify_columns=False),
+                schema=column_types, dialect='sqlite'
+            )
+        except Exception as e:
+            raise NotPortable(f"operand types of / unknown: {e}")
+        typed_divisions = list(typed.find_all(exp.Div))
+        if len(typed_divisions) != len(divisions):
+            raise NotPortable("operand types of / unknown")
+        for division, typed_division in zip(divisions, typed_divisions):
+            operands = (typed_division.this.type, typed_division.expression.type)
+            if all(operand and operand.this in exp.DataType.INTEGER_TYPES for operand in operands):
+                division.replace(exp.IntDiv(this=division.this, expression=division.expression))
+            elif not any(operand and operand.this in (exp.DataType.Type.DOUBLE, exp.DataType.Type.FLOAT)
+                         for operand in operands):
+                raise NotPortable(f"division of {operands[0]} by {operands[1]}: {division.sql(dialect='sqlite')}")
+    for like in list(tree.find_all(exp.Like)):
+        like.replace(exp.ILike(this=like.this, expression=like.expression))
+    return tree.sql(dialect='duckdb')
+
+
+def classify_workload(query: str) -> Dict:
+    '''
+    Shape of a SQLite query: 'analytical' when it aggregates, groups, uses
+    window functions or DISTINCT, or sorts a join; otherwise 'lookup'.
+    Returns:
+        Dict: {"kind": "analytical" | "lookup", "tables": [referenced table names]}
+    '''
+    try:
+        tree = sqlglot.parse_one(query, read='sqlite')
+    except sqlglot.errors.ParseError:
+        return {"kind": "lookup", "tables": []}
+    tables = sorted({table.name for table in tree.find_all(exp.Table)})
+    analytical = (
+        tree.find(exp.AggFunc) is not None
+        or tree.find(exp.Group) is not None
+        or tree.find(exp.Window) is not None
+        or tree.find(exp.Distinct) is not None
+        or (tree.find(exp.Order) is not None and tree.find(exp.Join) is not None)
+    )
+    return {"kind": "analytical" if analytical else "lookup", "tables": tables}
+
+
+# Seconds before a failed snapshot build is attempted again
+BUILD_RETRY_SECONDS = 60
+
+
+class SnapshotNotReady(RuntimeError):
+    '''The DuckDB snapshot is missing or stale and is being built in the background.'''
+
+
+def build_snapshot(sqlite_path: str, target: str, file_format: str = 'duckdb', chunk_rows: int = 500000) -> None:
+    '''
+    Copy every table of a SQLite file into the DuckDB database file `target`,
+    or into one Parquet file per table in the directory `target`. Built under
+    a per-process name next to the target and moved into place, so readers never
+    see a half-written snapshot and workers building at once don't collide.
+    '''
+    import duckdb
+    import pandas as pd
+
+    # Taken before copying: a write during the build leaves the snapshot stale rather than looking fresh
+    source_mtime = os.path.getmtime(sqlite_path)
+    building = f"{target}.{os.getpid()}.building"
+    database = f"{building}.duckdb" if file_format == 'parquet' else building
+    Path(target).parent.mkdir(parents=True, exist_ok=True)
+    for path in (building, database):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+    source = sqlite3.connect(f"file:{sqlite_path}?mode=ro", uri=True)
+    conn = duckdb.connect(database)
+    try:
+        tables = [row[0] for row in source.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+        for table in tables:
+            columns = source.execute(f'PRAGMA table_info("{table}")').fetchall()
+            definitions = ", ".join(f'"{column[1]}" {duckdb_type(column[2])}' for column in columns)
+            conn.execute(f'CREATE TABLE "{table}" ({definitions})')
+            for chunk in pd.read_sql_query(f'SELECT * FROM "{table}"', source, chunksize=chunk_rows):
+                conn.register("snapshot_chunk", chunk)
+                conn.execute(f'INSERT INTO "{table}" SELECT * FROM snapshot_chunk')
+                conn.unregister("snapshot_chunk")
+        conn.execute("CREATE TABLE _snapshot_meta AS SELECT ? AS source_mtime", [source_mtime])
+        if file_format == 'parquet':
+            Path(building).mkdir()
+            for table in tables + ['_snapshot_meta']:
+                conn.execute(f"""COPY "{table}" TO '{Path(building) / table}.parquet' (FORMAT parquet)""")
+    finally:
+        conn.close()
+        source.close()
+    if file_format == 'parquet':
+        os.remove(database)
+        if os.path.isdir(target):
+            shutil.rmtree(target, ignore_errors=True)
+        try:
+            os.replace(building, target)
+        except OSError:
+            # Another worker moved its snapshot into place first
+            shutil.rmtree(building, ignore_errors=True)
+        return
+    os.replace(building, target)
+
+
+class DuckDBExecutionBackend(ExecutionBackend):
+    '''
+    Columnar, vectorized engine over the SQLite data for aggregation-heavy
+    queries. mode 'attach' reads the SQLite file in place through DuckDB's
+    sqlite extension (the extension must be installed); mode 'snapshot' or
+    'parquet' queries a copy that is rebuilt when the SQLite file changes.
+    The copy is built on a background thread; until it is ready, queries
+    raise SnapshotNotReady and the routing backend serves them from SQLite.
+    Queries are written for SQLite and transpiled to DuckDB SQL (to_duckdb);
+    queries that could return something else than on SQLite raise NotPortable.
+    Each stream checks out the current connection; a connection replaced after
+    the SQLite file changed is closed once its last stream is done.
+    '''
+
+    def __init__(self, database_config: Dict):
+        super().__init__(database_config)
+        self.engine_config = database_config.get('analytical_engine', {})
+        self.db_path = database_config.get('default_path', 'database.db')
+        self.mode = self.engine_config.get('mode', 'attach')
+        self.snapshot_path = self.engine_config.get('snapshot_path', 'cache/analytical.duckdb')
+        self._conn = None
+        self._source_mtime = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # id(connection) -> [connection, open streams] for connections in use
+        self._in_use: Dict[int, list] = {}
+        self._retired: Dict[int, object] = {}
+        self._column_types: Optional[tuple] = None
+        self._builder = None
+        self._retry_build_at = 0.0
+
+    def cache_key(self) -> str:
+        return f"duckdb:{self.db_path}"
+
+    def _snapshot(self) -> Path:
+        # Parquet snapshots are a directory of <table>.parquet files next to the DuckDB snapshot path
+        return Path(f"{self.snapshot_path}.parquet") if self.mode == 'parquet' else Path(self.snapshot_path)
+
+    def _settings(self, conn):
+        if self.engine_config.get('threads'):
+            conn.execute(f"SET threads = {int(self.engine_config['threads'])}")
+        if self.engine_config.get('memory_limit'):
+            conn.execute(f"SET memory_limit = '{self.engine_config['memory_limit']}'")
+
+    def _attach(self):
+        import duckdb
+
+        conn = duckdb.connect()
+        try:
+            conn.execute("LOAD sqlite")
+            conn.execute(f"ATTACH '{self.db_path}' AS source (TYPE sqlite, READ_ONLY)")
+            conn.execute("USE source")
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _snapshot_fresh(self, source_mtime: float) -> bool:
+        import duckdb
+
+        snapshot = self._snapshot()
+        if not snapshot.exists():
+            return False
+        meta = duckdb.connect()
+        try:
+            if self.mode == 'parquet':
+                table = f"read_parquet('{snapshot / '_snapshot_meta.parquet'}')"
+            else:
+                meta.execute(f"ATTACH '{snapshot}' AS snapshot (READ_ONLY)")
+                table = "snapshot._snapshot_meta"
+            return meta.execute(f"SELECT source_mtime FROM {table}").fetchone()[0] >= source_mtime
+        except Exception:
+            return False
+        finally:
+            meta.close()
+
+    def _build(self):
+        logger.info("building %s of %s", self.mode, self.db_path)
+        start = time.perf_counter()
+        build_snapshot(self.db_path, str(self._snapshot()), self.mode if self.mode == 'parquet' else 'duckdb')
+        logger.info("%s built in %.1fs", self.mode, time.perf_counter() - start)
+
+    def _start_build(self):
+        '''Build the snapshot on a daemon thread, unless a build is running or recently failed.'''
+        if (self._builder is not None and self._builder.is_alive()) or time.monotonic() < self._retry_build_at:
+            return
+
+        def run():
+            try:
+                self._build()
+            except Exception as e:
+                logger.warning("%s build failed: %s", self.mode, e)
+                self._retry_build_at = time.monotonic() + BUILD_RETRY_SECONDS
+
+        self._builder = threading.Thread(target=run, name="duckdb-snapshot-build", daemon=True)
+        self._builder.start()
+
+    def ensure_snapshot(self):
+        '''Build a missing or stale snapshot in the calling thread (benchmarks, warm-up jobs).'''
+        if self.mode != 'attach' and not self._snapshot_fresh(os.path.getmtime(self.db_path)):
+            self._build()
+
+    def _open_snapshot(self):
+        import duckdb
+
+        if self._builder is not None and self._builder.is_alive():
+            raise SnapshotNotReady(f"{self.mode} of {self.db_path} is being built")
+        snapshot = self._snapshot()
+        source_mtime = os.path.getmtime(self.db_path)
+        if not self._snapshot_fresh(source_mtime):
+            self._start_build()
+            raise SnapshotNotReady(f"{self.mode} of {self.db_path} is being built")
+
+        if self.mode != 'parquet':
+            conn = duckdb.connect(str(snapshot), read_only=True)
+        else:
+            conn = duckdb.connect()
+            for file in sorted(snapshot.glob("*.parquet")):
+                conn.execute(f"""CREATE VIEW "{file.stem}" AS SELECT * FROM read_parquet('{file}')""")
+        self._source_mtime = source_mtime
+        return conn
+
+    def column_types(self) -> Dict[str, Dict[str, str]]:
+        '''{table: {column: DuckDB type}} of the SQLite file, re-read when it changes.'''
+        mtime = os.path.getmtime(self.db_path)
+        cached = self._column_types
+        if cached is None or cached[0] != mtime:
+            source = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+            try:
+                tables = [row[0] for row in source.execute(
+                    "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'"
+                )]
+                types = {
+                    table: {column[1]: duckdb_type(column[2])
+                            for column in source.execute(f'PRAGMA table_info("{table}")')}
+                    for table in tables
+                }
+            finally:
+                source.close()
+            cached = self._column_types = (mtime, types)
+        return cached[1]
+
+    def _release(self, conn):
+        with self._lock:
+            entry = self._in_use[id(conn)]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._in_use[id(conn)]
+                if self._retired.pop(id(conn), None) is not None:
+                    conn.close()
+
+    @contextmanager
+    def _connection(self):
+        '''
+        This thread's cursor on the process-wide DuckDB database, held for the
+        with block. The database is reopened when the SQLite file changes; the
+        previous one stays open until the streams still reading it finish.
+        Raises SnapshotNotReady while a snapshot is built.
+        '''
+        with self._lock:
+            if self._conn is not None and self.mode != 'attach' \
+                    and os.path.getmtime(self.db_path) != self._source_mtime:
+                if id(self._conn) in self._in_use:
+                    self._retired[id(self._conn)] = self._conn
+                else:
+                    self._conn.close()
+                self._conn = None
+            if self._conn is None:
+                if self.mode == 'attach':
+                    try:
+                        self._conn = self._attach()
+                    except Exception as e:
+                        logger.warning("attach failed (%s); using a snapshot instead", str(e).splitlines()[0])
+                        self.mode = 'snapshot'
+                if self._conn is None:
+                    self._conn = self._open_snapshot()
+                self._settings(self._conn)
+            base = self._conn
+            self._in_use.setdefault(id(base), [base, 0])[1] += 1
+        try:
+            if getattr(self._local, 'connection', None) is not base:
+                self._local.connection = base
+                self._local.cursor = base.cursor()
+                if self.mode == 'attach':
+                    self._local.cursor.execute("USE source")
+            yield self._local.cursor
+        finally:
+            self._release(base)
+
+    @contextmanager
+    def stream(self, query: str, batch_size: int):
+        tree = sqlglot.parse_one(query, read='sqlite')
+        # Keep SQLite's result column names (DuckDB would call COUNT(*) "count_star()")
+        for select in list(tree.find_all(exp.Select)):
+            for projection in select.expressions:
+                if not isinstance(projection, (exp.Alias, exp.Column, exp.Star)):
+                    projection.replace(exp.alias_(projection.copy(), projection.sql(dialect='sqlite'), quoted=True))
+        statement = to_duckdb(tree, self.column_types())
+        with self._connection() as cursor:
+            cursor.execute(statement)
+            columns = [description[0] for description in cursor.description] if cursor.description else []
+            yield columns, _batches(cursor, batch_size)
+
+    def close(self):
+        with self._lock:
+            for conn in [self._conn] + list(self._retired.values()):
+                if conn is not None:
+                    conn.close()
+            self._conn = None
+            self._retired.clear()
+
+
+class AnalyticalRoutingBackend(ExecutionBackend):
+    '''
+    SQLite for lookups, DuckDB for aggregations and scans over tables of at
+    least min_table_rows rows. DuckDB failures fall back to SQLite, and so do
+    queries DuckDB would answer differently (NotPortable).
+    '''
+
+    def __init__(self, database_config: Dict):
+        super().__init__(database_config)
+        self.engine_config = database_config.get('analytical_engine', {})
+        self.sqlite = SQLiteExecutionBackend(database_config)
+        self.duckdb = DuckDBExecutionBackend(database_config)
+        self.min_table_rows = self.engine_config.get('min_table_rows', 100000)
+        self._row_counts: Dict[str, tuple] = {}
+        self.stats = {"sqlite": 0, "duckdb": 0, "fallbacks": 0}
+
+    def cache_key(self) -> str:
+        return self.sqlite.cache_key()
+
+    def _table_rows(self, table: str) -> int:
+        '''Row count estimate (max rowid), cached for a minute.'''
+        cached = self._row_counts.get(table)
+        if cached and time.monotonic() - cached[0] < 60:
+            return cached[1]
+        try:
+            with self.sqlite.stream(f'SELECT MAX(rowid) FROM "{table}"', 1) as (_, batches):
+                rows = next(batches, [(0,)])[0][0] or 0
+        except Exception:
+            rows = 0  # Views and WITHOUT ROWID tables have no rowid
+        self._row_counts[table] = (time.monotonic(), rows)
+        return rows
+
+    def choose_engine(self, query: str) -> str:
+        workload = classify_workload(query)
+        if workload["kind"] != "analytical":
+            return "sqlite"
+        largest = max((self._table_rows(table) for table in workload["tables"]), default=0)
+        return "duckdb" if largest >= self.min_table_rows else "sqlite"
+
+    @contextmanager
+    def stream(self, query: str, batch_size: int):
+        if self.choose_engine(query) == "duckdb":
+            with ExitStack() as stack:
+                try:
+                    columns, batches = stack.enter_context(self.duckdb.stream(query, batch_size))
+                    # Fetch the first batch here, so a DuckDB error can still fall back
+                    first = next(batches, None)
+                except (SnapshotNotReady, NotPortable) as e:
+                    logger.debug("running on SQLite: %s", e)
+                except Exception as e:
+                    logger.warning("%s; running on SQLite", str(e).splitlines()[0])
+                    self.stats["fallbacks"] += 1
+                else:
+                    self.stats["duckdb"] += 1
+                    yield columns, itertools.chain([first] if first else [], batches)
+                    return
+        self.stats["sqlite"] += 1
+        with self.sqlite.stream(query, batch_size) as result:
+            yield result
+
+    def close(self):
+        self.duckdb.close()
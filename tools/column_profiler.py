@@ -0,0 +1,318 @@
+import json
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add the project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from tools.result_profiler import ResultProfiler
+from tools.sql_sessions import database_session
+from app_logging import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+
+# Samplers return (row estimate, cursor over the sample, sampling method), the method being
+# "all" (the whole table), "random" or "first_rows" (biased towards the start of the table)
+
+# Primary-key ranges read per MySQL table sample
+MYSQL_SAMPLE_RANGES = 20
+MYSQL_INTEGER_TYPES = ('tinyint', 'smallint', 'mediumint', 'int', 'bigint')
+
+
+def _sample_sqlite(conn, table: str, sample_rows: int):
+    max_rowid = conn.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0] or 0
+    if max_rowid <= sample_rows:
+        return max_rowid, conn.execute(f'SELECT * FROM "{table}"'), "all"
+    # Random rowid lookups hit the primary b-tree only, never a full scan
+    rowids = ",".join(str(rowid) for rowid in random.sample(range(1, max_rowid + 1), sample_rows))
+    return max_rowid, conn.execute(f'SELECT * FROM "{table}" WHERE rowid IN ({rowids})'), "random"
+
+
+def _quote_postgresql(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _sample_postgresql(conn, table: str, sample_rows: int):
+    # Tables outside the current schema are named "schema.table" by the schema getter
+    schema, _, name = table.rpartition('.')
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT n.nspname, c.reltuples::bigint
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = COALESCE(%s, current_schema()) AND c.relname = %s AND c.relkind IN ('r', 'p')
+    """, [schema or None, name])
+    row = cursor.fetchone()
+    if row is None:
+        raise LookupError(f"table {table} not found")
+    relation = f"{_quote_postgresql(row[0])}.{_quote_postgresql(name)}"
+    # reltuples is -1 until the table is first analyzed
+    row_estimate = max(row[1], 0)
+    if row_estimate <= sample_rows:
+        cursor.execute(f'SELECT * FROM {relation} LIMIT %s', [sample_rows])
+        return row_estimate, cursor, "all"
+    # Oversample block-level TABLESAMPLE a little, then cap
+    percent = min(100.0, 200.0 * sample_rows / row_estimate)
+    cursor.execute(f'SELECT * FROM {relation} TABLESAMPLE SYSTEM (%s) LIMIT %s', [percent, sample_rows])
+    return row_estimate, cursor, "random"
+
+
+def _sample_mysql(conn, table: str, sample_rows: int):
+    relation = "`" + table.replace("`", "``") + "`"
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
+        [table]
+    )
+    rows = cursor.fetchall()
+    row_estimate = (rows[0][0] or 0) if rows else 0
+    if row_estimate <= sample_rows:
+        cursor.execute(f"SELECT * FROM {relation} LIMIT %s", [sample_rows])
+        return row_estimate, cursor, "all"
+    cursor.execute("""
+        SELECT k.column_name, c.data_type
+        FROM information_schema.key_column_usage k
+        JOIN information_schema.columns c
+          ON c.table_schema = k.table_schema AND c.table_name = k.table_name AND c.column_name = k.column_name
+        WHERE k.table_schema = DATABASE() AND k.table_name = %s AND k.constraint_name = 'PRIMARY'
+    """, [table])
+    key_columns = cursor.fetchall()
+    if len(key_columns) != 1 or key_columns[0][1].lower() not in MYSQL_INTEGER_TYPES:
+        # MySQL has no TABLESAMPLE; without an integer primary key read the first pages of the clustered index
+        cursor.execute(f"SELECT * FROM {relation} LIMIT %s", [sample_rows])
+        return row_estimate, cursor, "first_rows"
+    key = "`" + key_columns[0][0].replace("`", "``") + "`"
+    # Both ends come from the primary index
+    cursor.execute(f"SELECT MIN({key}), MAX({key}) FROM {relation}")
+    low, high = cursor.fetchall()[0]
+    if low is None:
+        # Emptied since the estimate was taken
+        cursor.execute(f"SELECT * FROM {relation} LIMIT %s", [sample_rows])
+        return 0, cursor, "all"
+    ranges = min(MYSQL_SAMPLE_RANGES, sample_rows, high - low + 1)
+    starts = sorted(random.sample(range(low, high + 1), ranges))
+    # Short primary-key range scans spread over the key space; UNION drops rows of overlapping ranges
+    cursor.execute(
+        " UNION ".join(f"(SELECT * FROM {relation} WHERE {key} >= %s ORDER BY {key} LIMIT %s)" for _ in starts),
+        [value for start in starts for value in (start, -(-sample_rows // ranges))]
+    )
+    return row_estimate, cursor, "random"
+
+
+SAMPLERS = {
+    'sqlite': _sample_sqlite,
+    'postgresql': _sample_postgresql,
+    'mysql': _sample_mysql
+}
+
+
+def profile_database(database_config: Dict, schema_info: Dict, sample_rows: int = 1000,
+                     top_k: int = 5) -> Dict[str, Dict]:
+    '''
+    Compute per-column statistics from a sample of every table in schema_info.
+    Returns:
+        Dict: table name -> {"row_estimate", "sampled_rows", "sample", "columns": {column -> stats}},
+            sample being "all", "random" or "first_rows" (MySQL tables without an integer primary key)
+    '''
+    db_type = database_config.get('type', 'sqlite')
+    sampler = SAMPLERS.get(db_type)
+    if sampler is None:
+        return {}
+
+    stats = {}
+    with database_session(database_config) as conn:
+        for table in schema_info.get("tables", []):
+            try:
+                row_estimate, cursor, sample = sampler(conn, table["name"], sample_rows)
+            except Exception as e:
+                # Permissions, tables dropped since introspection
+                logger.warning("no column statistics for %s: %s", table["name"], e)
+                if db_type == 'postgresql':
+                    # The failed statement aborted the transaction; the next table starts a new one
+                    conn.rollback()
+                continue
+            column_names = [description[0] for description in cursor.description]
+            profiler = ResultProfiler(column_names, top_k=top_k, sample_rows=0)
+            while True:
+                batch = cursor.fetchmany(1000)
+                if not batch:
+                    break
+                profiler.update(batch)
+
+            summary = profiler.summary()
+            sampled = summary["row_count"]
+            stats[table["name"]] = {
+                "row_estimate": max(row_estimate, sampled),
+                "sampled_rows": sampled,
+                "sample": sample,
+                "columns": {
+                    column["name"]: {
+                        "distinct": column["distinct"],
+                        "null_fraction": round(column["nulls"] / sampled, 3) if sampled else 0.0,
+                        "min": column["min"],
+                        "max": column["max"],
+                        "top_values": [value for value, _ in column.get("top_values", [])]
+                    } for column in summary["columns"]
+                }
+            }
+    return stats
+
+
+def _short(value: Any, max_length: int = 30) -> str:
+    text = str(value)
+    return text if len(text) <= max_length else text[:max_length - 3] + "..."
+
+
+def format_column_stats(column_stats: Dict, partial: bool = False, enum_threshold: int = 20) -> str:
+    '''
+    Render one column's stats as a compact string, e.g. "distinct=5 nulls=8% values=Canada|USA".
+    partial marks stats computed from a sample of a larger table.
+    '''
+    parts = [f"distinct{'>=' if partial else '='}{column_stats['distinct']}"]
+    if column_stats["null_fraction"]:
+        parts.append(f"nulls={column_stats['null_fraction'] * 100:.0f}%")
+    distinct = column_stats["distinct"]
+    if column_stats["top_values"] and isinstance(distinct, int) and distinct <= enum_threshold:
+        parts.append("values=" + "|".join(_short(value) for value in column_stats["top_values"]))
+    elif column_stats["min"] is not None:
+        parts.append(f"range={_short(column_stats['min'])}..{_short(column_stats['max'])}")
+    return " ".join(parts)
+
+
+def annotate_schema(schema_info: Dict, table_stats: Dict[str, Dict]) -> Dict:
+    '''
+    Return a copy of schema_info with compact "stats" strings on profiled columns;
+    tables whose stats come from their first rows only get stats_sample="first_rows".
+    '''
+    annotated = dict(schema_info)
+    annotated["tables"] = []
+    for table in schema_info.get("tables", []):
+        stats = table_stats.get(table["name"])
+        if not stats:
+            annotated["tables"].append(table)
+            continue
+        partial = stats["sampled_rows"] < stats["row_estimate"]
+        columns = []
+        for column in table["columns"]:
+            column_stats = stats["columns"].get(column["name"])
+            columns.append(dict(column, stats=format_column_stats(column_stats, partial)) if column_stats else column)
+        annotated_table = dict(table, columns=columns, row_estimate=stats["row_estimate"])
+        if stats.get("sample") == "first_rows":
+            annotated_table["stats_sample"] = "first_rows"
+        annotated["tables"].append(annotated_table)
+    return annotated
+
+
+class ColumnStatsStore:
+    '''
+    Column statistics keyed by SchemaGetter.cache_key(), persisted to a JSON
+    file so the offline job and the app processes share one copy.
+    '''
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+        self._loaded_mtime = None
+
+    def _reload(self):
+        if not self.path or not self.path.exists():
+            return
+        mtime = self.path.stat().st_mtime
+        if mtime != self._loaded_mtime:
+            with open(self.path) as f:
+                self._stats = json.load(f)
+            self._loaded_mtime = mtime
+
+    def get(self, key: str) -> Dict[str, Dict]:
+        with self._lock:
+            self._reload()
+            return self._stats.get(key, {}).get("tables", {})
+
+    def drop_tables(self, key: str, tables: List[str]):
+        '''Forget stats for tables that were dropped or altered; the next profile run restores them.'''
+        with self._lock:
+            self._reload()
+            entry = self._stats.get(key)
+            if not entry:
+                return
+            for table_name in tables:
+                entry["tables"].pop(table_name, None)
+            self._save()
+
+    def put(self, key: str, table_stats: Dict[str, Dict]):
+        with self._lock:
+            self._reload()
+            self._stats[key] = {"profiled_at": time.time(), "tables": table_stats}
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Per-process name: workers saving at the same time must not write into one temp file
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._stats, f, default=str)
+        tmp_path.replace(self.path)
+        self._loaded_mtime = self.path.stat().st_mtime
+
+
+def run_profiling_job(database_config: Dict, tool_config: Dict, store: ColumnStatsStore) -> Dict:
+    '''Introspect the configured database and store fresh column statistics for it.'''
+    from tools.get_schema import build_schema_getter
+
+    getter = build_schema_getter(database_config, tool_config)
+    table_stats = profile_database(
+        database_config,
+        getter.get_cached_schema(),
+        sample_rows=tool_config.get('column_stats_sample_rows', 1000),
+        top_k=tool_config.get('column_stats_top_k', 5)
+    )
+    store.put(getter.cache_key(), table_stats)
+    return table_stats
+
+
+def start_background_profiler(database_config: Dict, tool_config: Dict,
+                              store: ColumnStatsStore, interval: float) -> threading.Thread:
+    '''Refresh column statistics every `interval` seconds on a daemon thread.'''
+    def loop():
+        while True:
+            try:
+                run_profiling_job(database_config, tool_config, store)
+            except Exception as e:
+                logger.warning("column statistics refresh failed: %s", e)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="column-stats-profiler", daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    """Offline profiling job: python tools/column_profiler.py"""
+    from config import config
+
+    tool_config = config.tool_get_schema
+    store = ColumnStatsStore(tool_config.get('column_stats_path'))
+    start = time.perf_counter()
+    table_stats = run_profiling_job(config.database_config, tool_config, store)
+    print(f"Profiled {len(table_stats)} tables in {time.perf_counter() - start:.2f}s")
+    for table_name, stats in table_stats.items():
+        biased = ", first rows only: no integer primary key to sample by" if stats.get("sample") == "first_rows" else ""
+        print(f"\n{table_name} (~{stats['row_estimate']} rows, {stats['sampled_rows']} sampled{biased})")
+        partial = stats["sampled_rows"] < stats["row_estimate"]
+        for column_name, column_stats in stats["columns"].items():
+            print(f"  {column_name}: {format_column_stats(column_stats, partial)}")
+
+
+if __name__ == "__main__":
+    configure_logging()
+    main()
@@ -1,23 +1,63 @@
-import sqlite3
 from pathlib import Path
 from langchain_core.tools import tool
 import sys
 import json
 import csv
 from io import StringIO
+import time
+from typing import Union
 
 # Add the project root to Python path
 project_root = Path(__file__).resolve().parent.parent
 sys.path.append(str(project_root))
 
 from config import config
+from tools.result_formatters import to_columnar, dumps
+from tools.result_profiler import ResultProfiler
+from tools.validate_sql import explain_query
+from tools.execution_backends import get_execution_backend
+from tools.materialized_cache import with_materialized_cache
+from tools.query_log import get_query_log
+from app_logging import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+
+class ExecutionTimer:
+    '''Seconds spent in the database driver: opening the cursor and fetching batches, not handling rows.'''
+
+    def __init__(self):
+        self.seconds = 0.0
+        self._start = None
+
+    def start(self):
+        self._start = time.perf_counter()
+
+    def stop(self):
+        if self._start is not None:
+            self.seconds += time.perf_counter() - self._start
+            self._start = None
+
+    def batches(self, batches):
+        iterator = iter(batches)
+        while True:
+            self.start()
+            try:
+                batch = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.stop()
+            yield batch
+
 
 @tool
-def execute_sql_query(query: str) -> dict:
+def execute_sql_query(query: str) -> Union[dict, str]:
     '''
-    Execute SQL queries on SQLite database with result limits.
+    Execute a query on the configured database (SQLite, MySQL, PostgreSQL or MongoDB) with result limits.
     Args:
-        query (str): The SQL query to execute
+        query (str): The SQL query to execute. For MongoDB, an aggregation as JSON:
+            {"collection": "<name>", "pipeline": [<stages>]}
     Returns:
         dict: Contains:
             - message: Summary of results
@@ -25,27 +65,93 @@ def execute_sql_query(query: str) -> dict:
             - columns: Column names
             - results: Query results
             - format: Result format
+            - summary: Result profile (replaces results when the returned
+              rows would exceed summarize_threshold)
+            - row_count_is_lower_bound: Set when the summary was cut off by the
+              injected LIMIT, so row_count and the statistics are partial
             - error: Error message if failed
+        With return_format 'columnar_json' the same dict is returned
+        pre-serialized as a compact JSON string.
     '''
+    query_log = None
+    executed = None
+    timer = ExecutionTimer()
     try:
-        print(f"[TOOL] execute_sql_query {query}")
+        logger.info("tool call: execute_sql_query", extra={"tool": "execute_sql_query", "sql_length": len(query)})
+        # The full SQL is high volume: DEBUG, sampled by logging.debug_sample_rate
+        logger.debug("execute_sql_query sql: %s", query)
         # Get configuration
         tool_config = config.tool_execute_sql
         database_config = config.database_config
         max_results = tool_config.get('max_results', 100)
         return_format = tool_config.get('return_format', 'json')
-        db_path = database_config.get('default_path', 'database.db')
+        summarize_threshold = tool_config.get('summarize_threshold', 0)
+        batch_size = tool_config.get('fetch_batch_size', 1000)
+        backend = with_materialized_cache(
+            get_execution_backend(database_config),
+            tool_config.get('materialized_cache', {})
+        )
+        query_log = get_query_log(tool_config.get('query_log', {}), database_config, config.logging_config)
+        
+        # Let the database stop after max_results + 1 rows instead of slicing client-side
+        prepared = backend.prepare(query, max_results + 1, rewrite=tool_config.get('rewrite_queries', True))
+        executed = prepared["query"]
+        limit_applied = prepared["limit_applied"]
+        
+        if tool_config.get('validate_before_execute') and database_config.get('type', 'sqlite') != 'mongodb':
+            validation = explain_query(executed)
+            if not validation["valid"]:
+                return {"error": validation["error"]}
+            
+        # Server-side cursors where the driver has them: rows arrive batch_size at a time
+        timer.start()
+        with backend.stream(executed, batch_size) as (column_names, batches):
+            timer.stop()
+            # Stream the cursor, keeping only the rows we may return
+            profiler = None
+            if summarize_threshold and max_results > summarize_threshold:
+                profiler = ResultProfiler(
+                    column_names,
+                    top_k=tool_config.get('summary_top_k', 5),
+                    sample_rows=tool_config.get('summary_sample_rows', 5)
+                )
+            limited_results = []
+            total_rows = 0
+            for batch in timer.batches(batches):
+                total_rows += len(batch)
+                if len(limited_results) < max_results:
+                    limited_results.extend(batch[:max_results - len(limited_results)])
+                if profiler:
+                    profiler.update(batch)
+            if query_log:
+                query_log.record(query, timer.seconds, rows=total_rows, executed=executed)
             
-        with sqlite3.connect(str(db_path)) as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
+            # With an injected LIMIT we only know whether more rows exist
+            found = f"More than {max_results}" if limit_applied and total_rows > max_results else str(total_rows)
             
-            # Get column names
-            column_names = [description[0] for description in cursor.description] if cursor.description else []
+            if profiler and len(limited_results) > summarize_threshold:
+                summary = profiler.summary()
+                truncated = limit_applied and total_rows > max_results
+                if truncated:
+                    # The profile covers only the rows the injected LIMIT let through
+                    summary["truncated"] = True
+                response = {
+                    "message": f"{found} results found, returning a summary instead of rows"
+                               + (f" (row_count and statistics cover the first {total_rows} rows only)" if truncated else ""),
+                    "row_count": total_rows,
+                    "columns": column_names,
+                    "summary": summary,
+                    "format": "summary"
+                }
+                if truncated:
+                    response["row_count_is_lower_bound"] = True
+                if return_format.lower() == 'columnar_json':
+                    return dumps(response).decode('utf-8')
+                return response
             
-            # Fetch limited results
-            results = cursor.fetchall()
-            limited_results = results[:max_results]
+            # Rows fetched before a column appeared (MongoDB fields first seen in a later batch) are padded
+            if any(len(row) < len(column_names) for row in limited_results):
+                limited_results = [tuple(row) + (None,) * (len(column_names) - len(row)) for row in limited_results]
             
             # Format results according to return_format
             formatted_data = None
@@ -59,18 +165,31 @@ def execute_sql_query(query: str) -> dict:
                 formatted_data = output.getvalue()
             elif return_format.lower() == 'list':
                 formatted_data = limited_results
+            elif return_format.lower() in ('columnar', 'columnar_json'):
+                formatted_data = to_columnar(
+                    column_names,
+                    limited_results,
+                    dictionary_encode=tool_config.get('dictionary_encode', True),
+                    use_numpy=return_format.lower() == 'columnar_json' and tool_config.get('use_numpy', False)
+                )
             else:
                 formatted_data = limited_results
             
-            return {
-                "message": f"{len(results)} results found (limited to {max_results})",
+            response = {
+                "message": f"{found} results found (limited to {max_results})",
                 "row_count": len(limited_results),
                 "columns": column_names,
                 "results": formatted_data,
                 "format": return_format
             }
+            if return_format.lower() == 'columnar_json':
+                return dumps(response).decode('utf-8')
+            return response
             
     except Exception as e:
+        timer.stop()
+        if query_log:
+            query_log.record(query, timer.seconds, error=str(e), executed=executed)
         return {"error": str(e)}
 
 def main():
@@ -88,4 +207,5 @@ def main():
         print("\nResults:")
         print(result)
 if __name__ == "__main__":
+    configure_logging()
     main()
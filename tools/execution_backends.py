@@ -0,0 +1,365 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Add the project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from tools.sql_rewriter import rewrite_query, classify_statement
+from tools.sql_sessions import sqlite_session
+
+# Stages that write to the database; refused in read-only mode
+MONGODB_WRITE_STAGES = ('$out', '$merge')
+
+
+def _batches(cursor, batch_size: int) -> Iterator[List[tuple]]:
+    while cursor.description:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            return
+        yield batch
+
+
+class ExecutionBackend(ABC):
+    '''
+    Runs agent queries on one database. Every backend returns the same shape:
+    stream() yields (column names, iterator of row-tuple batches), so
+    execute_sql_query formats and profiles results the same way everywhere.
+    '''
+
+    def __init__(self, database_config: Dict):
+        self.database_config = database_config
+        self.db_type = database_config.get('type', 'sqlite')
+        self.read_only = database_config.get('read_only', True)
+
+    @abstractmethod
+    def cache_key(self) -> str:
+        """Identify the database this backend executes on"""
+        pass
+
+    def prepare(self, query: str, max_rows: int, rewrite: bool = True) -> Dict:
+        '''
+        Make a query safe to run: read-only check and a row cap pushed into the statement.
+        Returns:
+            Dict: {"query": statement to run, "limit_applied": whether max_rows was injected}
+        '''
+        if rewrite:
+            result = rewrite_query(query, db_type=self.db_type, max_rows=max_rows, read_only=self.read_only)
+            return {"query": result["sql"], "limit_applied": result["limit_applied"]}
+        if self.read_only and classify_statement(query, self.db_type) == 'write':
+            raise ValueError("Only read queries are allowed in read-only mode")
+        return {"query": query, "limit_applied": False}
+
+    @abstractmethod
+    def stream(self, query: str, batch_size: int) -> Iterator[Tuple[List[str], Iterator[List[tuple]]]]:
+        """Context manager yielding (columns, batches); the connection is released on exit"""
+        pass
+
+    def close(self):
+        """Release pooled connections"""
+        pass
+
+
+class SQLiteExecutionBackend(ExecutionBackend):
+    def __init__(self, database_config: Dict):
+        super().__init__(database_config)
+        self.db_path = database_config.get('default_path', 'database.db')
+
+    def cache_key(self) -> str:
+        return f"sqlite:{self.db_path}"
+
+    @contextmanager
+    def stream(self, query: str, batch_size: int):
+        # sqlite_session already keeps one read-only connection per thread
+        with sqlite_session(self.db_path, self.database_config, self.read_only) as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query)
+                columns = [description[0] for description in cursor.description] if cursor.description else []
+                yield columns, _batches(cursor, batch_size)
+            finally:
+                cursor.close()
+
+
+class PostgreSQLExecutionBackend(ExecutionBackend):
+    '''
+    psycopg 3 connection pool. Reads use a named (server-side) cursor, so rows
+    arrive batch_size at a time instead of the whole result set at once.
+    '''
+
+    def __init__(self, database_config: Dict):
+        super().__init__(database_config)
+        from psycopg_pool import ConnectionPool
+
+        self.connection_params = {
+            'host': database_config.get('host'),
+            'port': database_config.get('port', 5432),
+            'user': database_config.get('user'),
+            'password': database_config.get('password'),
+            'dbname': database_config.get('database_name'),
+            'options': f"-c statement_timeout={int(database_config.get('timeout', 30) * 1000)}"
+        }
+        read_only = self.read_only
+
+        def configure(conn):
+            conn.read_only = read_only
+
+        self.pool = ConnectionPool(
+            kwargs=self.connection_params,
+            min_size=1,
+            max_size=database_config.get('pool_size', 5) + database_config.get('max_overflow', 10),
+            timeout=database_config.get('pool_timeout', 30),
+            max_lifetime=database_config.get('pool_recycle', 3600),
+            configure=configure,
+            open=True
+        )
+
+    def cache_key(self) -> str:
+        params = self.connection_params
+        return f"postgresql:{params['user']}@{params['host']}:{params['port']}/{params['dbname']}"
+
+    @contextmanager
+    def stream(self, query: str, batch_size: int):
+        with self.pool.connection() as conn:
+            read = classify_statement(query, self.db_type) == 'read'
+            cursor = conn.cursor(name=f"execute_{uuid.uuid4().hex[:12]}") if read else conn.cursor()
+            if read:
+                cursor.itersize = batch_size
+            try:
+                cursor.execute(query)
+                columns = [description.name for description in cursor.description] if cursor.description else []
+                yield columns, _batches(cursor, batch_size)
+            finally:
+                cursor.close()
+                if self.read_only or read:
+                    conn.rollback()
+
+    def close(self):
+        self.pool.close()
+
+
+class MySQLExecutionBackend(ExecutionBackend):
+    '''
+    mysql-connector pool with unbuffered cursors: the server streams the
+    result and fetchmany() pulls it batch by batch.
+    '''
+
+    def __init__(self, database_config: Dict):
+        super().__init__(database_config)
+        from mysql.connector import pooling
+
+        self.connection_params = {
+            'host': database_config.get('host'),
+            'port': database_config.get('port', 3306),
+            'user': database_config.get('user'),
+            'password': database_config.get('password'),
+            'database': database_config.get('database_name')
+        }
+        self.pool_timeout = database_config.get('pool_timeout', 30)
+        self.pool = pooling.MySQLConnectionPool(
+            pool_name=f"execute_{uuid.uuid4().hex[:8]}",
+            # mysql-connector caps pools at 32 connections
+            pool_size=min(database_config.get('pool_size', 5) + database_config.get('max_overflow', 10), 32),
+            connection_timeout=database_config.get('timeout', 30),
+            **self.connection_params
+        )
+
+    def cache_key(self) -> str:
+        params = self.connection_params
+        return f"mysql:{params['user']}@{params['host']}:{params['port']}/{params['database']}"
+
+    def _get_connection(self):
+        # The pool raises instead of waiting when it is exhausted
+        from mysql.connector.errors import PoolError
+
+        deadline = time.monotonic() + self.pool_timeout
+        while True:
+            try:
+                return self.pool.get_connection()
+            except PoolError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    @contextmanager
+    def stream(self, query: str, batch_size: int):
+        conn = self._get_connection()
+        try:
+            if self.read_only:
+                conn.start_transaction(readonly=True)
+            cursor = conn.cursor(buffered=False)
+            try:
+                cursor.execute(query)
+                columns = list(cursor.column_names) if cursor.description else []
+                yield columns, _batches(cursor, batch_size)
+            finally:
+                # Rows left on the wire must be drained before the connection goes back to the pool
+                if conn.unread_result:
+                    conn.consume_results()
+                cursor.close()
+            if not self.read_only:
+                conn.commit()
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.close()
+
+
+class MongoDBExecutionBackend(ExecutionBackend):
+    '''
+    Queries are aggregation pipelines in (extended) JSON:
+        {"collection": "orders", "pipeline": [{"$match": {...}}, {"$group": {...}}]}
+    Documents come back as rows over the fields seen so far: fields that first
+    appear in a later batch are appended to the column list.
+    '''
+
+    def __init__(self, database_config: Dict):
+        super().__init__(database_config)
+        import pymongo
+
+        self.connection_string = database_config.get('connection_string')
+        self.database_name = database_config.get('database_name')
+        self.timeout = database_config.get('timeout', 30)
+        self.client = pymongo.MongoClient(
+            self.connection_string,
+            maxPoolSize=database_config.get('pool_size', 5) + database_config.get('max_overflow', 10),
+            waitQueueTimeoutMS=int(database_config.get('pool_timeout', 30) * 1000),
+            serverSelectionTimeoutMS=int(self.timeout * 1000)
+        )
+
+    def cache_key(self) -> str:
+        return f"mongodb:{self.connection_string}/{self.database_name}"
+
+    def prepare(self, query: str, max_rows: int, rewrite: bool = True) -> Dict:
+        from bson import json_util
+
+        try:
+            spec = json_util.loads(query)
+        except ValueError as e:
+            raise ValueError(f"MongoDB queries must be JSON {{\"collection\": ..., \"pipeline\": [...]}}: {str(e)}")
+        if not isinstance(spec, dict) or not isinstance(spec.get('collection'), str) \
+                or not isinstance(spec.get('pipeline', []), list):
+            raise ValueError("MongoDB queries must be JSON {\"collection\": ..., \"pipeline\": [...]}")
+        pipeline = spec.get('pipeline', [])
+        if self.read_only and any(stage_name in stage for stage in pipeline for stage_name in MONGODB_WRITE_STAGES):
+            raise ValueError("Only read queries are allowed in read-only mode")
+        limit_applied = False
+        if rewrite and max_rows:
+            # $out/$merge must stay the last stage, so the limit goes in front of them
+            terminal = 1 if pipeline and any(name in pipeline[-1] for name in MONGODB_WRITE_STAGES) else 0
+            pipeline = pipeline[:len(pipeline) - terminal] + [{"$limit": max_rows}] + pipeline[len(pipeline) - terminal:]
+            limit_applied = True
+        return {"query": json_util.dumps({"collection": spec['collection'], "pipeline": pipeline}),
+                "limit_applied": limit_applied}
+
+    @staticmethod
+    def _value(value: Any) -> Any:
+        from bson import ObjectId, Decimal128, json_util
+
+        if isinstance(value, (ObjectId, Decimal128)):
+            return str(value)
+        if isinstance(value, (dict, list)):
+            # Subdocuments and arrays as (extended) JSON text: hashable, printable, CSV-safe
+            return json_util.dumps(value)
+        return value
+
+    @contextmanager
+    def stream(self, query: str, batch_size: int):
+        from bson import json_util
+
+        spec = json_util.loads(query)
+        cursor = self.client[self.database_name][spec['collection']].aggregate(
+            spec.get('pipeline', []), batchSize=batch_size, maxTimeMS=int(self.timeout * 1000)
+        )
+        try:
+            first = [document for _, document in zip(range(batch_size), cursor)]
+            columns = list(dict.fromkeys(key for document in first for key in document))
+
+            def batches():
+                batch = first
+                while batch:
+                    # Fields first seen in this batch are appended to `columns` (the list the caller holds);
+                    # rows of earlier batches are shorter and lack them
+                    known = set(columns)
+                    columns.extend(key for key in dict.fromkeys(key for document in batch for key in document)
+                                   if key not in known)
+                    yield [tuple(self._value(document.get(column)) for column in columns) for document in batch]
+                    batch = [document for _, document in zip(range(batch_size), cursor)]
+
+            yield columns, batches()
+        finally:
+            cursor.close()
+
+    def close(self):
+        self.client.close()
+
+
+BACKENDS = {
+    'sqlite': SQLiteExecutionBackend,
+    'postgresql': PostgreSQLExecutionBackend,
+    'mysql': MySQLExecutionBackend,
+    'mongodb': MongoDBExecutionBackend
+}
+
+_backends: Dict[str, ExecutionBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_execution_backend(database_config: Dict) -> ExecutionBackend:
+    '''Shared backend (and connection pool) for one database configuration block.'''
+    db_type = database_config.get('type', 'sqlite')
+    if db_type not in BACKENDS:
+        raise ValueError(f"Unsupported database type: {db_type}")
+    backend_class = BACKENDS[db_type]
+    if db_type == 'sqlite' and database_config.get('analytical_engine', {}).get('enabled'):
+        from tools.analytical_engine import AnalyticalRoutingBackend
+        backend_class = AnalyticalRoutingBackend
+    key = repr(sorted((name, repr(value)) for name, value in database_config.items()))
+    with _backends_lock:
+        if key not in _backends:
+            _backends[key] = backend_class(database_config)
+        return _backends[key]
+
+
+def main():
+    """Run the same query through the SQLite backend and a MongoDB aggregation through mongomock if installed"""
+    from config import config
+
+    database_config = dict(config.database_config, type='sqlite')
+    backend = get_execution_backend(database_config)
+    prepared = backend.prepare("SELECT Name FROM Artist ORDER BY Name", max_rows=6)
+    print(f"{backend.cache_key()}: {prepared['query']}")
+    with backend.stream(prepared["query"], batch_size=4) as (columns, batches):
+        for number, batch in enumerate(batches, 1):
+            print(f"  batch {number} {columns}: {batch}")
+
+    try:
+        import mongomock
+    except ImportError:
+        print("MongoDB: pip install mongomock to run the aggregation backend offline")
+        return
+    mongo_config = {'type': 'mongodb', 'connection_string': 'mongodb://localhost', 'database_name': 'demo'}
+    with mongomock.patch(servers=(('localhost', 27017),)):
+        backend = MongoDBExecutionBackend(mongo_config)
+        backend.client['demo']['invoices'].insert_many([
+            {"country": country, "total": total}
+            for country, total in [("USA", 5.0), ("USA", 3.5), ("Canada", 2.0), ("France", 4.0), ("Canada", 1.0)]
+        ])
+        prepared = backend.prepare(
+            '{"collection": "invoices", "pipeline": [{"$group": {"_id": "$country", "revenue": {"$sum": "$total"}}},'
+            ' {"$sort": {"revenue": -1}}]}',
+            max_rows=2
+        )
+        with backend.stream(prepared["query"], batch_size=1) as (columns, batches):
+            for number, batch in enumerate(batches, 1):
+                print(f"  mongodb batch {number} {columns}: {batch}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from typing import Dict
 import sys
+import threading
 from pathlib import Path
 from langchain_core.tools import tool
 
@@ -8,7 +9,99 @@ project_root = Path(__file__).resolve().parent.parent
 sys.path.append(str(project_root))
 
 from config import config
-from tools.schema_getters import SQLiteSchemaGetter, MongoDBSchemaGetter, MySQLSchemaGetter, PostgreSQLSchemaGetter
+from tools.schema_getters import (
+    SchemaGetter, SQLiteSchemaGetter, MongoDBSchemaGetter, MySQLSchemaGetter,
+    PostgreSQLSchemaGetter, MultiDatabaseSchemaGetter
+)
+from tools.column_profiler import ColumnStatsStore, annotate_schema, start_background_profiler
+from tools.schema_refresh import subscribe_schema_changes
+from tools.schema_renderers import render_schema
+from app_logging import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+_stats_store = None
+_stats_lock = threading.Lock()
+
+def get_column_stats_store(tool_config: Dict, database_config: Dict) -> ColumnStatsStore:
+    '''Shared column statistics store; starts the background profiler on first use if configured.'''
+    global _stats_store
+    with _stats_lock:
+        if _stats_store is None:
+            _stats_store = ColumnStatsStore(tool_config.get('column_stats_path'))
+            store = _stats_store
+            subscribe_schema_changes(
+                lambda diff: store.drop_tables(diff["cache_key"], diff["dropped"] + diff["altered"])
+            )
+            interval = tool_config.get('column_stats_refresh_interval', 0)
+            if interval:
+                start_background_profiler(database_config, tool_config, _stats_store, interval)
+        return _stats_store
+
+def add_column_stats(getter: SchemaGetter, schema_info: Dict, store: ColumnStatsStore) -> Dict:
+    '''Merge stored column statistics into a (possibly multi-database) schema document.'''
+    if isinstance(getter, MultiDatabaseSchemaGetter):
+        return {
+            "databases": {
+                name: add_column_stats(getter.getters[name], schema, store)
+                for name, schema in schema_info["databases"].items()
+            }
+        }
+    table_stats = store.get(getter.cache_key())
+    return annotate_schema(schema_info, table_stats) if table_stats else schema_info
+
+def build_schema_getter(database_config: Dict, tool_config: Dict) -> SchemaGetter:
+    '''Create the schema getter for one database configuration block.'''
+    db_type = database_config.get('type', 'sqlite')
+    if db_type == 'sqlite':
+        return SQLiteSchemaGetter(
+            db_path=database_config.get('default_path'),
+            config=tool_config
+        )
+    elif db_type == 'mongodb':
+        return MongoDBSchemaGetter(
+            connection_string=database_config.get('connection_string'),
+            database_name=database_config.get('database_name'),
+            config=tool_config
+        )
+    elif db_type == 'mysql':
+        return MySQLSchemaGetter(
+            host=database_config.get('host'),
+            port=database_config.get('port', 3306),
+            user=database_config.get('user'),
+            password=database_config.get('password'),
+            database=database_config.get('database_name'),
+            config=tool_config
+        )
+    elif db_type == 'postgresql':
+        return PostgreSQLSchemaGetter(
+            host=database_config.get('host'),
+            port=database_config.get('port', 5432),
+            user=database_config.get('user'),
+            password=database_config.get('password'),
+            database=database_config.get('database_name'),
+            config=tool_config
+        )
+    raise ValueError(f"Unsupported database type: {db_type}")
+
+def load_schema(database_config: Dict, tool_config: Dict) -> Dict:
+    '''
+    Cached schema document for the configured database(s), annotated with
+    column statistics when include_column_stats is set.
+    '''
+    getter = build_schema_getter(database_config, tool_config)
+    additional_databases = database_config.get('additional_databases') or {}
+    if additional_databases:
+        getters = {database_config.get('name', 'default'): getter}
+        for name, extra_config in additional_databases.items():
+            getters[name] = build_schema_getter(extra_config, tool_config)
+        getter = MultiDatabaseSchemaGetter(getters, tool_config)
+
+    schema_info = getter.get_cached_schema()
+    if tool_config.get('include_column_stats'):
+        store = get_column_stats_store(tool_config, database_config)
+        schema_info = add_column_stats(getter, schema_info, store)
+    return schema_info
 
 @tool
 def get_schema(max_tables: str) -> Dict:
@@ -23,46 +116,17 @@ def get_schema(max_tables: str) -> Dict:
         get_database_schema(partial=True)
 
     '''
-    print(f"[TOOL] get_schema {max_tables}")
+    logger.info("tool call: get_schema", extra={"tool": "get_schema", "max_tables": max_tables})
 
     database_config = config.database_config
     tool_config = config.tool_get_schema
     db_type = database_config.get('type', 'sqlite')
     
     try:
-        if db_type == 'sqlite':
-            getter = SQLiteSchemaGetter(
-                db_path=database_config.get('default_path'),
-                config=tool_config
-            )
-        elif db_type == 'mongodb':
-            getter = MongoDBSchemaGetter(
-                connection_string=database_config.get('connection_string'),
-                database_name=database_config.get('database_name'),
-                config=tool_config
-            )
-        elif db_type == 'mysql':
-            getter = MySQLSchemaGetter(
-                host=database_config.get('host'),
-                port=database_config.get('port', 3306),
-                user=database_config.get('user'),
-                password=database_config.get('password'),
-                database=database_config.get('database_name'),
-                config=tool_config
-            )
-        elif db_type == 'postgresql':
-            getter = PostgreSQLSchemaGetter(
-                host=database_config.get('host'),
-                port=database_config.get('port', 5432),
-                user=database_config.get('user'),
-                password=database_config.get('password'),
-                database=database_config.get('database_name'),
-                config=tool_config
-            )
-        else:
-            return {"error": f"Unsupported database type: {db_type}"}
-            
-        schema_info = getter.get_schema()
+        schema_info = load_schema(database_config, tool_config)
+        render_format = tool_config.get('render_format', 'json')
+        if render_format != 'json':
+            schema_info = render_schema(schema_info, render_format)
         return {
             "Tool Message: >>> ": f"Schema retrieved successfully for {db_type} database.",
             "schema": schema_info
@@ -72,5 +136,6 @@ def get_schema(max_tables: str) -> Dict:
         return {"error": f"Failed to get database schema: {str(e)}"}
 
 if __name__ == "__main__":
+    configure_logging()
     result = get_schema('get_all')
     print(result)
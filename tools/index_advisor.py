@@ -0,0 +1,516 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Add the project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+import sqlglot
+from sqlglot import exp
+
+from tools.query_log import query_fingerprint, read_query_log
+from tools.sql_rewriter import SQL_DIALECTS
+from app_logging import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+EQUALITY_PREDICATES = (exp.EQ, exp.In, exp.Is)
+RANGE_PREDICATES = (exp.GT, exp.GTE, exp.LT, exp.LTE, exp.Between)
+INDEX_PREFIX = "idx_advisor_"
+
+
+def load_workload(log_path: str, db_type: str = 'sqlite', samples: int = 3) -> List[Dict]:
+    '''
+    Successful read queries of a query log grouped by fingerprint, most total time first.
+    Returns:
+        List[Dict]: {"fingerprint", "queries": up to `samples` distinct logged texts,
+                     "count", "total_ms", "avg_ms"}
+    '''
+    dialect = SQL_DIALECTS.get(db_type, 'sqlite')
+    groups: Dict[str, Dict] = OrderedDict()
+    for entry in read_query_log(log_path):
+        if entry.get("error") or entry.get("database", db_type) != db_type:
+            continue
+        sql = entry.get("sql", "")
+        if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            continue
+        fingerprint = entry.get("normalized") or query_fingerprint(sql, dialect)
+        group = groups.setdefault(fingerprint, {"fingerprint": fingerprint, "queries": [], "count": 0, "total_ms": 0.0})
+        group["count"] += 1
+        group["total_ms"] += entry.get("elapsed_ms") or 0.0
+        if sql not in group["queries"] and len(group["queries"]) < samples:
+            group["queries"].append(sql)
+    workload = sorted(groups.values(), key=lambda group: group["total_ms"], reverse=True)
+    for group in workload:
+        group["avg_ms"] = group["total_ms"] / group["count"]
+    return workload
+
+
+def _conjuncts(condition: Optional[exp.Expression]) -> List[exp.Expression]:
+    if condition is None:
+        return []
+    if isinstance(condition, exp.Where):
+        return _conjuncts(condition.this)
+    if isinstance(condition, exp.And):
+        return _conjuncts(condition.this) + _conjuncts(condition.expression)
+    if isinstance(condition, exp.Paren):
+        return _conjuncts(condition.this)
+    return [condition]
+
+
+def _scope_tables(select: exp.Select) -> Dict[str, str]:
+    '''alias -> table for the tables this SELECT reads directly (not its subqueries)'''
+    sources = []
+    from_clause = select.args.get('from_') or select.args.get('from')
+    if from_clause is not None:
+        sources.append(from_clause.this)
+    sources.extend(join.this for join in select.args.get('joins') or [])
+    return {source.alias_or_name: source.name for source in sources if isinstance(source, exp.Table)}
+
+
+def analyze_predicates(query: str, table_columns: Dict[str, List[str]], dialect: str = 'sqlite') -> Dict[str, Dict]:
+    '''
+    Columns each table is filtered, joined, sorted and grouped on.
+    Args:
+        query (str): The SQL query
+        table_columns (Dict[str, List[str]]): Column names per table, to resolve unqualified columns
+    Returns:
+        Dict[str, Dict]: table -> {"equality": [...], "range": [...], "join": [...], "order": [...], "group": [...]}
+    '''
+    usage: Dict[str, Dict] = {}
+    try:
+        tree = sqlglot.parse_one(query, read=dialect)
+    except sqlglot.errors.ParseError:
+        return usage
+
+    for select in tree.find_all(exp.Select):
+        scope = _scope_tables(select)
+        if not scope:
+            continue
+
+        def resolve(column) -> Optional[Tuple[str, str]]:
+            if not isinstance(column, exp.Column):
+                return None
+            if column.table:
+                table = scope.get(column.table)
+                return (table, column.name) if table else None
+            if len(scope) == 1:
+                return next(iter(scope.values())), column.name
+            owners = [table for table in scope.values() if column.name in table_columns.get(table, [])]
+            return (owners[0], column.name) if len(set(owners)) == 1 else None
+
+        def add(kind: str, resolved: Optional[Tuple[str, str]]):
+            if resolved:
+                table, column = resolved
+                columns = usage.setdefault(table, {"equality": [], "range": [], "join": [], "order": [], "group": []})[kind]
+                if column not in columns:
+                    columns.append(column)
+
+        conditions = _conjuncts(select.args.get('where'))
+        for join in select.args.get('joins') or []:
+            conditions.extend(_conjuncts(join.args.get('on')))
+        for condition in conditions:
+            left, right = condition.this, condition.args.get('expression')
+            if isinstance(condition, exp.EQ) and isinstance(left, exp.Column) and isinstance(right, exp.Column):
+                add("join", resolve(left))
+                add("join", resolve(right))
+            elif isinstance(condition, EQUALITY_PREDICATES + RANGE_PREDICATES):
+                kind = "equality" if isinstance(condition, EQUALITY_PREDICATES) else "range"
+                if isinstance(left, exp.Column) and not isinstance(right, exp.Column):
+                    add(kind, resolve(left))
+                elif isinstance(right, exp.Column) and not isinstance(left, exp.Column):
+                    add(kind, resolve(right))
+
+        order = select.args.get('order')
+        for ordered in order.expressions if order else []:
+            add("order", resolve(ordered.this))
+        group = select.args.get('group')
+        for expression in group.expressions if group else []:
+            add("group", resolve(expression))
+    return usage
+
+
+def candidate_indexes(usage: Dict[str, Dict]) -> List[Tuple[str, Tuple[str, ...]]]:
+    '''
+    Index candidates from predicate usage: equality columns first, then one
+    range or the sort columns; join keys; grouping columns.
+    '''
+    candidates = []
+    for table, columns in usage.items():
+        equality = columns["equality"]
+        if columns["range"]:
+            candidates.append((table, tuple(equality + columns["range"][:1])))
+        elif equality:
+            candidates.append((table, tuple(equality)))
+            if columns["order"]:
+                candidates.append((table, tuple(equality + [c for c in columns["order"] if c not in equality])))
+        elif columns["order"]:
+            candidates.append((table, tuple(columns["order"])))
+        candidates.extend((table, (column,)) for column in columns["join"])
+        if columns["group"]:
+            candidates.append((table, tuple(columns["group"])))
+    return list(OrderedDict.fromkeys(candidates))
+
+
+def index_name(table: str, columns: Tuple[str, ...]) -> str:
+    return f"{INDEX_PREFIX}{table}_{'_'.join(columns)}".lower()
+
+
+class SQLiteIndexAdvisor:
+    '''
+    Recommends indexes for a SQLite database from a query log. Candidates
+    come from the predicates and join keys of queries whose EXPLAIN QUERY
+    PLAN scans a table or sorts in a temp b-tree; they are created in a dev
+    copy of the database and kept only if replaying the log gets faster.
+    '''
+
+    def __init__(self, db_path: str, dev_path: str, repeats: int = 3, min_improvement: float = 0.1):
+        self.db_path = db_path
+        self.dev_path = dev_path
+        self.repeats = repeats
+        self.min_improvement = min_improvement
+        self.conn = None
+
+    def create_dev_copy(self):
+        '''Fresh copy of the database through the backup API (includes committed WAL content).'''
+        Path(self.dev_path).parent.mkdir(parents=True, exist_ok=True)
+        if os.path.exists(self.dev_path):
+            os.remove(self.dev_path)
+        source = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        self.conn = sqlite3.connect(self.dev_path, isolation_level=None)
+        try:
+            source.backup(self.conn)
+        finally:
+            source.close()
+        # The same planner statistics before and after, so only the indexes differ
+        self.conn.execute("ANALYZE")
+
+    def table_columns(self) -> Dict[str, List[str]]:
+        tables = [row[0] for row in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        )]
+        return {table: [row[1] for row in self.conn.execute(f'PRAGMA table_info("{table}")')] for table in tables}
+
+    def existing_indexes(self, table: str) -> List[Tuple[str, ...]]:
+        '''Column lists of the table's indexes, including an INTEGER PRIMARY KEY (the rowid).'''
+        indexes = []
+        pk = [row for row in self.conn.execute(f'PRAGMA table_info("{table}")') if row[5]]
+        if len(pk) == 1 and pk[0][2].upper() == 'INTEGER':
+            indexes.append((pk[0][1],))
+        for index in self.conn.execute(f'PRAGMA index_list("{table}")').fetchall():
+            columns = tuple(row[2] for row in self.conn.execute(f'PRAGMA index_info("{index[1]}")'))
+            indexes.append(columns)
+        return indexes
+
+    def plan(self, query: str) -> List[str]:
+        return [row[3] for row in self.conn.execute(f"EXPLAIN QUERY PLAN {query}")]
+
+    @staticmethod
+    def plan_problems(plan: List[str], aliases: Dict[str, str]) -> Dict:
+        '''Tables read by full scan and whether a temp b-tree sorts or groups.'''
+        scanned = set()
+        for detail in plan:
+            if detail.startswith("SCAN "):
+                name = detail.split()[1]
+                if name in aliases:
+                    scanned.add(aliases[name])
+        return {"scanned": scanned, "temp_btree": any("TEMP B-TREE" in detail for detail in plan)}
+
+    def timed(self, query: str) -> float:
+        '''Best of `repeats` runs in milliseconds, all rows fetched.'''
+        best = float('inf')
+        for _ in range(self.repeats):
+            start = time.perf_counter()
+            self.conn.execute(query).fetchall()
+            best = min(best, time.perf_counter() - start)
+        return best * 1000
+
+    def replay(self, workload: List[Dict]) -> Dict[str, float]:
+        '''Average best-of time per fingerprint over its sample queries.'''
+        return {
+            group["fingerprint"]: sum(self.timed(query) for query in group["queries"]) / len(group["queries"])
+            for group in workload
+        }
+
+    def used_indexes(self, queries: List[str]) -> List[str]:
+        used = set()
+        for query in queries:
+            for detail in self.plan(query):
+                for word in detail.split():
+                    if word.startswith(INDEX_PREFIX):
+                        used.add(word)
+        return sorted(used)
+
+    def advise(self, workload: List[Dict], apply: bool = False) -> Dict:
+        '''
+        Analyze, create candidates in the dev copy, replay and compare.
+        Args:
+            workload (List[Dict]): Output of load_workload
+            apply (bool): Keep the recommended indexes in the dev database
+        Returns:
+            Dict: {"queries": per fingerprint before/after, "recommendations", "rejected", "totals"}
+        '''
+        self.create_dev_copy()
+        try:
+            table_columns = self.table_columns()
+            candidates: Dict[Tuple[str, Tuple[str, ...]], List[str]] = OrderedDict()
+            for group in workload:
+                query = group["queries"][0]
+                try:
+                    tree = sqlglot.parse_one(query, read='sqlite')
+                    aliases = {table.alias_or_name: table.name for table in tree.find_all(exp.Table)}
+                    problems = self.plan_problems(self.plan(query), aliases)
+                except (sqlglot.errors.ParseError, sqlite3.Error) as e:
+                    logger.warning("skipping %s: %s", query[:60], e)
+                    continue
+                group["plan_before"] = self.plan(query)
+                usage = analyze_predicates(query, table_columns)
+                for table, columns in candidate_indexes(usage):
+                    # Tables already searched through an index only need help with sorting
+                    if table not in problems["scanned"] and not problems["temp_btree"]:
+                        continue
+                    if any(existing[:len(columns)] == columns for existing in self.existing_indexes(table)):
+                        continue
+                    candidates.setdefault((table, columns), []).append(group["fingerprint"])
+
+            logger.info("%d query shapes, %d candidate indexes; replaying baseline", len(workload), len(candidates))
+            before = self.replay(workload)
+
+            for table, columns in candidates:
+                column_list = ", ".join(f'"{column}"' for column in columns)
+                self.conn.execute(f'CREATE INDEX "{index_name(table, columns)}" ON "{table}" ({column_list})')
+            self.conn.execute("ANALYZE")
+            logger.info("candidates created; replaying with indexes")
+            trial = self.replay(workload)
+
+            # Net time each index saves over the log; changes within min_improvement count as noise
+            savings: Dict[str, float] = {}
+            for group in workload:
+                fingerprint = group["fingerprint"]
+                change = before[fingerprint] - trial[fingerprint]
+                if abs(change) < self.min_improvement * before[fingerprint]:
+                    change = 0.0
+                for name in self.used_indexes(group["queries"]):
+                    savings[name] = savings.get(name, 0.0) + change * group["count"]
+
+            recommendations, rejected = [], []
+            for table, columns in candidates:
+                name = index_name(table, columns)
+                column_list = ", ".join(f'"{column}"' for column in columns)
+                item = {
+                    "name": name,
+                    "table": table,
+                    "columns": list(columns),
+                    "statement": f'CREATE INDEX "{name}" ON "{table}" ({column_list});',
+                    "saved_ms": savings.get(name, 0.0)
+                }
+                if item["saved_ms"] > 0:
+                    recommendations.append(item)
+                    continue
+                if name not in savings:
+                    item["reason"] = "not used by the planner"
+                elif item["saved_ms"] < 0:
+                    item["reason"] = f"slows the log down by {-item['saved_ms'] / 1000:.2f}s"
+                else:
+                    item["reason"] = "no measurable gain"
+                rejected.append(item)
+                self.conn.execute(f'DROP INDEX "{name}"')
+            recommendations.sort(key=lambda item: item["saved_ms"], reverse=True)
+
+            # Verify the recommended set on its own: plans can change once the rejected indexes are gone
+            self.conn.execute("ANALYZE")
+            logger.info("%d indexes kept; replaying to verify", len(recommendations))
+            after = self.replay(workload)
+            queries = [{
+                "fingerprint": group["fingerprint"],
+                "count": group["count"],
+                "logged_avg_ms": group["avg_ms"],
+                "before_ms": before[group["fingerprint"]],
+                "after_ms": after[group["fingerprint"]],
+                "indexes": self.used_indexes(group["queries"]),
+                "plan_before": group.get("plan_before", []),
+                "plan_after": self.plan(group["queries"][0])
+            } for group in workload]
+
+            weighted_before = sum(q["before_ms"] * q["count"] for q in queries)
+            weighted_after = sum(q["after_ms"] * q["count"] for q in queries)
+            return {
+                "database": self.db_path,
+                "dev_database": self.dev_path if apply else None,
+                "queries": queries,
+                "recommendations": recommendations,
+                "rejected": rejected,
+                "totals": {"logged_queries": sum(q["count"] for q in queries),
+                           "before_ms": weighted_before, "after_ms": weighted_after}
+            }
+        finally:
+            self.conn.close()
+            self.conn = None
+            if not apply and os.path.exists(self.dev_path):
+                os.remove(self.dev_path)
+
+
+def format_report(report: Dict) -> str:
+    '''Plain-text report: recommended indexes, then per query shape latencies before and after.'''
+    totals = report["totals"]
+    lines = [
+        f"Index advisor report for {report['database']}",
+        f"Replayed {len(report['queries'])} query shapes ({totals['logged_queries']} logged runs): "
+        f"{totals['before_ms'] / 1000:.2f}s -> {totals['after_ms'] / 1000:.2f}s for the whole log",
+        ""
+    ]
+    if report["recommendations"]:
+        lines.append("Recommended indexes (time saved over the log):")
+        for item in report["recommendations"]:
+            lines.append(f"  {item['saved_ms'] / 1000:8.2f}s  {item['statement']}")
+    else:
+        lines.append("No index improved the logged queries.")
+    for item in report["rejected"]:
+        lines.append(f"  rejected: {item['table']}({', '.join(item['columns'])}) - {item['reason']}")
+    if report["dev_database"]:
+        lines.append(f"Recommended indexes were created in {report['dev_database']}")
+
+    lines += ["", f"{'runs':>5} {'before ms':>10} {'after ms':>10} {'speedup':>8}  query"]
+    for query in report["queries"]:
+        speedup = query["before_ms"] / query["after_ms"] if query["after_ms"] else float('inf')
+        lines.append(f"{query['count']:>5} {query['before_ms']:>10.2f} {query['after_ms']:>10.2f} {speedup:>7.1f}x  "
+                     f"{query['fingerprint'][:90]}")
+        if query["indexes"]:
+            lines.append(f"{'':>38}uses {', '.join(query['indexes'])}")
+    return "\n".join(lines)
+
+
+def create_store_database(db_path: str, orders: int = 300000):
+    '''Store schema of utils/store_db_creator.py with generated rows (no secondary indexes), for the demo.'''
+    conn = sqlite3.connect(db_path)
+    conn.executescript(f"""
+        PRAGMA journal_mode = OFF;
+        PRAGMA synchronous = OFF;
+        CREATE TABLE customers (customer_id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL, phone TEXT, city TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE products (product_id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, category_id INTEGER,
+            supplier_id INTEGER, price REAL NOT NULL, stock_quantity INTEGER DEFAULT 0);
+        CREATE TABLE orders (order_id INTEGER PRIMARY KEY AUTOINCREMENT, customer_id INTEGER,
+            order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP, status TEXT DEFAULT 'Pending', total_amount REAL DEFAULT 0,
+            FOREIGN KEY (customer_id) REFERENCES customers(customer_id));
+        CREATE TABLE order_items (order_item_id INTEGER PRIMARY KEY AUTOINCREMENT, order_id INTEGER, product_id INTEGER,
+            quantity INTEGER NOT NULL, price_per_unit REAL NOT NULL,
+            FOREIGN KEY (order_id) REFERENCES orders(order_id), FOREIGN KEY (product_id) REFERENCES products(product_id));
+        CREATE TABLE reviews (review_id INTEGER PRIMARY KEY AUTOINCREMENT, customer_id INTEGER, product_id INTEGER,
+            rating INTEGER, comment TEXT, review_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {orders // 10})
+        INSERT INTO customers (customer_id, name, email, city)
+        SELECT i, 'Customer ' || i, 'customer' || i || '@example.com',
+               CASE i % 6 WHEN 0 THEN 'Paris' WHEN 1 THEN 'Lyon' WHEN 2 THEN 'Berlin' WHEN 3 THEN 'Madrid'
+                          WHEN 4 THEN 'Rome' ELSE 'Lisbon' END
+        FROM n;
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 5000)
+        INSERT INTO products (product_id, name, category_id, supplier_id, price, stock_quantity)
+        SELECT i, 'Product ' || i, 1 + i % 20, 1 + i % 50, 1 + (i * 37) % 500, (i * 13) % 200 FROM n;
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {orders})
+        INSERT INTO orders (order_id, customer_id, order_date, status, total_amount)
+        SELECT i, 1 + (i * 7919) % {orders // 10}, datetime('2022-01-01', '+' || (i * 3 % 1095) || ' days'),
+               CASE i % 10 WHEN 0 THEN 'Pending' WHEN 1 THEN 'Cancelled' WHEN 2 THEN 'Shipped' ELSE 'Delivered' END,
+               (i * 31) % 1000
+        FROM n;
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {orders * 3})
+        INSERT INTO order_items (order_item_id, order_id, product_id, quantity, price_per_unit)
+        SELECT i, 1 + (i - 1) / 3, 1 + (i * 104729) % 5000, 1 + i % 4, 1 + (i * 37) % 500 FROM n;
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {orders // 3})
+        INSERT INTO reviews (review_id, customer_id, product_id, rating, comment)
+        SELECT i, 1 + i % {orders // 10}, 1 + (i * 7) % 5000, 1 + i % 5, 'Review ' || i FROM n;
+    """)
+    conn.commit()
+    conn.close()
+
+
+DEMO_QUERIES = [
+    "SELECT order_id, order_date, status, total_amount FROM orders WHERE customer_id = {n} ORDER BY order_date DESC LIMIT 101",
+    "SELECT p.name, oi.quantity, oi.price_per_unit FROM order_items oi JOIN products p ON p.product_id = oi.product_id "
+    "WHERE oi.order_id = {n} LIMIT 101",
+    "SELECT COUNT(*) FROM orders WHERE status = 'Pending' AND order_date >= '2023-0{m}-01' AND order_date < '2023-0{m}-15'",
+    "SELECT name, city FROM customers WHERE email = 'customer{n}@example.com' LIMIT 101",
+    "SELECT c.name, SUM(o.total_amount) AS spent FROM customers c JOIN orders o ON o.customer_id = c.customer_id "
+    "WHERE c.customer_id = {n} GROUP BY c.name LIMIT 101",
+    "SELECT AVG(rating), COUNT(*) FROM reviews WHERE product_id = {p}",
+    "SELECT city, COUNT(*) FROM customers GROUP BY city ORDER BY 2 DESC LIMIT 101"
+]
+
+
+def main():
+    """Generate a store database, log a workload through QueryLog, and print the advisor report"""
+    import tempfile
+    from tools.query_log import QueryLog
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "store.db")
+        create_store_database(db_path)
+        database_config = {'type': 'sqlite', 'default_path': db_path}
+        log = QueryLog(os.path.join(tmp_dir, "query_log.jsonl"), database_config)
+        conn = sqlite3.connect(db_path)
+        for i in range(1, 41):
+            for template in DEMO_QUERIES:
+                query = template.format(n=1 + (i * 7717) % 29000, m=1 + i % 9, p=1 + (i * 31) % 5000)
+                start = time.perf_counter()
+                rows = len(conn.execute(query).fetchall())
+                log.record(query, time.perf_counter() - start, rows=rows)
+        conn.close()
+        log.close()
+
+        advisor = SQLiteIndexAdvisor(db_path, os.path.join(tmp_dir, "dev.db"))
+        report = advisor.advise(load_workload(str(log.path)), apply=True)
+        print()
+        print(format_report(report))
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Recommend indexes from the query log and verify them by replay")
+    parser.add_argument("--log", help="Query log (default: tool_execute_sql.query_log.path)")
+    parser.add_argument("--database", help="SQLite database (default: database.default_path)")
+    parser.add_argument("--dev-database", default="cache/index_advisor/dev.db",
+                        help="Copy the indexes are created in; the source database is never modified")
+    parser.add_argument("--apply", action="store_true", help="Keep the recommended indexes in the dev database")
+    parser.add_argument("--top", type=int, default=20, help="Query shapes to replay, by total logged time")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--min-improvement", type=float, default=0.1, help="Fraction a query must speed up by")
+    parser.add_argument("--json", help="Also write the full report (with query plans) to this file")
+    parser.add_argument("--demo", action="store_true", help="Run on a generated store database instead")
+    args = parser.parse_args()
+    if args.demo:
+        main()
+        return
+
+    from config import config
+
+    database_config = config.database_config
+    if database_config.get('type', 'sqlite') != 'sqlite':
+        print("The index advisor replays queries on a SQLite copy; other databases are not supported yet")
+        return
+    log_path = args.log or config.tool_execute_sql.get('query_log', {}).get('path', 'cache/query_log.jsonl')
+    if not os.path.exists(log_path):
+        print(f"No query log at {log_path}; enable tool_execute_sql.query_log first")
+        return
+    workload = load_workload(log_path)[:args.top]
+    if not workload:
+        print(f"No successful read queries in {log_path}")
+        return
+    advisor = SQLiteIndexAdvisor(args.database or database_config.get('default_path', 'database.db'),
+                                 args.dev_database, repeats=args.repeats, min_improvement=args.min_improvement)
+    report = advisor.advise(workload, apply=args.apply)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=2)
+
+
+if __name__ == "__main__":
+    configure_logging()
+    cli()
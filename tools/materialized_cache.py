@@ -0,0 +1,487 @@
+from contextlib import contextmanager
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+# Add the project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from sqlglot import exp
+
+from tools.execution_backends import ExecutionBackend, _batches, get_execution_backend
+from tools.sql_rewriter import SQL_DIALECTS, parse_statement, SQLRewriteError
+from app_logging import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+SQLITE_NATIVE_TYPES = (int, float, str, bytes)
+
+# Driver types SQLite can't store: (stored as, read back as), keyed by the exact Python type
+VALUE_CODECS = {
+    bool: ('bool', int, bool),
+    Decimal: ('decimal', str, Decimal),
+    datetime: ('datetime', datetime.isoformat, datetime.fromisoformat),
+    date: ('date', date.isoformat, date.fromisoformat),
+    dt_time: ('time', dt_time.isoformat, dt_time.fromisoformat),
+    timedelta: ('timedelta', lambda value: value // timedelta(microseconds=1), lambda value: timedelta(microseconds=value)),
+    UUID: ('uuid', str, UUID),
+    list: ('json', lambda value: json.dumps(value, default=str), json.loads),
+    dict: ('json', lambda value: json.dumps(value, default=str), json.loads)
+}
+DECODERS = {name: decode for name, _, decode in VALUE_CODECS.values()}
+
+
+def column_codecs(rows: List[tuple], width: int) -> Optional[List[Optional[str]]]:
+    '''
+    Per column, the codec that stores its values losslessly in SQLite (None
+    for native values), or None when a column mixes non-native types or holds
+    one without a codec: such results are not materialized.
+    '''
+    codecs: List[Optional[str]] = [None] * width
+    for row in rows:
+        for index, value in enumerate(row):
+            value_type = type(value)
+            if value is None or value_type in SQLITE_NATIVE_TYPES:
+                continue
+            codec = VALUE_CODECS.get(value_type)
+            if codec is None or codecs[index] not in (None, codec[0]):
+                return None
+            codecs[index] = codec[0]
+    # A column of native values may still mix with a coded type (e.g. int and bool)
+    for row in rows:
+        for index, value in enumerate(row):
+            if codecs[index] is not None and value is not None and type(value) in SQLITE_NATIVE_TYPES:
+                return None
+    return codecs
+
+
+def _encode(value: Any) -> Any:
+    codec = VALUE_CODECS.get(type(value))
+    return codec[1](value) if codec else value
+
+
+def table_change_tokens(database_config: Dict, tables: List[str], backend: Optional[ExecutionBackend] = None) -> Dict[str, str]:
+    '''
+    A value per source table that changes when the table's data changes.
+    SQLite keeps no per-table counters, so every table gets the database
+    file's mtime and size. PostgreSQL uses the pg_stat_user_tables write
+    counters plus the relation's file node (TRUNCATE creates a new one),
+    MySQL information_schema UPDATE_TIME, TABLE_ROWS and CREATE_TIME.
+    Tables are as returned by MaterializedCache.describe (schema-qualified
+    where the query qualified them); the query runs on backend's pool.
+    '''
+    db_type = database_config.get('type', 'sqlite')
+    if db_type == 'sqlite':
+        path = database_config.get('default_path', 'database.db')
+        stat = os.stat(path)
+        # The WAL holds committed changes until a checkpoint rewrites the main file
+        wal = Path(f"{path}-wal")
+        wal_token = f":{wal.stat().st_mtime_ns}:{wal.stat().st_size}" if wal.exists() else ""
+        token = f"{stat.st_mtime_ns}:{stat.st_size}{wal_token}"
+        return {table: token for table in tables}
+
+    backend = backend or get_execution_backend(database_config)
+    dialect = SQL_DIALECTS[db_type]
+    literal = lambda value: exp.Literal.string(value).sql(dialect=dialect)
+    token = lambda values: ":".join(str(value) for value in values)
+    if db_type == 'postgresql':
+        # to_regclass resolves each name like the query did: quoting, explicit schema or search_path
+        rows = _fetch_all(backend, (
+            "SELECT t.name, s.n_tup_ins, s.n_tup_upd, s.n_tup_del, pg_relation_filenode(s.relid) "
+            f"FROM (VALUES {', '.join(f'({literal(table)})' for table in tables)}) AS t(name) "
+            "JOIN pg_stat_user_tables s ON s.relid = to_regclass(t.name)"
+        ))
+        found = {row[0]: token(row[1:]) for row in rows}
+    else:
+        references = [exp.to_table(table, dialect=dialect) for table in tables]
+        conditions = " OR ".join(
+            f"(TABLE_SCHEMA = {literal(reference.db) if reference.db else 'DATABASE()'} "
+            f"AND TABLE_NAME = {literal(reference.name)})"
+            for reference in references
+        )
+        rows = _fetch_all(backend, (
+            "SELECT DATABASE(), TABLE_SCHEMA, TABLE_NAME, UPDATE_TIME, TABLE_ROWS, CREATE_TIME "
+            f"FROM information_schema.tables WHERE {conditions}"
+        ))
+        found = {}
+        for table, reference in zip(tables, references):
+            for row in rows:
+                if (reference.db or row[0]).lower() == row[1].lower() and reference.name.lower() == row[2].lower():
+                    found[table] = token(row[3:])
+    return {table: found.get(table, "unknown") for table in tables}
+
+
+def _fetch_all(backend: ExecutionBackend, query: str) -> List[tuple]:
+    with backend.stream(query, 1000) as (_, batches):
+        return [row for batch in batches for row in batch]
+
+
+class MaterializedCache:
+    '''
+    Tracks how often each normalized query runs and what it costs. Once a
+    query is hot (min_executions runs averaging at least min_cost seconds)
+    its result is stored as a table in a separate SQLite cache database, and
+    later runs read that table until a source table changes or ttl expires.
+    PostgreSQL and MySQL change counters lag behind commits, so there entries
+    also expire after server_ttl seconds. Values SQLite can't store (Decimal,
+    dates and times, UUID, JSON arrays/objects, bool) are encoded per column
+    and decoded on read; results with other driver types are not materialized.
+    '''
+
+    def __init__(self, path: str, database_config: Dict, min_executions: int = 3, min_cost: float = 0.2,
+                 max_rows: int = 10000, max_entries: int = 100, ttl: float = 0, server_ttl: float = 30):
+        self.path = path
+        self.database_config = database_config
+        self.dialect = SQL_DIALECTS.get(database_config.get('type', 'sqlite'))
+        self.min_executions = min_executions
+        self.min_cost = min_cost
+        self.max_rows = max_rows
+        self.max_entries = max_entries
+        if database_config.get('type', 'sqlite') != 'sqlite' and server_ttl:
+            ttl = min(ttl, server_ttl) if ttl else server_ttl
+        self.ttl = ttl
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS query_stats (
+                key TEXT PRIMARY KEY, sql TEXT NOT NULL, executions INTEGER NOT NULL DEFAULT 0,
+                total_seconds REAL NOT NULL DEFAULT 0, hits INTEGER NOT NULL DEFAULT 0,
+                saved_seconds REAL NOT NULL DEFAULT 0, last_used REAL
+            );
+            CREATE TABLE IF NOT EXISTS materialized (
+                key TEXT PRIMARY KEY, table_name TEXT NOT NULL, columns TEXT NOT NULL, row_count INTEGER NOT NULL,
+                source_tokens TEXT NOT NULL, created_at REAL NOT NULL, last_hit REAL, codecs TEXT
+            );
+        """)
+        if "codecs" not in {row[1] for row in conn.execute("PRAGMA table_info(materialized)")}:
+            # Entries written before codecs existed hold lossy values and are dropped on lookup
+            conn.execute("ALTER TABLE materialized ADD COLUMN codecs TEXT")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def describe(self, query: str) -> Optional[Dict]:
+        '''Cache key, normalized text and source tables of a read query; None when it can't be cached.'''
+        if self.dialect is None:
+            return None
+        try:
+            statement = parse_statement(query, self.database_config.get('type', 'sqlite'))
+        except SQLRewriteError:
+            return None
+        if not isinstance(statement, exp.Query):
+            return None
+        ctes = {cte.alias_or_name for cte in statement.find_all(exp.CTE)}
+        # Schema-qualified as written, so tables of the same name in other schemas aren't confused
+        tables = sorted({
+            exp.Table(this=table.this.copy(), db=table.args['db'].copy() if table.db else None).sql(dialect=self.dialect)
+            for table in statement.find_all(exp.Table) if table.db or table.name not in ctes
+        })
+        if not tables:
+            return None
+        normalized = statement.sql(dialect=self.dialect, normalize=True)
+        return {
+            "key": hashlib.sha1(normalized.encode()).hexdigest(),
+            "sql": normalized,
+            "tables": tables
+        }
+
+    def lookup(self, info: Dict, source_tokens: Dict[str, str]) -> Optional[Dict]:
+        '''The fresh materialized entry for a query, given the current table_change_tokens; stale ones are dropped.'''
+        row = self._connection().execute(
+            "SELECT table_name, columns, source_tokens, created_at, codecs FROM materialized WHERE key = ?",
+            (info["key"],)
+        ).fetchone()
+        if row is None:
+            return None
+        table_name, columns, stored_tokens, created_at, codecs = row
+        expired = self.ttl and time.time() - created_at > self.ttl
+        if expired or codecs is None or json.loads(stored_tokens) != source_tokens:
+            logger.info("%s is stale; refreshing on this run", table_name)
+            self.drop(info["key"])
+            return None
+        return {"key": info["key"], "table_name": table_name, "columns": json.loads(columns),
+                "codecs": json.loads(codecs)}
+
+    @contextmanager
+    def read(self, entry: Dict, batch_size: int):
+        cursor = self._connection().execute(f'SELECT * FROM "{entry["table_name"]}" ORDER BY rowid')
+        decoders = [(index, DECODERS[codec]) for index, codec in enumerate(entry["codecs"]) if codec]
+
+        def decoded(batches):
+            for batch in batches:
+                rows = [list(row) for row in batch]
+                for row in rows:
+                    for index, decode in decoders:
+                        if row[index] is not None:
+                            row[index] = decode(row[index])
+                yield [tuple(row) for row in rows]
+
+        try:
+            batches = _batches(cursor, batch_size)
+            yield entry["columns"], decoded(batches) if decoders else batches
+        finally:
+            cursor.close()
+
+    def record_execution(self, info: Dict, seconds: float) -> bool:
+        '''Count one run against the source database; returns whether the query is now hot.'''
+        executions, total_seconds = self._connection().execute(
+            """INSERT INTO query_stats (key, sql, executions, total_seconds, last_used) VALUES (?, ?, 1, ?, ?)
+               ON CONFLICT(key) DO UPDATE SET executions = executions + 1,
+                   total_seconds = total_seconds + excluded.total_seconds, last_used = excluded.last_used
+               RETURNING executions, total_seconds""",
+            (info["key"], info["sql"], seconds, time.time())
+        ).fetchone()
+        return executions >= self.min_executions and total_seconds / executions >= self.min_cost
+
+    def record_hit(self, key: str, seconds: float):
+        '''A run served from the cache; saved time is the average source cost minus the cache read.'''
+        conn = self._connection()
+        conn.execute(
+            """UPDATE query_stats SET hits = hits + 1, last_used = ?,
+                   saved_seconds = saved_seconds + MAX(total_seconds / MAX(executions, 1) - ?, 0)
+               WHERE key = ?""",
+            (time.time(), seconds, key)
+        )
+        conn.execute("UPDATE materialized SET last_hit = ? WHERE key = ?", (time.time(), key))
+
+    def materialize(self, info: Dict, columns: List[str], rows: List[tuple], source_tokens: Dict[str, str]):
+        codecs = column_codecs(rows, len(columns))
+        if codecs is None:
+            logger.debug("not materializing %s: values SQLite can't store losslessly", info["key"][:16])
+            return
+        table_name = f"mv_{info['key'][:16]}"
+        conn = self._connection()
+        definitions = ", ".join(f'"c{i}"' for i in range(len(columns)))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+            conn.execute(f'CREATE TABLE "{table_name}" ({definitions})')
+            conn.executemany(
+                f'INSERT INTO "{table_name}" VALUES ({", ".join("?" * len(columns))})',
+                (tuple(_encode(value) for value in row) if any(codecs) else row for row in rows)
+            )
+            conn.execute(
+                """INSERT OR REPLACE INTO materialized
+                       (key, table_name, columns, row_count, source_tokens, created_at, last_hit, codecs)
+                   VALUES (?, ?, ?, ?, ?, ?, NULL, ?)""",
+                (info["key"], table_name, json.dumps(columns), len(rows), json.dumps(source_tokens), time.time(),
+                 json.dumps(codecs))
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        logger.info("materialized %d rows into %s", len(rows), table_name)
+        self._evict()
+
+    def drop(self, key: str):
+        conn = self._connection()
+        row = conn.execute("SELECT table_name FROM materialized WHERE key = ?", (key,)).fetchone()
+        if row:
+            conn.execute(f'DROP TABLE IF EXISTS "{row[0]}"')
+            conn.execute("DELETE FROM materialized WHERE key = ?", (key,))
+
+    def _evict(self):
+        '''Keep at most max_entries tables, dropping the least recently hit.'''
+        keys = self._connection().execute(
+            "SELECT key FROM materialized ORDER BY COALESCE(last_hit, created_at) DESC LIMIT -1 OFFSET ?",
+            (self.max_entries,)
+        ).fetchall()
+        for (key,) in keys:
+            self.drop(key)
+
+    def summary(self, top: int = 5) -> Dict:
+        '''Hit rate, saved time and the most-used queries.'''
+        conn = self._connection()
+        executions, hits, saved = conn.execute(
+            "SELECT COALESCE(SUM(executions), 0), COALESCE(SUM(hits), 0), COALESCE(SUM(saved_seconds), 0) FROM query_stats"
+        ).fetchone()
+        queries = conn.execute(
+            """SELECT s.sql, s.executions, s.hits, s.total_seconds / MAX(s.executions, 1), s.saved_seconds,
+                      m.table_name IS NOT NULL
+               FROM query_stats s LEFT JOIN materialized m ON m.key = s.key
+               ORDER BY s.executions + s.hits DESC LIMIT ?""",
+            (top,)
+        ).fetchall()
+        return {
+            "tracked_queries": conn.execute("SELECT COUNT(*) FROM query_stats").fetchone()[0],
+            "materialized": conn.execute("SELECT COUNT(*) FROM materialized").fetchone()[0],
+            "executions": executions,
+            "hits": hits,
+            "hit_rate": hits / (hits + executions) if hits + executions else 0.0,
+            "saved_seconds": round(saved, 3),
+            "top_queries": [
+                {"sql": sql, "executions": runs, "hits": query_hits, "average_seconds": round(average, 4),
+                 "saved_seconds": round(query_saved, 3), "materialized": bool(materialized)}
+                for sql, runs, query_hits, average, query_saved, materialized in queries
+            ]
+        }
+
+
+class MaterializedCacheBackend(ExecutionBackend):
+    '''Wraps another backend: serves hot queries from the cache and materializes new ones.'''
+
+    def __init__(self, backend: ExecutionBackend, cache: MaterializedCache):
+        super().__init__(backend.database_config)
+        self.backend = backend
+        self.cache = cache
+
+    def cache_key(self) -> str:
+        return self.backend.cache_key()
+
+    def prepare(self, query: str, max_rows: int, rewrite: bool = True) -> Dict:
+        return self.backend.prepare(query, max_rows, rewrite)
+
+    @contextmanager
+    def stream(self, query: str, batch_size: int):
+        info = self.cache.describe(query)
+        entry = None
+        if info is not None:
+            # One token lookup per run, on the wrapped backend's pool; taken before running,
+            # so a change during the query makes a new entry stale
+            source_tokens = table_change_tokens(self.database_config, info["tables"], self.backend)
+            entry = self.cache.lookup(info, source_tokens)
+        if entry is not None:
+            start = time.perf_counter()
+            with self.cache.read(entry, batch_size) as result:
+                yield result
+            self.cache.record_hit(entry["key"], time.perf_counter() - start)
+            return
+
+        if info is None:
+            with self.backend.stream(query, batch_size) as result:
+                yield result
+            return
+
+        captured, state = [], {"complete": False, "overflow": False}
+
+        def capture(batches):
+            for batch in batches:
+                if not state["overflow"]:
+                    if len(captured) + len(batch) > self.cache.max_rows:
+                        state["overflow"] = True
+                        captured.clear()
+                    else:
+                        captured.extend(batch)
+                yield batch
+            state["complete"] = True
+
+        start = time.perf_counter()
+        with self.backend.stream(query, batch_size) as (columns, batches):
+            yield columns, capture(batches)
+        hot = self.cache.record_execution(info, time.perf_counter() - start)
+        if hot and state["complete"] and not state["overflow"]:
+            try:
+                self.cache.materialize(info, columns, captured, source_tokens)
+            except Exception as e:
+                logger.warning("materialization failed: %s", e)
+
+    def close(self):
+        self.backend.close()
+
+
+_caches: Dict[str, MaterializedCacheBackend] = {}
+_caches_lock = threading.Lock()
+
+
+def with_materialized_cache(backend: ExecutionBackend, cache_config: Dict) -> ExecutionBackend:
+    '''Wrap backend in its shared materialized cache when tool_execute_sql.materialized_cache is enabled.'''
+    if not cache_config.get('enabled') or SQL_DIALECTS.get(backend.db_type) is None:
+        return backend
+    with _caches_lock:
+        if backend.cache_key() not in _caches:
+            cache = MaterializedCache(
+                cache_config.get('path', 'cache/materialized.db'),
+                backend.database_config,
+                min_executions=cache_config.get('min_executions', 3),
+                min_cost=cache_config.get('min_cost_ms', 200) / 1000,
+                max_rows=cache_config.get('max_rows', 10000),
+                max_entries=cache_config.get('max_entries', 100),
+                ttl=cache_config.get('ttl', 0),
+                server_ttl=cache_config.get('server_ttl', 30)
+            )
+            _caches[backend.cache_key()] = MaterializedCacheBackend(backend, cache)
+        return _caches[backend.cache_key()]
+
+
+def print_stats():
+    """Hit rate, saved time and top queries of the configured cache"""
+    from config import config
+
+    cache_config = config.tool_execute_sql.get('materialized_cache', {})
+    path = cache_config.get('path', 'cache/materialized.db')
+    if not os.path.exists(path):
+        print(f"No materialized cache at {path}")
+        return
+    summary = MaterializedCache(path, config.database_config).summary(top=10)
+    print(f"{summary['tracked_queries']} queries tracked, {summary['materialized']} materialized; "
+          f"hit rate {summary['hit_rate']:.0%} ({summary['hits']} hits, {summary['executions']} source runs), "
+          f"{summary['saved_seconds']:.2f}s saved")
+    for query in summary["top_queries"]:
+        print(f"  {query['executions']:>5} runs {query['hits']:>5} hits {query['average_seconds'] * 1000:9.1f} ms avg "
+              f"{query['saved_seconds']:8.2f}s saved {'*' if query['materialized'] else ' '} {query['sql'][:80]}")
+
+
+def main():
+    """Repeated aggregations on a generated invoice table: source runs, materialization, hits, refresh on change"""
+    import tempfile
+    from tools.execution_backends import SQLiteExecutionBackend
+    from utils.benchmark_analytical_engine import create_invoice_database
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "invoices.db")
+        create_invoice_database(db_path, 2000000)
+        database_config = {'type': 'sqlite', 'default_path': db_path, 'read_only': True}
+        backend = with_materialized_cache(
+            SQLiteExecutionBackend(database_config),
+            {'enabled': True, 'path': os.path.join(tmp_dir, "materialized.db"), 'min_executions': 2, 'min_cost_ms': 100}
+        )
+        queries = [
+            "SELECT TrackId, SUM(UnitPrice * Quantity) AS Revenue FROM InvoiceLine GROUP BY TrackId ORDER BY Revenue DESC LIMIT 10",
+            "select i.BillingCountry, sum(il.UnitPrice * il.Quantity) as Sales from InvoiceLine il join Invoice i "
+            "on i.InvoiceId = il.InvoiceId group by i.BillingCountry order by Sales desc"
+        ]
+
+        def run(query):
+            start = time.perf_counter()
+            with backend.stream(query, 1000) as (_, batches):
+                rows = sum(len(batch) for batch in batches)
+            return time.perf_counter() - start, rows
+
+        for round_number in range(1, 5):
+            if round_number == 4:
+                conn = sqlite3.connect(db_path)
+                conn.execute("UPDATE InvoiceLine SET Quantity = Quantity + 1 WHERE InvoiceLineId = 1")
+                conn.commit()
+                conn.close()
+                print("-- source data changed")
+            for query in queries:
+                seconds, rows = run(query)
+                print(f"round {round_number}: {seconds * 1000:8.1f} ms, {rows} rows  {query[:60]}...")
+
+        summary = backend.cache.summary()
+        print(f"\nhit rate {summary['hit_rate']:.0%} ({summary['hits']} hits, {summary['executions']} source runs), "
+              f"{summary['saved_seconds']:.2f}s saved, {summary['materialized']} materialized")
+
+
+if __name__ == "__main__":
+    configure_logging()
+    if len(sys.argv) > 1 and sys.argv[1] == "stats":
+        print_stats()
+    else:
+        main()
@@ -9,6 +9,9 @@ project_root = Path(__file__).resolve().parent.parent
 sys.path.append(str(project_root))
 
 from config import config
+from app_logging import configure_logging, get_logger
+
+logger = get_logger(__name__)
 
 
 @tool
@@ -33,7 +36,7 @@ def get_db_field_definition(column_name: str):
             ]
         }
     '''
-    print(f"[TOOL][Api call] => get_db_field_definition({column_name})")
+    logger.info("tool call: get_db_field_definition(%s)", column_name, extra={"tool": "get_db_field_definition"})
 
     tool_config = config.tool_get_data_dictionary
     file_path = tool_config['file_path']
@@ -64,6 +67,7 @@ def get_db_field_definition(column_name: str):
         }
 
 if __name__ == "__main__":
+    configure_logging()
     # Get column name from user input
     test_column = input("Enter column name to search (e.g. customer_id): ").strip()
     
@@ -0,0 +1,236 @@
+import atexit
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+# Add the project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+import sqlglot
+from sqlglot import exp
+
+from tools.sql_rewriter import SQL_DIALECTS
+from app_logging import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+# The user question being answered; set by the assistant for each turn and copied into tool-call threads
+current_question: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('current_question', default=None)
+
+
+@lru_cache(maxsize=1024)
+def query_fingerprint(query: str, dialect: str = 'sqlite') -> str:
+    '''Query text with literals replaced by ?, so runs that differ only in constants group together.'''
+    try:
+        tree = sqlglot.parse_one(query, read=dialect)
+    except sqlglot.errors.ParseError:
+        return " ".join(query.split())
+    tree = tree.transform(lambda node: exp.Placeholder() if isinstance(node, exp.Literal) else node)
+    return tree.sql(dialect=dialect, normalize=True)
+
+
+class QueryLog:
+    '''
+    Appends one JSON line per executed query:
+    {"ts", "database", "sql", "executed_sql", "normalized", "elapsed_ms", "rows", "error", "question"}
+    "sql" is the query as asked and "executed_sql" what ran after rewriting
+    (null when unchanged); elapsed_ms is time spent in the database driver.
+
+    record() only appends to an in-memory buffer; a background thread
+    normalizes and writes the buffer every flush_interval seconds or once
+    buffer_size entries are pending, and rotates the file like
+    logging.handlers.RotatingFileHandler (path.1 ... path.<backup_count>).
+    When more than max_pending entries wait, new ones are dropped and counted.
+    '''
+
+    def __init__(self, path: str, database_config: Dict, buffer_size: int = 100, flush_interval: float = 1.0,
+                 max_size: int = 10485760, backup_count: int = 5, max_pending: int = 10000):
+        self.path = Path(path)
+        self.database_config = database_config
+        self.dialect = SQL_DIALECTS.get(database_config.get('type', 'sqlite'))
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.backup_count = backup_count
+        self.max_pending = max_pending
+        self.dropped = 0
+        self.written = 0
+        self._pending = deque()
+        self._wakeup = threading.Event()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = threading.Thread(target=self._run, name="query-log-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def record(self, query: str, seconds: float, rows: Optional[int] = None, error: Optional[str] = None,
+               executed: Optional[str] = None):
+        '''Queue one execution (executed: the rewritten SQL, when it differs from query); never blocks on disk.'''
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        executed = executed if executed != query else None
+        self._pending.append((time.time(), query, executed, seconds, rows, error, current_question.get()))
+        if len(self._pending) >= self.buffer_size:
+            self._wakeup.set()
+
+    def _entry(self, ts: float, query: str, executed: Optional[str], seconds: float, rows, error, question) -> Dict:
+        return {
+            "ts": ts,
+            "database": self.database_config.get('type', 'sqlite'),
+            "sql": query,
+            "executed_sql": executed,
+            "normalized": query_fingerprint(query, self.dialect) if self.dialect else query,
+            "elapsed_ms": round(seconds * 1000, 3),
+            "rows": rows,
+            "error": error,
+            "question": question
+        }
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning("query log write failed: %s", e)
+
+    def flush(self):
+        '''Write everything queued so far.'''
+        with self._write_lock:
+            records = []
+            while self._pending:
+                records.append(self._pending.popleft())
+            if not records:
+                return
+            size = self.path.stat().st_size if self.path.exists() else 0
+            chunk = []
+            for record in records:
+                line = (json.dumps(self._entry(*record), default=str) + "\n").encode("utf-8")
+                if self.max_size and size and size + len(line) > self.max_size:
+                    self._append(chunk)
+                    self._rotate()
+                    chunk, size = [], 0
+                chunk.append(line)
+                size += len(line)
+            self._append(chunk)
+            self.written += len(records)
+
+    def _append(self, lines: List[bytes]):
+        if lines:
+            with open(self.path, "ab") as log_file:
+                log_file.write(b"".join(lines))
+
+    def _rotate(self):
+        if self.backup_count <= 0:
+            self.path.unlink()
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = Path(f"{self.path}.{index}")
+            if source.exists():
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._wakeup.set()
+            self._writer.join(timeout=5)
+            self.flush()
+
+
+def log_files(path: str) -> List[str]:
+    '''The log and its rotated backups, oldest first.'''
+    backups = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        backups.append(f"{path}.{index}")
+        index += 1
+    return backups[::-1] + ([path] if os.path.exists(path) else [])
+
+
+def read_query_log(path: str) -> Iterator[Dict]:
+    '''Entries of a query log and its rotated backups in write order, skipping lines that are not valid JSON.'''
+    for file_path in log_files(path):
+        with open(file_path, encoding="utf-8") as log_file:
+            for line in log_file:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+_logs: Dict[str, QueryLog] = {}
+_logs_lock = threading.Lock()
+
+
+def get_query_log(log_config: Dict, database_config: Dict, logging_config: Optional[Dict] = None) -> Optional[QueryLog]:
+    '''
+    The shared query log when tool_execute_sql.query_log is enabled, else None.
+    Rotation follows logging.max_size and logging.backup_count.
+    '''
+    if not log_config.get('enabled'):
+        return None
+    logging_config = logging_config or {}
+    path = log_config.get('path', 'cache/query_log.jsonl')
+    with _logs_lock:
+        if path not in _logs:
+            _logs[path] = QueryLog(
+                path,
+                database_config,
+                buffer_size=log_config.get('buffer_size', 100),
+                flush_interval=log_config.get('flush_interval', 1.0),
+                max_size=logging_config.get('max_size', 10485760),
+                backup_count=logging_config.get('backup_count', 5)
+            )
+        return _logs[path]
+
+
+def main():
+    """Time spent in the calling thread per logged query: a synchronous append versus the buffered log"""
+    import tempfile
+
+    count = 20000
+    query = "SELECT c.name, SUM(o.total_amount) FROM customers c JOIN orders o ON o.customer_id = c.customer_id " \
+            "WHERE c.city = 'Lyon' GROUP BY c.name ORDER BY 2 DESC LIMIT 101"
+    database_config = {'type': 'sqlite'}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "sync.jsonl"
+        start = time.perf_counter()
+        for i in range(count):
+            # Different literals each time, as with real questions (the fingerprint cache doesn't help)
+            sql = query.replace("'Lyon'", f"'City {i}'")
+            entry = {"ts": time.time(), "database": "sqlite", "sql": sql,
+                     "normalized": query_fingerprint(sql), "elapsed_ms": 12.5, "rows": 40, "error": None}
+            with open(path, "a", encoding="utf-8") as log_file:
+                log_file.write(json.dumps(entry) + "\n")
+        sync_seconds = time.perf_counter() - start
+
+        log = QueryLog(str(Path(tmp_dir) / "buffered.jsonl"), database_config, max_size=1048576, backup_count=3,
+                       max_pending=count)
+        start = time.perf_counter()
+        for i in range(count):
+            log.record(query.replace("'Lyon'", f"'City {i}'"), 0.0125, rows=40)
+        buffered_seconds = time.perf_counter() - start
+        log.close()
+        flushed_seconds = time.perf_counter() - start
+        files = log_files(str(log.path))
+        print(f"synchronous append: {sync_seconds / count * 1e6:8.1f} us per query")
+        print(f"buffered record:    {buffered_seconds / count * 1e6:8.1f} us per query; background writer done "
+              f"after {flushed_seconds:.1f}s ({log.written} written, {log.dropped} dropped, {len(files)} files after rotation at 1 MB, "
+              f"{sum(1 for _ in read_query_log(str(log.path)))} entries kept)")
+
+
+if __name__ == "__main__":
+    configure_logging()
+    main()
@@ -0,0 +1,83 @@
+import json
+from typing import Any, Dict, List, Sequence
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _is_numeric_column(values: Sequence[Any]) -> bool:
+    return all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values)
+
+
+def _encode_column(values: Sequence[Any], dictionary_encode: bool, use_numpy: bool) -> Any:
+    '''
+    Encode a single column. Repeated strings become {"dictionary", "codes"},
+    numeric columns become NumPy arrays when use_numpy is set, everything
+    else stays a plain list.
+    '''
+    if not values:
+        return []
+
+    if use_numpy and np is not None and _is_numeric_column(values):
+        return np.asarray(values)
+
+    if dictionary_encode and all(v is None or isinstance(v, str) for v in values):
+        if use_numpy and np is not None and None not in values:
+            dictionary, codes = np.unique(np.asarray(values, dtype=object), return_inverse=True)
+            if len(dictionary) <= len(values) // 2:
+                return {"dictionary": dictionary.tolist(), "codes": codes.astype(np.int32)}
+        else:
+            lookup: Dict[str, int] = {}
+            codes = [None if v is None else lookup.setdefault(v, len(lookup)) for v in values]
+            if len(lookup) <= len(values) // 2:
+                return {"dictionary": list(lookup), "codes": codes}
+
+    return list(values)
+
+
+def to_columnar(column_names: List[str], rows: Sequence[Sequence[Any]],
+                dictionary_encode: bool = True, use_numpy: bool = False) -> Dict[str, Any]:
+    '''
+    Convert row tuples to a columnar payload.
+    Args:
+        column_names (List[str]): Column names, emitted once
+        rows (Sequence[Sequence]): Rows as returned by cursor.fetchall()
+        dictionary_encode (bool): Encode repeated strings as dictionary + codes
+        use_numpy (bool): Return NumPy arrays for numeric/code columns.
+            Only serializable through dumps(), not the stdlib json module.
+    Returns:
+        Dict: {"columns": [...], "data": [column_values, ...]}
+    '''
+    columns = list(zip(*rows)) if rows else [()] * len(column_names)
+    return {
+        "columns": list(column_names),
+        "data": [_encode_column(values, dictionary_encode, use_numpy) for values in columns]
+    }
+
+
+def _json_default(value: Any) -> Any:
+    if np is not None and isinstance(value, np.ndarray):
+        return value.tolist()
+    if np is not None and isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+def dumps(payload: Any) -> bytes:
+    '''Serialize payload to JSON bytes, using orjson when available.'''
+    if orjson is not None:
+        return orjson.dumps(
+            payload,
+            default=_json_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(payload, default=_json_default, separators=(",", ":")).encode("utf-8")
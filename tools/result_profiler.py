@@ -0,0 +1,105 @@
+from collections import Counter
+from typing import Any, Dict, List, Sequence
+
+
+class ColumnProfile:
+    '''Running statistics for one result column.'''
+
+    def __init__(self, name: str, max_distinct: int):
+        self.name = name
+        self.max_distinct = max_distinct
+        self.nulls = 0
+        self.types = Counter()
+        self.values = Counter()
+        self.distinct_overflow = False
+        self.min = None
+        self.max = None
+        self.comparable = True
+
+    def update(self, values: Sequence[Any]):
+        non_null = [v for v in values if v is not None]
+        self.nulls += len(values) - len(non_null)
+        if not non_null:
+            return
+
+        self.types.update(type(v).__name__ for v in non_null)
+
+        if self.comparable:
+            try:
+                batch_min, batch_max = min(non_null), max(non_null)
+                self.min = batch_min if self.min is None else min(self.min, batch_min)
+                self.max = batch_max if self.max is None else max(self.max, batch_max)
+            except TypeError:
+                # Mixed, non-orderable types (e.g. SQLite dynamic typing)
+                self.comparable = False
+                self.min = self.max = None
+
+        if not self.distinct_overflow:
+            # Nested values (JSON documents, arrays) are counted by their repr
+            try:
+                self.values.update(non_null)
+            except TypeError:
+                self.values.update(v if v.__hash__ is not None else repr(v) for v in non_null)
+            if len(self.values) > self.max_distinct:
+                self.distinct_overflow = True
+
+    def summary(self, top_k: int) -> Dict[str, Any]:
+        if not self.types:
+            column_type = "null"
+        elif len(self.types) == 1:
+            column_type = next(iter(self.types))
+        else:
+            column_type = "mixed(" + ",".join(sorted(self.types)) + ")"
+
+        summary = {
+            "name": self.name,
+            "type": column_type,
+            "nulls": self.nulls,
+            "min": self.min,
+            "max": self.max,
+            "distinct": f">{self.max_distinct}" if self.distinct_overflow else len(self.values),
+        }
+        # Top values only carry information when something repeats
+        if top_k and not self.distinct_overflow and len(self.values) < sum(self.types.values()):
+            summary["top_values"] = [[value, count] for value, count in self.values.most_common(top_k)]
+        return summary
+
+
+class ResultProfiler:
+    '''
+    Single-pass profiler over a cursor stream. Feed it fetchmany() batches
+    and call summary() once the cursor is exhausted.
+    '''
+
+    def __init__(self, column_names: List[str], top_k: int = 5,
+                 sample_rows: int = 5, max_distinct: int = 10000):
+        self.column_names = column_names
+        self.top_k = top_k
+        self.sample_rows = sample_rows
+        self.max_distinct = max_distinct
+        self.row_count = 0
+        self.sample: List[Sequence[Any]] = []
+        self.columns = [ColumnProfile(name, max_distinct) for name in column_names]
+
+    def update(self, rows: Sequence[Sequence[Any]]):
+        if not rows:
+            return
+        # column_names may grow between batches (MongoDB fields first seen later); earlier rows had them as null
+        width = len(rows[0])
+        while len(self.columns) < min(width, len(self.column_names)):
+            profile = ColumnProfile(self.column_names[len(self.columns)], self.max_distinct)
+            profile.nulls = self.row_count
+            self.columns.append(profile)
+        self.row_count += len(rows)
+        if len(self.sample) < self.sample_rows:
+            self.sample.extend(rows[:self.sample_rows - len(self.sample)])
+        # Transpose once per batch so each column is profiled with C-level builtins
+        for profile, values in zip(self.columns, zip(*rows)):
+            profile.update(values)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "row_count": self.row_count,
+            "columns": [profile.summary(self.top_k) for profile in self.columns],
+            "sample": [list(row) for row in self.sample]
+        }
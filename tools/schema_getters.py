@@ -1,27 +1,169 @@
 from abc import ABC, abstractmethod
+import hashlib
 import sqlite3
-from typing import Dict, List
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 import pymongo
 import mysql.connector
 import psycopg2
 from psycopg2.extensions import connection as pg_connection
 
 class SchemaGetter(ABC):
+    # Process-wide schema cache shared by all getters: cache_key -> (fetched_at, schema)
+    _schema_cache: Dict[str, tuple] = {}
+    _cache_lock = threading.Lock()
+    # Optional cross-process second level (services.shared_state.SharedStore) for multi-worker deployments
+    _shared_store = None
+
     @abstractmethod
     def get_schema(self) -> Dict:
         pass
 
-class SQLiteSchemaGetter(SchemaGetter):
+    @abstractmethod
+    def cache_key(self) -> str:
+        """Identify the database this getter introspects"""
+        pass
+
+    def get_cached_schema(self) -> Dict:
+        """Return get_schema(), reusing results younger than config['cache_timeout'] seconds"""
+        timeout = self.config.get('cache_timeout', 0)
+        key = self.cache_key()
+        with self._cache_lock:
+            cached = self._schema_cache.get(key)
+        if cached and time.monotonic() - cached[0] < timeout:
+            return cached[1]
+
+        store = self._shared_store
+        if store is not None and timeout:
+            shared = store.get(f"schema:{key}")
+            if shared is not None:
+                # Another worker introspected it; keep its age so every worker expires it together
+                fetched_at = time.monotonic() - (time.time() - shared["fetched_at"])
+                with self._cache_lock:
+                    self._schema_cache[key] = (fetched_at, shared["schema"])
+                return shared["schema"]
+
+        schema_info = self.refresh_schema()
+        if timeout:
+            with self._cache_lock:
+                self._schema_cache[key] = (time.monotonic(), schema_info)
+            if store is not None:
+                store.set(f"schema:{key}", {"fetched_at": time.time(), "schema": schema_info}, ttl=timeout)
+        return schema_info
+
+    @classmethod
+    def set_shared_store(cls, store) -> None:
+        """Share introspected schemas with other worker processes through store (None turns it off)"""
+        cls._shared_store = store
+
+    def refresh_schema(self) -> Dict:
+        """Produce an up-to-date schema when the cache has expired"""
+        return self.get_schema()
+
+    @classmethod
+    def invalidate_cache(cls, key: Optional[str] = None):
+        """Drop one cached schema, or all of them when key is None"""
+        with cls._cache_lock:
+            if key is None:
+                cls._schema_cache.clear()
+            else:
+                cls._schema_cache.pop(key, None)
+
+class SQLSchemaGetter(SchemaGetter):
+    """
+    Shared table-by-table introspection for relational databases. With
+    config['parallel_workers'] > 1 the tables are partitioned across that
+    many connections and the results merged back in catalog order.
+    """
+
+    @abstractmethod
+    def _connect(self):
+        pass
+
+    @abstractmethod
+    def _list_tables(self, conn) -> List[str]:
+        pass
+
+    @abstractmethod
+    def _describe_table(self, conn, table_name: str) -> Tuple[Dict, List[Dict]]:
+        """Return (table_info, indexes) for one table"""
+        pass
+
+    def get_schema(self) -> Dict:
+        conn = self._connect()
+        try:
+            tables = self._list_tables(conn)
+            described = self._describe_tables(conn, tables)
+        finally:
+            conn.close()
+
+        schema_info = {"tables": [], "indexes": []}
+        for table_name in tables:
+            table_info, indexes = described[table_name]
+            schema_info["tables"].append(table_info)
+            schema_info["indexes"].extend(indexes)
+        return schema_info
+
+    def _describe_tables(self, conn, tables: List[str]) -> Dict[str, Tuple[Dict, List[Dict]]]:
+        """Describe tables on conn, or partitioned across worker connections"""
+        workers = min(self._parallel_workers(), len(tables))
+        if workers <= 1:
+            return {table_name: self._describe_table(conn, table_name) for table_name in tables}
+
+        partitions = [tables[i::workers] for i in range(workers)]
+        described = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for partition_result in pool.map(self._describe_partition, partitions):
+                described.update(partition_result)
+        return described
+
+    def _schema_version(self, conn) -> Optional[str]:
+        """Cheap database-wide change marker; None when the database has none"""
+        return None
+
+    @abstractmethod
+    def _table_fingerprints(self, conn, tables: List[str]) -> Dict[str, str]:
+        """Checksum of each table's columns, constraints and indexes"""
+        pass
+
+    def refresh_schema(self) -> Dict:
+        if not self.config.get('incremental_refresh', True):
+            return self.get_schema()
+        from tools.schema_refresh import get_refresher
+        refresher = get_refresher(self)
+        refresher.refresh()
+        return refresher.schema
+
+    def _parallel_workers(self) -> int:
+        return self.config.get('parallel_workers', 1)
+
+    def _describe_partition(self, tables: List[str]) -> Dict[str, Tuple[Dict, List[Dict]]]:
+        conn = self._connect()
+        try:
+            return {table_name: self._describe_table(conn, table_name) for table_name in tables}
+        finally:
+            conn.close()
+
+class SQLiteSchemaGetter(SQLSchemaGetter):
     def __init__(self, db_path: str, config: Dict):
         self.db_path = db_path
         self.config = config
 
-    def get_schema(self) -> Dict:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        schema_info = {"tables": [], "indexes": []}
-        
+    def cache_key(self) -> str:
+        return f"sqlite:{self.db_path}"
+
+    def _parallel_workers(self) -> int:
+        # Local PRAGMA calls are GIL-bound, so threads rarely help; opt in separately
+        return self.config.get('sqlite_parallel_workers', 1)
+
+    def _connect(self):
+        # Each worker thread gets its own connection
+        return sqlite3.connect(self.db_path)
+
+    def _list_tables(self, conn) -> List[str]:
         tables_query = """
             SELECT name FROM sqlite_master 
             WHERE type='table'
@@ -29,45 +171,57 @@ class SQLiteSchemaGetter(SchemaGetter):
             LIMIT ?
         """.format("AND name NOT LIKE 'sqlite_%'" if self.config.get('exclude_system_tables') else "")
         
-        tables = cursor.execute(tables_query, [self.config.get('max_tables', 100)]).fetchall()
+        return [table[0] for table in conn.execute(tables_query, [self.config.get('max_tables', 100)]).fetchall()]
+
+    def _schema_version(self, conn) -> Optional[str]:
+        # Incremented by SQLite on every schema change
+        return str(conn.execute("PRAGMA schema_version").fetchone()[0])
+
+    def _table_fingerprints(self, conn, tables: List[str]) -> Dict[str, str]:
+        definitions = {name: [] for name in tables}
+        for table_name, sql in conn.execute(
+            "SELECT tbl_name, sql FROM sqlite_master WHERE sql IS NOT NULL ORDER BY type, name"
+        ).fetchall():
+            if table_name in definitions:
+                definitions[table_name].append(sql)
+        return {
+            name: hashlib.sha1("\n".join(sqls).encode("utf-8")).hexdigest()
+            for name, sqls in definitions.items()
+        }
+
+    def _describe_table(self, conn, table_name: str) -> Tuple[Dict, List[Dict]]:
+        cursor = conn.cursor()
+        columns = cursor.execute(f"PRAGMA table_info('{table_name}')").fetchall()
+        foreign_keys = cursor.execute(f"PRAGMA foreign_key_list('{table_name}')").fetchall()
         
-        for table in tables:
-            table_name = table[0]
-            columns = cursor.execute(f"PRAGMA table_info('{table_name}')").fetchall()
-            foreign_keys = cursor.execute(f"PRAGMA foreign_key_list('{table_name}')").fetchall()
-            
-            table_info = {
-                "name": table_name,
-                "columns": [
-                    {
-                        "name": col[1],
-                        "type": col[2],
-                        "notnull": bool(col[3]),
-                        "pk": bool(col[5])
-                    } for col in columns
-                ],
-                "foreign_keys": [
-                    {
-                        "from": fk[3],
-                        "to_table": fk[2],
-                        "to_column": fk[4]
-                    } for fk in foreign_keys
-                ] if self.config.get('include_relationships') else []
-            }
-            
-            schema_info["tables"].append(table_info)
-            
-            if self.config.get('include_indexes'):
-                indexes = cursor.execute(f"PRAGMA index_list('{table_name}')").fetchall()
-                for idx in indexes:
-                    schema_info["indexes"].append({
-                        "table": table_name,
-                        "name": idx[1],
-                        "unique": bool(idx[2])
-                    })
+        table_info = {
+            "name": table_name,
+            "columns": [
+                {
+                    "name": col[1],
+                    "type": col[2],
+                    "notnull": bool(col[3]),
+                    "pk": bool(col[5])
+                } for col in columns
+            ],
+            "foreign_keys": [
+                {
+                    "from": fk[3],
+                    "to_table": fk[2],
+                    "to_column": fk[4]
+                } for fk in foreign_keys
+            ] if self.config.get('include_relationships') else []
+        }
         
-        conn.close()
-        return schema_info
+        indexes = []
+        if self.config.get('include_indexes'):
+            for idx in cursor.execute(f"PRAGMA index_list('{table_name}')").fetchall():
+                indexes.append({
+                    "table": table_name,
+                    "name": idx[1],
+                    "unique": bool(idx[2])
+                })
+        return table_info, indexes
 
 class MongoDBSchemaGetter(SchemaGetter):
     def __init__(self, connection_string: str, database_name: str, config: Dict):
@@ -75,47 +229,78 @@ class MongoDBSchemaGetter(SchemaGetter):
         self.database_name = database_name
         self.config = config
 
+    def cache_key(self) -> str:
+        return f"mongodb:{self.connection_string}/{self.database_name}"
+
     def get_schema(self) -> Dict:
         client = pymongo.MongoClient(self.connection_string)
-        db = client[self.database_name]
-        
-        schema_info = {"collections": []}
-        
-        for collection_name in db.list_collection_names():
-            sample_doc = db[collection_name].find_one()
-            if sample_doc:
-                fields = self._analyze_document(sample_doc)
-                schema_info["collections"].append({
-                    "name": collection_name,
-                    "fields": fields
-                })
-                
-                if self.config.get('include_indexes'):
-                    indexes = list(db[collection_name].list_indexes())
-                    schema_info["collections"][-1]["indexes"] = indexes
-        
-        client.close()
-        return schema_info
-    
-    def _analyze_document(self, doc: Dict, prefix: str = "") -> List[Dict]:
+        try:
+            db = client[self.database_name]
+            collection_names = sorted(db.list_collection_names())
+            workers = max(1, min(self.config.get('parallel_workers', 4), len(collection_names) or 1))
+            # MongoClient is thread-safe; each collection is sampled concurrently
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                collections = list(pool.map(lambda name: self._describe_collection(db, name), collection_names))
+        finally:
+            client.close()
+
+        return {"collections": [collection for collection in collections if collection]}
+
+    def _describe_collection(self, db, collection_name: str) -> Optional[Dict]:
+        sample_size = self.config.get('mongodb_sample_size', 100)
+        documents = list(db[collection_name].aggregate([{"$sample": {"size": sample_size}}]))
+        if not documents:
+            return None
+
+        collection_info = {
+            "name": collection_name,
+            "sampled_documents": len(documents),
+            "fields": self._merge_fields(documents)
+        }
+        if self.config.get('include_indexes'):
+            collection_info["indexes"] = [dict(index) for index in db[collection_name].list_indexes()]
+        return collection_info
+
+    def _merge_fields(self, documents: List[Dict]) -> List[Dict]:
+        """Merge field paths across sampled documents with type frequencies and optionality"""
+        presence = Counter()
+        types: Dict[str, Counter] = {}
+        for doc in documents:
+            seen = set()
+            self._collect_fields(doc, "", types, seen)
+            presence.update(seen)
+
         fields = []
-        for key, value in doc.items():
-            if key == "_id":
-                continue
-                
-            field_name = f"{prefix}{key}"
-            field_type = type(value).__name__
-            
-            if isinstance(value, dict):
-                fields.extend(self._analyze_document(value, f"{field_name}."))
-            else:
-                fields.append({
-                    "name": field_name,
-                    "type": field_type
-                })
+        for path in sorted(types):
+            type_counts = types[path]
+            total = sum(type_counts.values())
+            # Nulls say nothing about the field's type unless they are all we saw
+            typed = [name for name, _ in type_counts.most_common() if name != "NoneType"]
+            fields.append({
+                "name": path,
+                "type": typed[0] if typed else "NoneType",
+                "types": {name: round(count / total, 3) for name, count in type_counts.most_common()},
+                "frequency": round(presence[path] / len(documents), 3),
+                "optional": presence[path] < len(documents)
+            })
         return fields
 
-class MySQLSchemaGetter(SchemaGetter):
+    def _collect_fields(self, value: Any, path: str, types: Dict[str, Counter], seen: set):
+        if isinstance(value, dict):
+            for key, child in value.items():
+                if key == "_id":
+                    continue
+                self._collect_fields(child, f"{path}.{key}" if path else key, types, seen)
+            return
+
+        types.setdefault(path, Counter())[type(value).__name__] += 1
+        seen.add(path)
+        if isinstance(value, list):
+            # Array elements (including subdocuments) are described under "path[]"
+            for element in value:
+                self._collect_fields(element, f"{path}[]", types, seen)
+
+class MySQLSchemaGetter(SQLSchemaGetter):
     def __init__(self, host: str, port: int, user: str, password: str, database: str, config: Dict):
         self.connection_params = {
             'host': host,
@@ -126,87 +311,131 @@ class MySQLSchemaGetter(SchemaGetter):
         }
         self.config = config
 
-    def get_schema(self) -> Dict:
-        conn = mysql.connector.connect(**self.connection_params)
+    def cache_key(self) -> str:
+        params = self.connection_params
+        return f"mysql:{params['user']}@{params['host']}:{params['port']}/{params['database']}"
+
+    def _connect(self):
+        return mysql.connector.connect(**self.connection_params)
+
+    def _list_tables(self, conn) -> List[str]:
         cursor = conn.cursor(dictionary=True)
-        
-        schema_info = {"tables": [], "indexes": []}
-        
-        # Get tables
         cursor.execute("""
             SELECT table_name 
             FROM information_schema.tables 
             WHERE table_schema = DATABASE()
             LIMIT %s
         """, [self.config.get('max_tables', 100)])
+        tables = [table['table_name'] for table in cursor.fetchall()]
+        cursor.close()
+        return tables
+
+    def _table_fingerprints(self, conn, tables: List[str]) -> Dict[str, str]:
+        cursor = conn.cursor()
+        # GROUP_CONCAT silently truncates at group_concat_max_len (1024 bytes by default)
+        cursor.execute("SET SESSION group_concat_max_len = 4294967295")
+        # Per table: columns, indexes (statistics) and key/foreign-key columns (key_column_usage)
+        cursor.execute("""
+            SELECT t.table_name, MD5(CONCAT(
+                COALESCE((
+                    SELECT GROUP_CONCAT(CONCAT_WS(':', c.column_name, c.column_type, c.is_nullable, c.column_key,
+                                                  COALESCE(c.column_default, ''), c.extra)
+                                        ORDER BY c.ordinal_position SEPARATOR ',')
+                    FROM information_schema.columns c
+                    WHERE c.table_schema = t.table_schema AND c.table_name = t.table_name
+                ), ''), '|',
+                COALESCE((
+                    SELECT GROUP_CONCAT(CONCAT_WS(':', s.index_name, s.seq_in_index, s.column_name, s.non_unique,
+                                                  s.index_type)
+                                        ORDER BY s.index_name, s.seq_in_index SEPARATOR ',')
+                    FROM information_schema.statistics s
+                    WHERE s.table_schema = t.table_schema AND s.table_name = t.table_name
+                ), ''), '|',
+                COALESCE((
+                    SELECT GROUP_CONCAT(CONCAT_WS(':', k.constraint_name, k.ordinal_position, k.column_name,
+                                                  COALESCE(k.referenced_table_schema, ''),
+                                                  COALESCE(k.referenced_table_name, ''),
+                                                  COALESCE(k.referenced_column_name, ''))
+                                        ORDER BY k.constraint_name, k.ordinal_position SEPARATOR ',')
+                    FROM information_schema.key_column_usage k
+                    WHERE k.table_schema = t.table_schema AND k.table_name = t.table_name
+                ), ''), '|',
+                COALESCE(t.create_time, '')
+            ))
+            FROM information_schema.tables t
+            WHERE t.table_schema = DATABASE()
+        """)
+        fingerprints = {row[0]: row[1] for row in cursor.fetchall()}
+        cursor.close()
+        return {name: fingerprints.get(name, '') for name in tables}
+
+    def _describe_table(self, conn, table_name: str) -> Tuple[Dict, List[Dict]]:
+        cursor = conn.cursor(dictionary=True)
         
-        tables = cursor.fetchall()
+        # Get columns
+        cursor.execute("""
+            SELECT column_name, data_type, is_nullable, column_key
+            FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s
+        """, [table_name])
+        columns = cursor.fetchall()
         
-        for table in tables:
-            table_name = table['table_name']
-            
-            # Get columns
+        # Get foreign keys if enabled
+        foreign_keys = []
+        if self.config.get('include_relationships'):
             cursor.execute("""
-                SELECT column_name, data_type, is_nullable, column_key
-                FROM information_schema.columns
-                WHERE table_schema = DATABASE() AND table_name = %s
+                SELECT 
+                    column_name,
+                    referenced_table_name,
+                    referenced_column_name
+                FROM information_schema.key_column_usage
+                WHERE table_schema = DATABASE()
+                    AND table_name = %s
+                    AND referenced_table_name IS NOT NULL
             """, [table_name])
-            columns = cursor.fetchall()
-            
-            # Get foreign keys if enabled
-            foreign_keys = []
-            if self.config.get('include_relationships'):
-                cursor.execute("""
-                    SELECT 
-                        column_name,
-                        referenced_table_name,
-                        referenced_column_name
-                    FROM information_schema.key_column_usage
-                    WHERE table_schema = DATABASE()
-                        AND table_name = %s
-                        AND referenced_table_name IS NOT NULL
-                """, [table_name])
-                foreign_keys = cursor.fetchall()
-            
-            table_info = {
-                "name": table_name,
-                "columns": [
-                    {
-                        "name": col['column_name'],
-                        "type": col['data_type'],
-                        "notnull": col['is_nullable'] == 'NO',
-                        "pk": col['column_key'] == 'PRI'
-                    } for col in columns
-                ],
-                "foreign_keys": [
-                    {
-                        "from": fk['column_name'],
-                        "to_table": fk['referenced_table_name'],
-                        "to_column": fk['referenced_column_name']
-                    } for fk in foreign_keys
-                ]
-            }
-            
-            schema_info["tables"].append(table_info)
-            
-            # Get indexes if enabled
-            if self.config.get('include_indexes'):
-                cursor.execute("""
-                    SHOW INDEX FROM {}
-                """.format(table_name))
-                indexes = cursor.fetchall()
-                for idx in indexes:
-                    schema_info["indexes"].append({
-                        "table": table_name,
-                        "name": idx['Key_name'],
-                        "unique": not idx['Non_unique']
-                    })
+            foreign_keys = cursor.fetchall()
+        
+        table_info = {
+            "name": table_name,
+            "columns": [
+                {
+                    "name": col['column_name'],
+                    "type": col['data_type'],
+                    "notnull": col['is_nullable'] == 'NO',
+                    "pk": col['column_key'] == 'PRI'
+                } for col in columns
+            ],
+            "foreign_keys": [
+                {
+                    "from": fk['column_name'],
+                    "to_table": fk['referenced_table_name'],
+                    "to_column": fk['referenced_column_name']
+                } for fk in foreign_keys
+            ]
+        }
+        
+        # Get indexes if enabled
+        indexes = []
+        if self.config.get('include_indexes'):
+            cursor.execute("""
+                SHOW INDEX FROM {}
+            """.format(table_name))
+            for idx in cursor.fetchall():
+                indexes.append({
+                    "table": table_name,
+                    "name": idx['Key_name'],
+                    "unique": not idx['Non_unique']
+                })
         
         cursor.close()
-        conn.close()
-        return schema_info
+        return table_info, indexes
+
+class PostgreSQLSchemaGetter(SQLSchemaGetter):
+    """Tables of every non-system schema; those outside the current schema are named "schema.table"."""
+
+    QUALIFIED_NAME = "CASE WHEN {schema} = current_schema() THEN {table} ELSE {schema} || '.' || {table} END"
+    SYSTEM_SCHEMA_FILTER = "{schema} NOT IN ('pg_catalog', 'information_schema') AND left({schema}, 3) <> 'pg_'"
 
-class PostgreSQLSchemaGetter(SchemaGetter):
     def __init__(self, host: str, port: int, user: str, password: str, database: str, config: Dict):
         self.connection_params = {
             'host': host,
@@ -217,106 +446,168 @@ class PostgreSQLSchemaGetter(SchemaGetter):
         }
         self.config = config
 
-    def get_schema(self) -> Dict:
-        conn: pg_connection = psycopg2.connect(**self.connection_params)
+    def cache_key(self) -> str:
+        params = self.connection_params
+        return f"postgresql:{params['user']}@{params['host']}:{params['port']}/{params['database']}"
+
+    def _connect(self) -> pg_connection:
+        return psycopg2.connect(**self.connection_params)
+
+    @staticmethod
+    def _split_name(table_name: str) -> Tuple[Optional[str], str]:
+        """(schema, table) of a name from _list_tables; schema None for the current schema"""
+        schema, _, table = table_name.rpartition('.')
+        return schema or None, table
+
+    def _list_tables(self, conn) -> List[str]:
         cursor = conn.cursor()
-        
-        schema_info = {"tables": [], "indexes": []}
-        
-        # Get tables
         cursor.execute("""
-            SELECT tablename 
+            SELECT {name}
             FROM pg_catalog.pg_tables 
-            WHERE schemaname = 'public'
+            WHERE {system_filter}
+            ORDER BY schemaname <> current_schema(), schemaname, tablename
             LIMIT %s
-        """, [self.config.get('max_tables', 100)])
+        """.format(
+            name=self.QUALIFIED_NAME.format(schema="schemaname", table="tablename"),
+            system_filter=self.SYSTEM_SCHEMA_FILTER.format(schema="schemaname")
+        ), [self.config.get('max_tables', 100)])
+        tables = [table[0] for table in cursor.fetchall()]
+        cursor.close()
+        return tables
+
+    def _table_fingerprints(self, conn, tables: List[str]) -> Dict[str, str]:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT {name}, md5(
+                COALESCE((
+                    SELECT string_agg(a.attname || ':' || format_type(a.atttypid, a.atttypmod) || ':' || a.attnotnull,
+                                      ',' ORDER BY a.attnum)
+                    FROM pg_attribute a
+                    WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+                ), '') || '|' ||
+                COALESCE((
+                    SELECT string_agg(pg_get_constraintdef(con.oid), ',' ORDER BY con.conname)
+                    FROM pg_constraint con WHERE con.conrelid = c.oid
+                ), '') || '|' ||
+                COALESCE((
+                    SELECT string_agg(indexdef, ',' ORDER BY indexname)
+                    FROM pg_indexes i WHERE i.schemaname = n.nspname AND i.tablename = c.relname
+                ), '')
+            )
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE {system_filter} AND c.relkind IN ('r', 'p')
+        """.format(
+            name=self.QUALIFIED_NAME.format(schema="n.nspname", table="c.relname"),
+            system_filter=self.SYSTEM_SCHEMA_FILTER.format(schema="n.nspname")
+        ))
+        fingerprints = {row[0]: row[1] for row in cursor.fetchall()}
+        cursor.close()
+        return {name: fingerprints.get(name, '') for name in tables}
+
+    def _describe_table(self, conn, table_name: str) -> Tuple[Dict, List[Dict]]:
+        cursor = conn.cursor()
+        schema, table = self._split_name(table_name)
+        cursor.execute("SELECT COALESCE(%s, current_schema())", [schema])
+        schema = cursor.fetchone()[0]
         
-        tables = cursor.fetchall()
+        # Get columns
+        cursor.execute("""
+            SELECT 
+                column_name,
+                data_type,
+                is_nullable,
+                CASE 
+                    WHEN pk.colname IS NOT NULL THEN true 
+                    ELSE false 
+                END as is_pk
+            FROM information_schema.columns c
+            LEFT JOIN (
+                SELECT a.attname as colname
+                FROM pg_index i
+                JOIN pg_attribute a ON a.attrelid = i.indrelid
+                AND a.attnum = ANY(i.indkey)
+                WHERE i.indrelid = (quote_ident(%s) || '.' || quote_ident(%s))::regclass
+                AND i.indisprimary
+            ) pk ON pk.colname = c.column_name
+            WHERE table_schema = %s AND table_name = %s
+            ORDER BY ordinal_position
+        """, [schema, table, schema, table])
+        columns = cursor.fetchall()
         
-        for table in tables:
-            table_name = table[0]
-            
-            # Get columns
+        # Get foreign keys if enabled
+        foreign_keys = []
+        if self.config.get('include_relationships'):
             cursor.execute("""
-                SELECT 
-                    column_name,
-                    data_type,
-                    is_nullable,
-                    CASE 
-                        WHEN pk.colname IS NOT NULL THEN true 
-                        ELSE false 
-                    END as is_pk
-                FROM information_schema.columns c
-                LEFT JOIN (
-                    SELECT a.attname as colname
-                    FROM pg_index i
-                    JOIN pg_attribute a ON a.attrelid = i.indrelid
-                    AND a.attnum = ANY(i.indkey)
-                    WHERE i.indrelid = %s::regclass
-                    AND i.indisprimary
-                ) pk ON pk.colname = c.column_name
-                WHERE table_name = %s
-            """, [table_name, table_name])
-            columns = cursor.fetchall()
-            
-            # Get foreign keys if enabled
-            foreign_keys = []
-            if self.config.get('include_relationships'):
-                cursor.execute("""
-                    SELECT
-                        kcu.column_name,
-                        ccu.table_name AS foreign_table_name,
-                        ccu.column_name AS foreign_column_name
-                    FROM information_schema.table_constraints AS tc
-                    JOIN information_schema.key_column_usage AS kcu
-                        ON tc.constraint_name = kcu.constraint_name
-                    JOIN information_schema.constraint_column_usage AS ccu
-                        ON ccu.constraint_name = tc.constraint_name
-                    WHERE tc.constraint_type = 'FOREIGN KEY'
-                        AND tc.table_name = %s
-                """, [table_name])
-                foreign_keys = cursor.fetchall()
-            
-            table_info = {
-                "name": table_name,
-                "columns": [
-                    {
-                        "name": col[0],
-                        "type": col[1],
-                        "notnull": col[2] == 'NO',
-                        "pk": col[3]
-                    } for col in columns
-                ],
-                "foreign_keys": [
-                    {
-                        "from": fk[0],
-                        "to_table": fk[1],
-                        "to_column": fk[2]
-                    } for fk in foreign_keys
-                ]
-            }
-            
-            schema_info["tables"].append(table_info)
-            
-            # Get indexes if enabled
-            if self.config.get('include_indexes'):
-                cursor.execute("""
-                    SELECT
-                        i.relname as index_name,
-                        ix.indisunique as is_unique
-                    FROM pg_class t
-                    JOIN pg_index ix ON t.oid = ix.indrelid
-                    JOIN pg_class i ON i.oid = ix.indexrelid
-                    WHERE t.relname = %s
-                """, [table_name])
-                indexes = cursor.fetchall()
-                for idx in indexes:
-                    schema_info["indexes"].append({
-                        "table": table_name,
-                        "name": idx[0],
-                        "unique": idx[1]
-                    })
+                SELECT
+                    kcu.column_name,
+                    {foreign_table} AS foreign_table_name,
+                    ccu.column_name AS foreign_column_name
+                FROM information_schema.table_constraints AS tc
+                JOIN information_schema.key_column_usage AS kcu
+                    ON tc.constraint_schema = kcu.constraint_schema AND tc.constraint_name = kcu.constraint_name
+                JOIN information_schema.constraint_column_usage AS ccu
+                    ON ccu.constraint_schema = tc.constraint_schema AND ccu.constraint_name = tc.constraint_name
+                WHERE tc.constraint_type = 'FOREIGN KEY'
+                    AND tc.table_schema = %s
+                    AND tc.table_name = %s
+            """.format(foreign_table=self.QUALIFIED_NAME.format(schema="ccu.table_schema", table="ccu.table_name")),
+                [schema, table])
+            foreign_keys = cursor.fetchall()
+        
+        table_info = {
+            "name": table_name,
+            "columns": [
+                {
+                    "name": col[0],
+                    "type": col[1],
+                    "notnull": col[2] == 'NO',
+                    "pk": col[3]
+                } for col in columns
+            ],
+            "foreign_keys": [
+                {
+                    "from": fk[0],
+                    "to_table": fk[1],
+                    "to_column": fk[2]
+                } for fk in foreign_keys
+            ]
+        }
+        
+        # Get indexes if enabled
+        indexes = []
+        if self.config.get('include_indexes'):
+            cursor.execute("""
+                SELECT
+                    i.relname as index_name,
+                    ix.indisunique as is_unique
+                FROM pg_class t
+                JOIN pg_index ix ON t.oid = ix.indrelid
+                JOIN pg_class i ON i.oid = ix.indexrelid
+                WHERE t.oid = (quote_ident(%s) || '.' || quote_ident(%s))::regclass
+            """, [schema, table])
+            for idx in cursor.fetchall():
+                indexes.append({
+                    "table": table_name,
+                    "name": idx[0],
+                    "unique": idx[1]
+                })
         
         cursor.close()
-        conn.close()
-        return schema_info
+        return table_info, indexes
+
+class MultiDatabaseSchemaGetter(SchemaGetter):
+    """Introspect several databases concurrently into one schema document"""
+
+    def __init__(self, getters: Dict[str, SchemaGetter], config: Dict):
+        self.getters = getters
+        self.config = config
+
+    def cache_key(self) -> str:
+        return "multi:" + ",".join(f"{name}={self.getters[name].cache_key()}" for name in sorted(self.getters))
+
+    def get_schema(self) -> Dict:
+        names = sorted(self.getters)
+        with ThreadPoolExecutor(max_workers=max(1, len(names))) as pool:
+            schemas = list(pool.map(lambda name: self.getters[name].get_cached_schema(), names))
+        return {"databases": dict(zip(names, schemas))}
@@ -0,0 +1,78 @@
+import re
+from typing import Dict, List, Set
+
+WORD_PATTERN = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+
+
+def _words(text: str) -> Set[str]:
+    '''Lower-cased words of a question or identifier; splits camelCase and snake_case, drops plural "s".'''
+    words = set()
+    for word in WORD_PATTERN.findall(text):
+        word = word.lower()
+        words.add(word)
+        if len(word) > 3 and word.endswith('s'):
+            words.add(word[:-1])
+    return words
+
+
+def _score(question_words: Set[str], name: str, fields: List[str]) -> float:
+    # A table name match outweighs any number of column matches
+    score = 3.0 * len(question_words & _words(name))
+    for field in fields:
+        score += len(question_words & _words(field)) * 0.5
+    return score
+
+
+def _neighbours(table: Dict) -> Set[str]:
+    return {fk["to_table"] for fk in table.get("foreign_keys", [])}
+
+
+def prune_schema(schema_info: Dict, question: str, max_tables: int = 8) -> Dict:
+    '''
+    Keep the tables (or collections) most relevant to a question.
+    Tables are ranked by word overlap between the question and table/column
+    names; tables referenced by a selected table's foreign keys are added so
+    joins stay possible. Falls back to the full schema when nothing matches.
+    Args:
+        schema_info (Dict): Output of SchemaGetter.get_schema(), possibly multi-database
+        question (str): The user question
+        max_tables (int): Maximum number of ranked tables kept, before join neighbours
+    Returns:
+        Dict: A schema document of the same shape
+    '''
+    if "databases" in schema_info:
+        return {"databases": {
+            name: prune_schema(database_schema, question, max_tables)
+            for name, database_schema in schema_info["databases"].items()
+        }}
+
+    question_words = _words(question)
+    if "collections" in schema_info:
+        collections = schema_info["collections"]
+        scored = [
+            (_score(question_words, collection["name"], [field["name"] for field in collection["fields"]]), collection)
+            for collection in collections
+        ]
+        selected = [collection for score, collection in sorted(scored, key=lambda item: -item[0]) if score > 0][:max_tables]
+        return dict(schema_info, collections=selected) if selected else schema_info
+
+    tables = schema_info.get("tables", [])
+    if len(tables) <= max_tables:
+        return schema_info
+    scored = [
+        (_score(question_words, table["name"], [column["name"] for column in table["columns"]]), table)
+        for table in tables
+    ]
+    ranked = [table["name"] for score, table in sorted(scored, key=lambda item: -item[0]) if score > 0][:max_tables]
+    if not ranked:
+        return schema_info
+
+    by_name = {table["name"]: table for table in tables}
+    keep = set(ranked)
+    for name in ranked:
+        keep |= _neighbours(by_name[name]) & by_name.keys()
+    return dict(
+        schema_info,
+        tables=[table for table in tables if table["name"] in keep],
+        indexes=[index for index in schema_info.get("indexes", []) if index["table"] in keep]
+    )
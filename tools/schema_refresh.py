@@ -0,0 +1,105 @@
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from tools.schema_getters import SQLSchemaGetter
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Callbacks receiving every non-empty schema diff:
+# {"cache_key", "added", "dropped", "altered"}
+_subscribers: List[Callable[[Dict], None]] = []
+_refreshers: Dict[str, "IncrementalSchemaRefresher"] = {}
+_registry_lock = threading.Lock()
+
+
+def subscribe_schema_changes(callback: Callable[[Dict], None]):
+    '''Register a callback for schema diff events (prompt caches, stats, answer caches).'''
+    with _registry_lock:
+        if callback not in _subscribers:
+            _subscribers.append(callback)
+
+
+def publish_schema_diff(diff: Dict):
+    with _registry_lock:
+        subscribers = list(_subscribers)
+    for callback in subscribers:
+        try:
+            callback(diff)
+        except Exception as e:
+            logger.warning("schema diff subscriber failed: %s", e)
+
+
+class IncrementalSchemaRefresher:
+    '''
+    Keeps the last introspected schema of one database and, on refresh,
+    re-describes only tables whose catalog fingerprint changed.
+    '''
+
+    def __init__(self, getter: SQLSchemaGetter):
+        self.getter = getter
+        self.cache_key = getter.cache_key()
+        self.version: Optional[str] = None
+        self.fingerprints: Dict[str, str] = {}
+        self.tables: Dict[str, Tuple[Dict, List[Dict]]] = {}
+        self.order: List[str] = []
+        self.schema: Optional[Dict] = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> Dict:
+        '''
+        Bring the schema up to date.
+        Returns:
+            Dict: {"cache_key", "added", "dropped", "altered"} table name lists
+        '''
+        with self._lock:
+            conn = self.getter._connect()
+            try:
+                version = self.getter._schema_version(conn)
+                if self.schema is not None and version is not None and version == self.version:
+                    return self._diff([], [], [])
+
+                tables = self.getter._list_tables(conn)
+                fingerprints = self.getter._table_fingerprints(conn, tables)
+                added = [name for name in tables if name not in self.fingerprints]
+                dropped = [name for name in self.order if name not in fingerprints]
+                altered = [
+                    name for name in tables
+                    if name in self.fingerprints and fingerprints.get(name) != self.fingerprints[name]
+                ]
+                self.tables.update(self.getter._describe_tables(conn, added + altered))
+            finally:
+                conn.close()
+
+            for name in dropped:
+                self.tables.pop(name, None)
+            self.version = version
+            self.fingerprints = fingerprints
+            self.order = tables
+
+            schema_info = {"tables": [], "indexes": []}
+            for name in self.order:
+                table_info, indexes = self.tables[name]
+                schema_info["tables"].append(table_info)
+                schema_info["indexes"].extend(indexes)
+            first_load = self.schema is None
+            self.schema = schema_info
+
+        diff = self._diff(added, dropped, altered)
+        if not first_load and (added or dropped or altered):
+            publish_schema_diff(diff)
+        return diff
+
+    def _diff(self, added: List[str], dropped: List[str], altered: List[str]) -> Dict:
+        return {"cache_key": self.cache_key, "added": added, "dropped": dropped, "altered": altered}
+
+
+def get_refresher(getter: SQLSchemaGetter) -> IncrementalSchemaRefresher:
+    '''One refresher per database; getters are cheap and rebuilt per tool call.'''
+    key = getter.cache_key()
+    with _registry_lock:
+        refresher = _refreshers.get(key)
+        # A config change (max_tables, include_indexes, ...) invalidates every table
+        if refresher is None or refresher.getter.config != getter.config:
+            refresher = _refreshers[key] = IncrementalSchemaRefresher(getter)
+        return refresher
@@ -0,0 +1,188 @@
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+# Add the project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+try:
+    import tiktoken
+except ImportError:  # token counts fall back to a chars/4 estimate
+    tiktoken = None
+
+RENDER_FORMATS = ('json', 'ddl', 'compact')
+
+
+def _foreign_key_map(table: Dict) -> Dict[str, str]:
+    return {fk["from"]: f"{fk['to_table']}.{fk['to_column']}" for fk in table.get("foreign_keys", [])}
+
+
+def _table_indexes(schema_info: Dict) -> Dict[str, List[Dict]]:
+    indexes: Dict[str, List[Dict]] = {}
+    for index in schema_info.get("indexes", []):
+        indexes.setdefault(index["table"], []).append(index)
+    return indexes
+
+
+def _render_ddl(schema_info: Dict) -> List[str]:
+    indexes = _table_indexes(schema_info)
+    lines = []
+    for table in schema_info.get("tables", []):
+        foreign_keys = _foreign_key_map(table)
+        body = []
+        for i, column in enumerate(table["columns"]):
+            definition = f"  {column['name']} {column['type']}".rstrip()
+            if column.get("pk"):
+                definition += " PRIMARY KEY"
+            if column.get("notnull"):
+                definition += " NOT NULL"
+            if column["name"] in foreign_keys:
+                to_table, to_column = foreign_keys[column["name"]].split(".", 1)
+                definition += f" REFERENCES {to_table}({to_column})"
+            if i < len(table["columns"]) - 1:
+                definition += ","
+            if column.get("stats"):
+                definition += f" -- {column['stats']}"
+            body.append(definition)
+        rows = f" -- ~{table['row_estimate']} rows" if "row_estimate" in table else ""
+        lines.append(f"CREATE TABLE {table['name']} ({rows}")
+        lines.extend(body)
+        lines.append(");")
+        for index in indexes.get(table["name"], []):
+            lines.append(f"-- {'UNIQUE ' if index.get('unique') else ''}INDEX {index['name']}")
+    return lines
+
+
+def _render_compact(schema_info: Dict) -> List[str]:
+    '''
+    One line per table: Album(AlbumId INTEGER PK, Title NVARCHAR(160)!, ArtistId INTEGER! ->Artist.ArtistId)
+    "!" marks NOT NULL, "->" a foreign key, [..] column stats.
+    '''
+    indexes = _table_indexes(schema_info)
+    lines = []
+    for table in schema_info.get("tables", []):
+        foreign_keys = _foreign_key_map(table)
+        columns = []
+        for column in table["columns"]:
+            text = f"{column['name']} {column['type']}".rstrip()
+            if column.get("pk"):
+                text += " PK"
+            elif column.get("notnull"):
+                text += "!"
+            if column["name"] in foreign_keys:
+                text += f" ->{foreign_keys[column['name']]}"
+            if column.get("stats"):
+                text += f" [{column['stats']}]"
+            columns.append(text)
+        line = f"{table['name']}({', '.join(columns)})"
+        if "row_estimate" in table:
+            line += f" ~{table['row_estimate']} rows"
+        named_indexes = [index["name"] for index in indexes.get(table["name"], []) if not index["name"].startswith("sqlite_autoindex")]
+        if named_indexes:
+            line += f" idx:{','.join(named_indexes)}"
+        lines.append(line)
+    return lines
+
+
+def _render_collections(schema_info: Dict) -> List[str]:
+    '''MongoDB: orders{customer str, total int?, items list, items[].sku str?}; "?" marks optional fields.'''
+    lines = []
+    for collection in schema_info.get("collections", []):
+        fields = [
+            f"{field['name']} {field['type']}{'?' if field.get('optional') else ''}"
+            for field in collection["fields"]
+        ]
+        lines.append(f"{collection['name']}{{{', '.join(fields)}}}")
+    return lines
+
+
+def canonical_schema(schema_info: Dict) -> Dict:
+    '''
+    Order tables, collections, indexes and databases by name so the same schema
+    always renders to the same bytes, whatever order the catalog returned.
+    Column order is kept: it is part of the table definition.
+    '''
+    if "databases" in schema_info:
+        return {"databases": {name: canonical_schema(schema_info["databases"][name])
+                              for name in sorted(schema_info["databases"])}}
+    canonical = dict(schema_info)
+    if "tables" in schema_info:
+        canonical["tables"] = [
+            dict(table, foreign_keys=sorted(table.get("foreign_keys", []), key=lambda fk: (fk["from"], fk["to_table"])))
+            for table in sorted(schema_info["tables"], key=lambda table: table["name"])
+        ]
+    if "indexes" in schema_info:
+        canonical["indexes"] = sorted(schema_info["indexes"], key=lambda index: (index["table"], index["name"]))
+    if "collections" in schema_info:
+        canonical["collections"] = sorted(schema_info["collections"], key=lambda collection: collection["name"])
+    return canonical
+
+
+def render_schema(schema_info: Dict, render_format: str = 'json') -> str:
+    '''
+    Render a get_schema document for the LLM.
+    Args:
+        schema_info (Dict): Output of SchemaGetter.get_schema(), possibly multi-database
+        render_format (str): 'json' (verbose), 'ddl' (CREATE TABLE statements)
+            or 'compact' (one line per table)
+    Returns:
+        str: The rendered schema
+    '''
+    if render_format not in RENDER_FORMATS:
+        raise ValueError(f"Unsupported schema render format: {render_format}")
+    schema_info = canonical_schema(schema_info)
+    if render_format == 'json':
+        return json.dumps(schema_info, default=str, sort_keys=True)
+
+    if "databases" in schema_info:
+        sections = []
+        for name, database_schema in schema_info["databases"].items():
+            sections.append(f"# database: {name}\n{render_schema(database_schema, render_format)}")
+        return "\n".join(sections)
+
+    if "collections" in schema_info:
+        return "\n".join(_render_collections(schema_info))
+
+    renderer = _render_ddl if render_format == 'ddl' else _render_compact
+    return "\n".join(renderer(schema_info))
+
+
+def _encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: str = 'gpt-4o-mini') -> int:
+    '''Count prompt tokens with tiktoken, or estimate ~4 characters per token without it.'''
+    if tiktoken is not None:
+        try:
+            return len(_encoding(model).encode(text))
+        except Exception:
+            pass  # Encoding files are downloaded on first use; offline hosts estimate
+    return (len(text) + 3) // 4
+
+
+def compare_formats(schema_info: Dict, model: str = 'gpt-4o-mini') -> Dict[str, int]:
+    '''Token count of schema_info in every render format.'''
+    return {render_format: count_tokens(render_schema(schema_info, render_format), model) for render_format in RENDER_FORMATS}
+
+
+def main():
+    """Compare schema token counts for the configured database"""
+    from config import config
+    from tools.get_schema import build_schema_getter
+
+    schema_info = build_schema_getter(config.database_config, config.tool_get_schema).get_schema()
+    counts = compare_formats(schema_info, config.llm_config.get('model', 'gpt-4o-mini'))
+    baseline = counts['json']
+    for render_format, tokens in counts.items():
+        print(f"{render_format:>8}: {tokens:6d} tokens ({tokens / max(baseline, 1):.0%} of json)")
+    print("\n" + render_schema(schema_info, 'compact'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+import re
+import sys
+import time
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError
+
+# Add the project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+# database.type -> sqlglot dialect. MongoDB queries are not SQL and pass through.
+SQL_DIALECTS = {
+    'sqlite': 'sqlite',
+    'mysql': 'mysql',
+    'postgresql': 'postgres',
+    'mongodb': None
+}
+
+WRITE_EXPRESSIONS = tuple(
+    getattr(exp, name) for name in (
+        'Insert', 'Update', 'Delete', 'Merge', 'Create', 'Drop', 'Alter',
+        'AlterTable', 'TruncateTable', 'Command', 'Set', 'Transaction', 'Commit', 'Rollback'
+    ) if hasattr(exp, name)
+)
+
+# Functions that can return several rows per input row, or whose row behaviour is unknown
+# (user-defined and dialect functions sqlglot doesn't model, e.g. jsonb_array_elements)
+ROW_CHANGING_FUNCTIONS = tuple(
+    getattr(exp, name) for name in (
+        'Explode', 'ExplodeOuter', 'Posexplode', 'PosexplodeOuter', 'Inline', 'Unnest',
+        'GenerateSeries', 'ExplodingGenerateSeries', 'Anonymous', 'AnonymousAggFunc'
+    ) if hasattr(exp, name)
+)
+
+# SQLite pragmas that only report; every other pragma can change settings or data
+READ_PRAGMAS = {
+    'table_info', 'table_xinfo', 'table_list', 'index_list', 'index_info', 'index_xinfo',
+    'foreign_key_list', 'foreign_key_check', 'integrity_check', 'quick_check', 'database_list',
+    'collation_list', 'function_list', 'module_list', 'pragma_list', 'compile_options'
+}
+
+# Leading EXPLAIN options: SQLite QUERY PLAN, Postgres (option, ...) / ANALYZE / VERBOSE, MySQL FORMAT=...
+EXPLAIN_OPTION = re.compile(r'\s*(\([^)]*\)|(?:QUERY\s+PLAN|ANALY[SZ]E|VERBOSE|FORMAT\s*=\s*\w+)\b)\s*', re.IGNORECASE)
+
+READ_COMMANDS = {'SHOW', 'DESCRIBE', 'DESC'}
+
+
+class SQLRewriteError(Exception):
+    """Raised when a query is rejected before execution"""
+    pass
+
+
+class MultipleStatementsError(SQLRewriteError):
+    """Raised when a payload contains more than one statement"""
+    pass
+
+
+def _literal_limit(query: exp.Expression) -> Optional[int]:
+    '''Row cap of a literal LIMIT n or FETCH FIRST [n] ROWS ONLY; None otherwise (parameters, WITH TIES, PERCENT).'''
+    limit = query.args.get('limit')
+    if isinstance(limit, exp.Limit):
+        count = limit.expression
+    elif isinstance(limit, exp.Fetch):
+        options = limit.args.get('limit_options')
+        if options is not None and (options.args.get('with_ties') or options.args.get('percent')):
+            return None
+        count = limit.args.get('count')
+        if count is None:
+            return 1
+    else:
+        return None
+    if isinstance(count, exp.Literal) and not count.is_string:
+        return int(count.this)
+    return None
+
+
+def _has_opaque_limit(query: exp.Expression) -> bool:
+    '''A LIMIT/FETCH whose row count can't be read off (e.g. LIMIT (SELECT ...), FETCH ... WITH TIES).'''
+    return query.args.get('limit') is not None and _literal_limit(query) is None
+
+
+def _apply_limit(query: exp.Expression, max_rows: int) -> bool:
+    '''Inject LIMIT max_rows or clamp a larger literal LIMIT / FETCH FIRST. Returns True if changed.'''
+    existing = query.args.get('limit')
+    if existing is not None:
+        current = _literal_limit(query)
+        if current is None or current <= max_rows:
+            # Already tighter, or a limit we can't reason about (see _has_opaque_limit)
+            return False
+        if isinstance(existing, exp.Fetch):
+            existing.set('count', exp.Literal.number(max_rows))
+            return True
+    query.limit(max_rows, copy=False)
+    return True
+
+
+def _is_passthrough_select(select: exp.Select) -> bool:
+    '''
+    True if the SELECT returns exactly one row per row of its single FROM
+    source: no WHERE, joins, grouping, aggregates, DISTINCT, window functions,
+    ORDER BY, or set-returning (or unknown) functions in the projection.
+    '''
+    if any(select.args.get(arg) for arg in ('where', 'group', 'having', 'joins', 'distinct', 'order', 'offset',
+                                              'qualify', 'laterals', 'sample', 'connect')):
+        return False
+    return not any(projection.find(exp.AggFunc, exp.Window, *ROW_CHANGING_FUNCTIONS)
+                   for projection in select.expressions)
+
+
+def _push_limit_into_subqueries(query: exp.Expression, max_rows: int) -> bool:
+    '''
+    Cap derived tables when the outer query cannot add or drop rows, e.g.
+    SELECT a, b FROM (SELECT ... ) s  ->  the subquery needs at most max_rows.
+    '''
+    if not isinstance(query, exp.Select) or not _is_passthrough_select(query):
+        return False
+    # sqlglot renamed the arg from 'from' to 'from_' in newer releases
+    from_clause = query.args.get('from_') or query.args.get('from')
+    source = from_clause.this if from_clause else None
+    if not isinstance(source, exp.Subquery) or not isinstance(source.this, exp.Query):
+        return False
+    inner = source.this
+    if _has_opaque_limit(inner):
+        return False
+    changed = _apply_limit(inner, max_rows)
+    return _push_limit_into_subqueries(inner, max_rows) or changed
+
+
+def _pragma_name(pragma: exp.Pragma) -> str:
+    # PRAGMA [schema.]name, name = value and name(argument) all parse as [EQ(] [Dot(] Var
+    target = pragma.this
+    if isinstance(target, exp.EQ):
+        target = target.this
+    if isinstance(target, exp.Dot):
+        target = target.expression
+    return target.name.lower() if target is not None else ''
+
+
+def _explain_is_write(text: str, dialect: Optional[str]) -> bool:
+    '''
+    EXPLAIN only plans the statement, unless it is EXPLAIN ANALYZE, which runs
+    it: then it is a write when the explained statement is one (or can't be parsed).
+    '''
+    analyze = False
+    match = EXPLAIN_OPTION.match(text)
+    while match and match.group(0):
+        analyze = analyze or 'ANALY' in match.group(1).upper()
+        text = text[match.end():]
+        match = EXPLAIN_OPTION.match(text)
+    if not analyze:
+        return False
+    try:
+        return _is_write(parse_statement(text, dialect=dialect), dialect)
+    except SQLRewriteError:
+        return True
+
+
+def _is_write(statement: exp.Expression, dialect: Optional[str] = None) -> bool:
+    if isinstance(statement, exp.Pragma):
+        return _pragma_name(statement) not in READ_PRAGMAS
+    if isinstance(statement, exp.Describe):
+        explained = statement.this
+        analyze = str(statement.args.get('style') or '').upper() == 'ANALYZE'
+        return analyze and not isinstance(explained, exp.Table) and _is_write(explained, dialect)
+    if isinstance(statement, exp.Show):
+        return False
+    if isinstance(statement, exp.Command):
+        command = str(statement.this).upper()
+        if command == 'EXPLAIN':
+            return _explain_is_write(statement.expression.name if statement.expression else '', dialect)
+        return command not in READ_COMMANDS
+    if isinstance(statement, WRITE_EXPRESSIONS) or not isinstance(statement, exp.Query):
+        return True
+    # Data-modifying CTEs (Postgres) and SELECT ... INTO create or change data too
+    return statement.find(*WRITE_EXPRESSIONS) is not None or statement.find(exp.Into) is not None
+
+
+def _reject_writes(statement: exp.Expression, dialect: Optional[str] = None):
+    if _is_write(statement, dialect):
+        raise SQLRewriteError(
+            f"Only read queries are allowed in read-only mode (got {statement.key.upper()})"
+        )
+
+
+def parse_statement(query: str, db_type: str = 'sqlite', dialect: Optional[str] = None) -> exp.Expression:
+    '''
+    Parse exactly one statement (dialect: a sqlglot dialect, instead of db_type).
+    Raises:
+        SQLRewriteError: On parse errors or multi-statement payloads
+    '''
+    try:
+        statements = [s for s in sqlglot.parse(query, read=dialect or SQL_DIALECTS.get(db_type)) if s is not None]
+    except ParseError as e:
+        raise SQLRewriteError(f"Could not parse query: {str(e)}")
+    if len(statements) > 1:
+        raise MultipleStatementsError(f"Expected exactly one SQL statement, got {len(statements)}")
+    if not statements:
+        raise SQLRewriteError("Query is empty")
+    return statements[0]
+
+
+def classify_statement(query: str, db_type: str = 'sqlite') -> str:
+    '''
+    Classify a single statement as 'read' or 'write'. EXPLAIN (except EXPLAIN
+    ANALYZE of a write), SHOW, DESCRIBE and introspection PRAGMAs are reads.
+    Raises:
+        SQLRewriteError: On parse errors or multi-statement payloads
+    '''
+    dialect = SQL_DIALECTS.get(db_type)
+    if dialect is None:
+        return 'read'
+    return 'write' if _is_write(parse_statement(query, db_type), dialect) else 'read'
+
+
+def rewrite_query(query: str, db_type: str = 'sqlite', max_rows: Optional[int] = None,
+                  read_only: bool = True) -> Dict:
+    '''
+    Rewrite a query before execution.
+    Args:
+        query (str): The SQL query produced by the agent
+        db_type (str): database.type value (sqlite, mysql, postgresql, mongodb)
+        max_rows (int): Row cap to inject/clamp on top-level SELECTs (None skips). A limit
+            that can't be clamped in place (LIMIT (SELECT ...), FETCH ... WITH TIES)
+            is capped by wrapping: SELECT * FROM (query) AS _capped LIMIT max_rows
+        read_only (bool): Reject anything that is not a read query
+    Returns:
+        Dict: Contains:
+            - sql: Query text to execute
+            - normalized: Canonical query text, usable as a cache key
+            - limit_applied: Whether a LIMIT was injected, clamped or pushed down
+    Raises:
+        SQLRewriteError: If the query is rejected. Multi-statement payloads
+            are always rejected; unparseable ones only in read-only mode.
+    '''
+    dialect = SQL_DIALECTS.get(db_type)
+    if dialect is None:
+        return {"sql": query, "normalized": " ".join(query.split()), "limit_applied": False}
+
+    try:
+        statement = parse_statement(query, db_type)
+    except MultipleStatementsError:
+        raise
+    except SQLRewriteError:
+        if read_only:
+            raise
+        return {"sql": query, "normalized": " ".join(query.split()), "limit_applied": False}
+
+    if read_only:
+        _reject_writes(statement, dialect)
+
+    normalized = statement.sql(dialect=dialect, normalize=True)
+
+    limit_applied = False
+    if max_rows is not None and isinstance(statement, exp.Query):
+        if _has_opaque_limit(statement):
+            statement = exp.select('*').from_(statement.subquery('_capped')).limit(max_rows)
+            limit_applied = True
+        else:
+            limit_applied = _apply_limit(statement, max_rows)
+            limit_applied = _push_limit_into_subqueries(statement, max_rows) or limit_applied
+
+    return {
+        "sql": statement.sql(dialect=dialect) if limit_applied else query,
+        "normalized": normalized,
+        "limit_applied": limit_applied
+    }
+
+
+def main(rows: int = 2_000_000, max_results: int = 100):
+    """Benchmark row-capped execution against full execution on a synthetic table"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / "benchmark.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE big (id INTEGER PRIMARY KEY, category TEXT, value REAL)")
+        conn.executemany(
+            "INSERT INTO big (category, value) VALUES (?, ?)",
+            ((f"category_{i % 50}", (i * 7919) % 10007 / 10007) for i in range(rows))
+        )
+        conn.commit()
+
+        queries = [
+            "SELECT * FROM big",
+            "SELECT * FROM big WHERE value > 0.5",
+            "SELECT id, value FROM big ORDER BY value DESC",
+            "SELECT id, category FROM (SELECT * FROM big WHERE category = 'category_7') s",
+        ]
+
+        print(f"Synthetic table: {rows} rows, max_results={max_results}")
+        for query in queries:
+            rewritten = rewrite_query(query, 'sqlite', max_results + 1)["sql"]
+            timings = []
+            for sql in (query, rewritten):
+                start = time.perf_counter()
+                cursor = conn.execute(sql)
+                fetched = 0
+                while True:
+                    batch = cursor.fetchmany(1000)
+                    if not batch:
+                        break
+                    fetched += len(batch)
+                timings.append((time.perf_counter() - start, fetched))
+            (original_time, original_rows), (rewritten_time, rewritten_rows) = timings
+            print(f"\n{query}\n  -> {rewritten}")
+            print(f"  original: {original_time * 1000:.1f} ms ({original_rows} rows), "
+                  f"rewritten: {rewritten_time * 1000:.1f} ms ({rewritten_rows} rows), "
+                  f"speedup: {original_time / max(rewritten_time, 1e-9):.1f}x")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+_thread_local = threading.local()
+
+
+def sqlite_uri(db_path: str, database_config: Dict) -> str:
+    '''
+    Build a read-only SQLite URI. immutable=1 skips file locking and change
+    detection entirely, so only enable it for files nothing else writes to.
+    '''
+    params = ["mode=ro"]
+    if database_config.get('sqlite_immutable'):
+        params.append("immutable=1")
+    if database_config.get('sqlite_shared_cache'):
+        params.append("cache=shared")
+    return f"file:{db_path}?{'&'.join(params)}"
+
+
+@contextmanager
+def sqlite_session(db_path: str, database_config: Dict, read_only: bool = True) -> Iterator[sqlite3.Connection]:
+    '''
+    Read-only sessions reuse one connection per thread; the connection can't
+    change the database, so nothing leaks between calls.
+    '''
+    if not read_only:
+        conn = sqlite3.connect(str(db_path))
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+        return
+
+    uri = sqlite_uri(db_path, database_config)
+    connections = getattr(_thread_local, 'sqlite_connections', None)
+    if connections is None:
+        connections = _thread_local.sqlite_connections = {}
+    conn = connections.get(uri)
+    if conn is None:
+        conn = sqlite3.connect(uri, uri=True)
+        conn.execute("PRAGMA query_only = ON")
+        connections[uri] = conn
+    try:
+        yield conn
+    except sqlite3.DatabaseError:
+        # Drop the cached connection if it may be in a bad state
+        connections.pop(uri, None)
+        conn.close()
+        raise
+
+
+@contextmanager
+def postgresql_session(database_config: Dict, read_only: bool = True):
+    import psycopg2
+
+    conn = psycopg2.connect(
+        host=database_config.get('host'),
+        port=database_config.get('port', 5432),
+        user=database_config.get('user'),
+        password=database_config.get('password'),
+        database=database_config.get('database_name')
+    )
+    try:
+        if read_only:
+            # Applies SET TRANSACTION READ ONLY to every transaction on this connection
+            conn.set_session(readonly=True)
+        yield conn
+        if not read_only:
+            conn.commit()
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+@contextmanager
+def mysql_session(database_config: Dict, read_only: bool = True):
+    import mysql.connector
+
+    conn = mysql.connector.connect(
+        host=database_config.get('host'),
+        port=database_config.get('port', 3306),
+        user=database_config.get('user'),
+        password=database_config.get('password'),
+        database=database_config.get('database_name')
+    )
+    try:
+        if read_only:
+            conn.start_transaction(readonly=True)
+        yield conn
+        if not read_only:
+            conn.commit()
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.close()
+
+
+@contextmanager
+def database_session(database_config: Dict):
+    '''Open a session on the configured SQL database, read-only unless database.read_only is false.'''
+    db_type = database_config.get('type', 'sqlite')
+    read_only = database_config.get('read_only', True)
+    if db_type == 'sqlite':
+        session = sqlite_session(database_config.get('default_path', 'database.db'), database_config, read_only)
+    elif db_type == 'postgresql':
+        session = postgresql_session(database_config, read_only)
+    elif db_type == 'mysql':
+        session = mysql_session(database_config, read_only)
+    else:
+        raise ValueError(f"Unsupported database type for SQL sessions: {db_type}")
+    with session as conn:
+        yield conn
@@ -0,0 +1,229 @@
+import re
+import sqlite3
+import sys
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+from langchain_core.tools import tool
+
+# Add the project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from config import config
+from tools.sql_sessions import sqlite_session, postgresql_session, mysql_session
+from tools.sql_rewriter import parse_statement, MultipleStatementsError, SQLRewriteError
+from app_logging import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+TABLE_ALIAS_PATTERN = re.compile(
+    r'\b(?:from|join)\s+["`\[]?(\w+)["`\]]?(?:\s+(?:as\s+)?(?!on\b|where\b|join\b|group\b|order\b|limit\b|inner\b|left\b|right\b|cross\b|natural\b|full\b|using\b)(\w+))?',
+    re.IGNORECASE
+)
+
+
+def _alias_map(query: str) -> Dict[str, str]:
+    aliases = {}
+    for table, alias in TABLE_ALIAS_PATTERN.findall(query):
+        aliases[table.lower()] = table
+        if alias:
+            aliases[alias.lower()] = table
+    return aliases
+
+
+def _explain_sqlite(query: str, database_config: Dict) -> Dict:
+    db_path = database_config.get('default_path', 'database.db')
+    with sqlite_session(db_path, database_config) as conn:
+        reads = set()
+
+        def authorizer(action, arg1, arg2, db_name, trigger):
+            # Called while the statement is prepared, so it sees every column read
+            if action == sqlite3.SQLITE_READ:
+                reads.add((arg1, arg2))
+            return sqlite3.SQLITE_OK
+
+        conn.set_authorizer(authorizer)
+        try:
+            plan_rows = conn.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
+        finally:
+            conn.set_authorizer(None)
+
+        tables = sorted({table for table, _ in reads})
+        aliases = _alias_map(query)
+        full_scans = []
+        for _, _, _, detail in plan_rows:
+            match = re.match(r'SCAN (?:TABLE )?(\w+)', detail)
+            if not match:
+                continue
+            table = aliases.get(match.group(1).lower(), match.group(1))
+            if table not in tables:
+                # CTE, subquery or view materialization, not a base table
+                continue
+            full_scans.append({
+                "table": table,
+                "estimated_rows": _sqlite_row_estimate(conn, table),
+                "detail": detail
+            })
+
+        return {
+            "tables": tables,
+            "columns": sorted(f"{table}.{column}" for table, column in reads if column),
+            "plan": [detail for _, _, _, detail in plan_rows],
+            "estimated_cost": sum(scan["estimated_rows"] or 0 for scan in full_scans),
+            "full_scans": full_scans
+        }
+
+
+def _sqlite_row_estimate(conn: sqlite3.Connection, table: str) -> Optional[int]:
+    '''Row estimate without a full scan: ANALYZE statistics, else MAX(rowid).'''
+    try:
+        stat = conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", [table]).fetchone()
+        if stat:
+            return int(stat[0].split()[0])
+    except sqlite3.OperationalError:
+        pass  # No sqlite_stat1 until ANALYZE has run
+    try:
+        row = conn.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()
+        return row[0] or 0
+    except sqlite3.OperationalError:
+        return None  # WITHOUT ROWID table
+
+
+def _walk_pg_plan(node: Dict, tables: set, columns: set, full_scans: List[Dict]):
+    relation = node.get('Relation Name')
+    if relation:
+        tables.add(relation)
+        if node.get('Node Type') == 'Seq Scan':
+            full_scans.append({
+                "table": relation,
+                "estimated_rows": node.get('Plan Rows'),
+                "detail": f"Seq Scan on {relation}"
+            })
+    for output in node.get('Output', []):
+        columns.add(output)
+    for child in node.get('Plans', []):
+        _walk_pg_plan(child, tables, columns, full_scans)
+
+
+def _explain_postgresql(query: str, database_config: Dict) -> Dict:
+    with postgresql_session(database_config) as conn:
+        cursor = conn.cursor()
+        # Plain EXPLAIN plans the statement without executing it
+        cursor.execute(f"EXPLAIN (FORMAT JSON, VERBOSE) {query}")
+        plan_json = cursor.fetchone()[0]
+        if isinstance(plan_json, str):
+            plan_json = json.loads(plan_json)
+        root = plan_json[0]['Plan']
+        tables, columns, full_scans = set(), set(), []
+        _walk_pg_plan(root, tables, columns, full_scans)
+        return {
+            "tables": sorted(tables),
+            "columns": sorted(columns),
+            "plan": root,
+            "estimated_cost": root.get('Total Cost'),
+            "full_scans": full_scans
+        }
+
+
+def _explain_mysql(query: str, database_config: Dict) -> Dict:
+    with mysql_session(database_config) as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"EXPLAIN {query}")
+        plan_rows = cursor.fetchall()
+        tables = sorted({row['table'] for row in plan_rows if row.get('table') and not row['table'].startswith('<')})
+        full_scans = [
+            {
+                "table": row['table'],
+                "estimated_rows": row.get('rows'),
+                "detail": f"type=ALL on {row['table']}"
+            } for row in plan_rows if row.get('type') == 'ALL' and row.get('table') in tables
+        ]
+        return {
+            "tables": tables,
+            "columns": [],
+            "plan": plan_rows,
+            "estimated_cost": sum(row.get('rows') or 0 for row in plan_rows),
+            "full_scans": full_scans
+        }
+
+
+def explain_query(query: str, database_config: Optional[Dict] = None,
+                  max_full_scan_rows: Optional[int] = None) -> Dict:
+    '''
+    Parse and plan a query without running it.
+    Args:
+        query (str): The SQL query to validate
+        database_config (Dict): Database to plan on (default: the configured one)
+        max_full_scan_rows (int): Full-scan guard (default: tool_validate_sql.max_full_scan_rows; 0 disables)
+    Returns:
+        Dict: Contains:
+            - valid: False on syntax/planning errors or blocked full scans
+            - tables / columns: Objects referenced by the statement
+            - plan: Database-specific plan output
+            - estimated_cost: Planner cost (Postgres) or estimated rows scanned
+            - full_scans: Full table scans with estimated row counts
+            - blocked: True if a full scan exceeds max_full_scan_rows
+            - error: Error message if invalid
+    '''
+    database_config = database_config or config.database_config
+    db_type = database_config.get('type', 'sqlite')
+    if max_full_scan_rows is None:
+        max_full_scan_rows = config.tool_validate_sql.get('max_full_scan_rows', 0)
+
+    explainers = {
+        'sqlite': _explain_sqlite,
+        'postgresql': _explain_postgresql,
+        'mysql': _explain_mysql
+    }
+    if db_type not in explainers:
+        return {"valid": False, "error": f"Validation is not supported for database type: {db_type}"}
+
+    try:
+        parse_statement(query, db_type)
+    except MultipleStatementsError as e:
+        return {"valid": False, "error": str(e)}
+    except SQLRewriteError:
+        pass  # Let the database report its own syntax errors
+
+    try:
+        result = explainers[db_type](query, database_config)
+    except Exception as e:
+        return {"valid": False, "error": str(e)}
+
+    oversized = [
+        scan for scan in result["full_scans"]
+        if max_full_scan_rows and (scan["estimated_rows"] or 0) > max_full_scan_rows
+    ]
+    result["blocked"] = bool(oversized)
+    result["valid"] = not oversized
+    if oversized:
+        result["error"] = "Blocked: full scan of " + ", ".join(
+            f"{scan['table']} (~{scan['estimated_rows']} rows)" for scan in oversized
+        ) + f" exceeds {max_full_scan_rows} rows. Add a selective filter or use an indexed column."
+    return result
+
+
+@tool
+def validate_sql_query(query: str) -> Dict:
+    '''
+    Check a SQL query for syntax errors and cost without executing it.
+    Use this before execute_sql_query on queries over large tables.
+    Args:
+        query (str): The SQL query to validate
+    Returns:
+        dict: valid flag, referenced tables/columns, plan, estimated cost,
+        full table scans and an error message if the query is invalid or blocked.
+    '''
+    logger.info("tool call: validate_sql_query", extra={"tool": "validate_sql_query", "sql_length": len(query)})
+    logger.debug("validate_sql_query sql: %s", query)
+    return explain_query(query)
+
+
+if __name__ == "__main__":
+    configure_logging()
+    while True:
+        query = input("Enter SQL query to validate ('exit' to quit): ").strip()
+        if query.lower() == 'exit':
+            break
+        print(validate_sql_query.invoke({"query": query}))
@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.analytical_engine import AnalyticalRoutingBackend
+
+QUERIES = {
+    "sales by month by country": """
+        SELECT strftime('%Y-%m', i.InvoiceDate) AS Month, i.BillingCountry, SUM(il.UnitPrice * il.Quantity) AS Sales
+        FROM InvoiceLine il JOIN Invoice i ON i.InvoiceId = il.InvoiceId
+        GROUP BY Month, i.BillingCountry ORDER BY Month, Sales DESC""",
+    "top 10 tracks by revenue": """
+        SELECT TrackId, SUM(UnitPrice * Quantity) AS Revenue FROM InvoiceLine
+        GROUP BY TrackId ORDER BY Revenue DESC, TrackId LIMIT 10""",
+    "distinct customers per country": """
+        SELECT BillingCountry, COUNT(DISTINCT CustomerId) FROM Invoice GROUP BY BillingCountry""",
+    "point lookup": "SELECT * FROM InvoiceLine WHERE InvoiceLineId = 123457"
+}
+
+
+def create_invoice_database(db_path: str, invoice_lines: int):
+    """Chinook-shaped Invoice/InvoiceLine tables with invoice_lines lines, 10 per invoice"""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(f"""
+        PRAGMA journal_mode = OFF;
+        PRAGMA synchronous = OFF;
+        CREATE TABLE Invoice (
+            InvoiceId INTEGER PRIMARY KEY, CustomerId INTEGER NOT NULL, InvoiceDate DATETIME NOT NULL,
+            BillingCountry NVARCHAR(40), Total NUMERIC(10,2) NOT NULL
+        );
+        CREATE TABLE InvoiceLine (
+            InvoiceLineId INTEGER PRIMARY KEY, InvoiceId INTEGER NOT NULL, TrackId INTEGER NOT NULL,
+            UnitPrice NUMERIC(10,2) NOT NULL, Quantity INTEGER NOT NULL
+        );
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {max(invoice_lines // 10, 1)})
+        INSERT INTO Invoice
+        SELECT i, 1 + i % 59, datetime('2021-01-01', '+' || (i % 1826) || ' days'),
+               CASE i % 8 WHEN 0 THEN 'USA' WHEN 1 THEN 'Canada' WHEN 2 THEN 'France' WHEN 3 THEN 'Brazil'
+                          WHEN 4 THEN 'Germany' WHEN 5 THEN 'United Kingdom' WHEN 6 THEN 'India' ELSE 'Chile' END,
+               0
+        FROM n;
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {invoice_lines})
+        INSERT INTO InvoiceLine
+        SELECT i, 1 + (i - 1) / 10, 1 + (i * 7919) % 3503, CASE WHEN i % 3 = 0 THEN 1.99 ELSE 0.99 END, 1 + i % 2
+        FROM n;
+        CREATE INDEX IFK_InvoiceLineInvoiceId ON InvoiceLine (InvoiceId);
+    """)
+    conn.commit()
+    conn.close()
+
+
+def best_of(run, repeats: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def normalized(rows) -> list:
+    """Order-insensitive rows with sums rounded (engines add floats in different orders; DuckDB sums NUMERIC(p,s) exactly)"""
+    return sorted(repr(tuple(round(float(value), 6) if isinstance(value, (float, Decimal)) else value for value in row))
+                  for row in rows)
+
+
+def fetch_all(backend, query: str):
+    with backend.stream(query, 10000) as (_, batches):
+        return [row for batch in batches for row in batch]
+
+
+def main(sizes):
+    for invoice_lines in sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "invoices.db")
+            start = time.perf_counter()
+            create_invoice_database(db_path, invoice_lines)
+            print(f"\n{invoice_lines:,} invoice lines (generated in {time.perf_counter() - start:.1f}s, "
+                  f"{os.path.getsize(db_path) / 2 ** 20:.0f} MB)")
+
+            backend = AnalyticalRoutingBackend({
+                'type': 'sqlite', 'default_path': db_path, 'read_only': True,
+                'analytical_engine': {'enabled': True, 'mode': 'snapshot',
+                                      'snapshot_path': os.path.join(tmp_dir, "invoices.duckdb")}
+            })
+            start = time.perf_counter()
+            backend.duckdb.ensure_snapshot()
+            print(f"  DuckDB snapshot: {time.perf_counter() - start:.1f}s (once per change of the SQLite file)")
+
+            for name, query in QUERIES.items():
+                sqlite_time = best_of(lambda: fetch_all(backend.sqlite, query))
+                duckdb_time = best_of(lambda: fetch_all(backend.duckdb, query))
+                engine = backend.choose_engine(query)
+                same = normalized(fetch_all(backend.sqlite, query)) == normalized(fetch_all(backend.duckdb, query))
+                print(f"  {name:<32} sqlite {sqlite_time * 1000:9.1f} ms  duckdb {duckdb_time * 1000:9.1f} ms  "
+                      f"({sqlite_time / duckdb_time:6.2f}x)  routed to {engine}{'' if same else '  [results differ]'}")
+            backend.close()
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [1000000, 10000000])
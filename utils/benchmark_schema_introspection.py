@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.schema_getters import SQLiteSchemaGetter
+
+
+def create_wide_database(db_path: str, num_tables: int = 1000, columns_per_table: int = 12):
+    """Generate a SQLite database with num_tables tables, FKs and an index per table"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    for i in range(num_tables):
+        columns = ", ".join(f"col_{c} TEXT" for c in range(columns_per_table))
+        parent_fk = f", parent_id INTEGER REFERENCES table_{i - 1}(id)" if i else ""
+        cursor.execute(f"CREATE TABLE table_{i} (id INTEGER PRIMARY KEY, {columns}{parent_fk})")
+        cursor.execute(f"CREATE INDEX idx_table_{i}_col_0 ON table_{i}(col_0)")
+    conn.commit()
+    conn.close()
+
+
+def time_introspection(db_path: str, workers: int, num_tables: int, repeats: int = 3) -> float:
+    getter = SQLiteSchemaGetter(db_path, {
+        'exclude_system_tables': True,
+        'include_relationships': True,
+        'include_indexes': True,
+        'max_tables': num_tables,
+        'sqlite_parallel_workers': workers
+    })
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        schema = getter.get_schema()
+        best = min(best, time.perf_counter() - start)
+    assert len(schema["tables"]) == num_tables
+    return best
+
+
+def main(num_tables: int = 1000):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "wide.db")
+        create_wide_database(db_path, num_tables)
+
+        baseline = None
+        print(f"Introspecting {num_tables} tables")
+        for workers in (1, 2, 4, 8):
+            elapsed = time_introspection(db_path, workers, num_tables)
+            baseline = baseline or elapsed
+            print(f"  workers={workers}: {elapsed * 1000:.1f} ms ({baseline / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
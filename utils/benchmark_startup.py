@@ -0,0 +1,61 @@
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def build_services(mode: str, consumers: int) -> dict:
+    """
+    Build what `consumers` callers (app, chat route requests, CLI sessions) need.
+    "separate" is the old pattern: every caller constructs its own chat model,
+    LLMService and compiled assistant graph. "shared" asks the container.
+    """
+    from services.container import container
+
+    start = time.perf_counter()
+    handles = []
+    for i in range(consumers):
+        if mode == "separate":
+            container.clear()
+        handles.append((container.sql_assistant(), container.llm_service()))
+        if i == 0:
+            first = time.perf_counter() - start
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "consumers": consumers,
+        "startup": elapsed,
+        "per_extra_consumer": (elapsed - first) / max(consumers - 1, 1),
+        "distinct_graphs": len({id(assistant.graph) for assistant, _ in handles}),
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+
+def main(consumers: int = 10):
+    """Startup time and peak RSS of each mode, each in a fresh interpreter"""
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "benchmark")  # Clients are built, never called
+    baseline = None
+    for mode in ("separate", "shared"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", mode, str(consumers)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        baseline = baseline or result
+        print(f"{mode:>8}: {result['startup']:.2f}s to serve {consumers} consumers "
+              f"({result['per_extra_consumer'] * 1000:.1f} ms per consumer after the first), "
+              f"{result['distinct_graphs']} compiled graph(s), peak RSS {result['max_rss_mb']:.0f} MB "
+              f"({result['max_rss_mb'] - baseline['max_rss_mb']:+.0f} MB)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        print(json.dumps(build_services(sys.argv[2], int(sys.argv[3]))))
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 import time
+import uuid
 from typing import Dict, Any, Optional
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -42,7 +43,7 @@ class SQLEvaluationService:
         Evaluates SQL assistant's performance against ground truth data.
         
         Args:
-            assistant: SQL assistant instance with process_query method
+            assistant: SQL assistant instance with process_query(query, thread_id, evaluation) method
             num_queries: Number of queries to evaluate. If None, evaluates all queries.
             
         Returns:
@@ -62,14 +63,27 @@ class SQLEvaluationService:
             "average_similarity": 0.0,
             "similarities": [],
             "failed_cases": [],
-            "execution_time": 0.0
+            "execution_time": 0.0,
+            "llm_calls": [],
+            "latencies": []
         }
 
         start_time = time.time()
+        run_id = uuid.uuid4().hex[:8]
 
         for idx, row in df.iterrows():
             try:
-                assistant_result = await assistant.process_query(row["User Input"])
+                # Assistants exposing an llm_calls counter get per-question call counts
+                calls_before = getattr(assistant, 'llm_calls', None)
+                query_start = time.time()
+                # A fresh thread per question: no history from earlier questions, and the
+                # first-turn steps (schema preload) run for every question
+                assistant_result = await assistant.process_query(
+                    row["User Input"], thread_id=f"eval-{run_id}-{idx + 1}", evaluation=True
+                )
+                results["latencies"].append(time.time() - query_start)
+                if calls_before is not None:
+                    results["llm_calls"].append(assistant.llm_calls - calls_before)
                 assistant_sql = self.extract_sql_from_response(assistant_result)
                 ground_truth_sql = row["Ground Truth SQL"].lower().strip()
 
@@ -109,6 +123,10 @@ class SQLEvaluationService:
                 })
 
         results["execution_time"] = time.time() - start_time
+        if results["latencies"]:
+            results["average_latency"] = np.mean(results["latencies"])
+        if results["llm_calls"]:
+            results["average_llm_calls"] = np.mean(results["llm_calls"])
         
         if results["similarities"]:
             similarities = [s["similarity"] for s in results["similarities"]]
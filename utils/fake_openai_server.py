@@ -0,0 +1,67 @@
+import asyncio
+import random
+import time
+import uuid
+from typing import Optional, Sequence, Union
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_app(base_latency: float = 0.05, slow_rate: float = 0.1, slow_latency: float = 1.0,
+               error_rate: float = 0.1, seed: int = 0, retry_after: Optional[float] = None,
+               script: Sequence[Union[int, str]] = ()) -> FastAPI:
+    '''
+    Minimal OpenAI-compatible /v1/chat/completions for exercising LLM client
+    timeouts, retries and hedging: a share of requests is slow, another share
+    fails with 429 (rate limit) or 503.
+
+    Args:
+        retry_after: Seconds sent in the Retry-After header of injected 429s (none by default)
+        script: Outcomes for the first requests, in order: a status code to fail
+            with, "slow" or "ok"; later requests roll the rates above
+    '''
+    app = FastAPI()
+    rng = random.Random(seed)
+    app.state.requests = 0
+    script = list(script)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        if script:
+            outcome = script.pop(0)
+            status = outcome if isinstance(outcome, int) else None
+            slow = outcome == "slow"
+        else:
+            roll = rng.random()
+            status = (429 if rng.random() < 0.7 else 503) if roll < error_rate else None
+            slow = roll < error_rate + slow_rate
+        if status is not None:
+            return JSONResponse(
+                status_code=status,
+                content={"error": {"message": "Injected failure", "type": "rate_limit_exceeded" if status == 429 else "server_error"}},
+                headers={"Retry-After": str(retry_after)} if status == 429 and retry_after is not None else None
+            )
+        await asyncio.sleep(slow_latency if slow else base_latency * rng.uniform(0.5, 1.5))
+        question = body["messages"][-1]["content"]
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": f"SELECT 1 -- {question}"},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+        }
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(create_app(), host="127.0.0.1", port=8099)
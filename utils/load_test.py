@@ -0,0 +1,173 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_llm(latency: float) -> int:
+    """OpenAI-compatible stub in a background thread; every answer is a valid one-line query"""
+    import uvicorn
+    from utils.fake_openai_server import create_app
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(base_latency=latency, slow_rate=0.0, error_rate=0.0),
+        host="127.0.0.1", port=port, log_level="warning"
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return port
+
+
+def start_app(workers: int, llm_port: int, rate_limit: int) -> tuple:
+    port = free_port()
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        RATE_LIMIT=str(rate_limit),
+        OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "load-test"),
+        OPENAI_BASE_URL=f"http://127.0.0.1:{llm_port}/v1",
+        OPENAI_API_BASE=f"http://127.0.0.1:{llm_port}/v1"
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        cwd=project_root, env=env, stdout=subprocess.DEVNULL
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/static/js/chat.js", timeout=1)
+            # Let the remaining workers finish importing before measuring
+            time.sleep(2 * workers)
+            return process, port
+        except Exception:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("app did not start; is the database in database.default_path present?")
+
+
+async def run_client(port: int, client: int, rounds: int, questions: int, latencies: list, errors: list) -> str:
+    """One user: `rounds` websocket connections on the same thread, `questions` questions each"""
+    from websockets.asyncio.client import connect
+
+    thread_id = None
+    for round_number in range(rounds):
+        url = f"ws://127.0.0.1:{port}/ws" + (f"?thread_id={thread_id}" if thread_id else "")
+        async with connect(url, open_timeout=60) as websocket:
+            session = json.loads(await websocket.recv())
+            thread_id = session["thread_id"]
+            for question in range(questions):
+                start = time.perf_counter()
+                await websocket.send(f"Load test question {question} of round {round_number} from user {client} {uuid.uuid4().hex[:6]}")
+                reply = json.loads(await websocket.recv())
+                latencies.append(time.perf_counter() - start)
+                if reply["type"] == "error":
+                    errors.append(reply["content"])
+    return thread_id
+
+
+def conversation_lengths(checkpoint_path: str, thread_ids: list) -> dict:
+    """Messages stored per thread in the shared checkpoint database"""
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    conn = sqlite3.connect(os.path.join(project_root, checkpoint_path))
+    try:
+        saver = SqliteSaver(conn)
+        lengths = {}
+        for thread_id in thread_ids:
+            checkpoint = saver.get_tuple({"configurable": {"thread_id": thread_id}})
+            lengths[thread_id] = len(checkpoint.checkpoint["channel_values"].get("messages", [])) if checkpoint else 0
+        return lengths
+    finally:
+        conn.close()
+
+
+async def load(port: int, clients: int, rounds: int, questions: int) -> dict:
+    latencies, errors = [], []
+    start = time.perf_counter()
+    thread_ids = await asyncio.gather(*(
+        run_client(port, client, rounds, questions, latencies, errors) for client in range(clients)
+    ))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "thread_ids": thread_ids,
+        "errors": errors,
+        "throughput": len(latencies) / elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[int(0.95 * (len(latencies) - 1))]
+    }
+
+
+def main():
+    """Same websocket load against 1 and N uvicorn workers, then a rate-limit check across workers"""
+    from config import config
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=3, help="Reconnects per client (each may land on another worker)")
+    parser.add_argument("--questions", type=int, default=3, help="Questions per connection")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--rate-limit", type=int, default=20)
+    args = parser.parse_args()
+
+    llm_port = start_fake_llm(args.llm_latency)
+    checkpoint_path = config.deployment_config.get('checkpoint_path', 'cache/checkpoints.db')
+    print(f"{os.cpu_count()} CPU(s); {args.clients} clients x {args.rounds} connections x {args.questions} questions, "
+          f"fake LLM {args.llm_latency * 1000:.0f} ms")
+
+    for workers in (1, args.workers):
+        process, port = start_app(workers, llm_port, rate_limit=0)
+        try:
+            result = asyncio.run(load(port, args.clients, args.rounds, args.questions))
+        finally:
+            process.terminate()
+            process.wait()
+        line = (f"workers={workers}: {result['throughput']:.1f} questions/s, p50 {result['p50'] * 1000:.0f} ms, "
+                f"p95 {result['p95'] * 1000:.0f} ms, {len(result['errors'])} errors")
+        if workers > 1:
+            # Each reconnect may have landed on any worker; every thread must still hold all its turns
+            lengths = conversation_lengths(checkpoint_path, result["thread_ids"])
+            expected = 2 * args.rounds * args.questions
+            complete = sum(length == expected for length in lengths.values())
+            line += f", {complete}/{len(lengths)} conversations complete across reconnects"
+        print(line)
+        if result["errors"]:
+            print(f"  first error: {result['errors'][0]}")
+
+    # One client, many short connections: the limit must hold across workers, not per worker
+    process, port = start_app(args.workers, llm_port, rate_limit=args.rate_limit)
+    try:
+        result = asyncio.run(load(port, 1, args.rate_limit, 2))
+    finally:
+        process.terminate()
+        process.wait()
+    sent = 2 * args.rate_limit
+    throttled = sum("Rate limit" in error for error in result["errors"])
+    print(f"rate limit {args.rate_limit}/window over {args.workers} workers: {sent - throttled}/{sent} questions allowed, "
+          f"{throttled} throttled")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from tools.execution_backends import ExecutionBackend, get_execution_backend
+from tools.query_log import query_fingerprint, read_query_log
+from tools.sql_rewriter import SQL_DIALECTS
+
+
+def load_entries(log_path: str, db_type: str, limit: int = 0) -> List[Dict]:
+    '''Successful logged queries for db_type in execution order (the log and its rotated files).'''
+    dialect = SQL_DIALECTS.get(db_type, 'sqlite')
+    entries = []
+    for entry in read_query_log(log_path):
+        if entry.get("error") or entry.get("database", db_type) != db_type or not entry.get("sql"):
+            continue
+        entry.setdefault("normalized", query_fingerprint(entry["sql"], dialect))
+        entries.append(entry)
+    entries.sort(key=lambda entry: entry.get("ts", 0))
+    return entries[-limit:] if limit else entries
+
+
+def execute(backend: ExecutionBackend, entry: Dict, batch_size: int, scheduled: float) -> Dict:
+    started = time.perf_counter()
+    result = {"normalized": entry["normalized"], "logged_ms": entry.get("elapsed_ms"),
+              "logged_rows": entry.get("rows"), "lag_ms": (started - scheduled) * 1000}
+    try:
+        # What ran after rewriting (LIMIT included) is executed as-is; entries without it ran unchanged
+        with backend.stream(entry.get("executed_sql") or entry["sql"], batch_size) as (_, batches):
+            result["rows"] = sum(len(batch) for batch in batches)
+    except Exception as e:
+        result["error"] = str(e)
+    result["ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def replay(backend: ExecutionBackend, entries: List[Dict], concurrency: int = 4, speed: float = 0.0,
+           batch_size: int = 1000) -> Dict:
+    '''
+    Re-execute logged queries on `concurrency` threads.
+    Args:
+        speed (float): 1.0 keeps the logged pacing, 2.0 replays twice as fast,
+            0 sends every query as soon as a thread is free
+    Returns:
+        Dict: {"results": per query, "elapsed": wall seconds}
+    '''
+    results: List[Dict] = []
+    lock = threading.Lock()
+    first_ts = entries[0].get("ts", 0) if entries else 0
+
+    def run(entry, scheduled):
+        result = execute(backend, entry, batch_size, scheduled)
+        with lock:
+            results.append(result)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for entry in entries:
+            scheduled = start
+            if speed > 0:
+                scheduled = start + (entry.get("ts", first_ts) - first_ts) / speed
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(run, entry, scheduled)
+    return {"results": results, "elapsed": time.perf_counter() - start}
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def summarize(results: List[Dict], elapsed: float) -> Dict:
+    '''Throughput and latency overall and per query shape, with the logged latencies for comparison.'''
+    shapes: Dict[str, Dict] = {}
+    for result in results:
+        shape = shapes.setdefault(result["normalized"], {"ms": [], "logged_ms": [], "errors": 0, "row_changes": 0})
+        if "error" in result:
+            shape["errors"] += 1
+            continue
+        shape["ms"].append(result["ms"])
+        if result["logged_ms"] is not None:
+            shape["logged_ms"].append(result["logged_ms"])
+        if result["logged_rows"] is not None and result["rows"] != result["logged_rows"]:
+            shape["row_changes"] += 1
+    latencies = [result["ms"] for result in results if "error" not in result]
+    return {
+        "queries": len(results),
+        "errors": sum(shape["errors"] for shape in shapes.values()),
+        "elapsed": elapsed,
+        "throughput": len(results) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.5) if latencies else None,
+        "p95_ms": percentile(latencies, 0.95) if latencies else None,
+        "max_lag_ms": max((result["lag_ms"] for result in results), default=0.0),
+        "shapes": {
+            normalized: {
+                "runs": len(shape["ms"]) + shape["errors"],
+                "errors": shape["errors"],
+                "row_changes": shape["row_changes"],
+                "p50_ms": statistics.median(shape["ms"]) if shape["ms"] else None,
+                "logged_p50_ms": statistics.median(shape["logged_ms"]) if shape["logged_ms"] else None
+            }
+            for normalized, shape in shapes.items()
+        }
+    }
+
+
+def find_regressions(summary: Dict, baseline: Optional[Dict] = None, threshold: float = 0.5,
+                     min_ms: float = 1.0) -> List[Dict]:
+    '''
+    Query shapes whose median latency grew by more than threshold (and by at
+    least min_ms) against a previous replay report, or against the durations
+    in the log when there is none. New errors always count.
+    '''
+    regressions = []
+    for normalized, shape in summary["shapes"].items():
+        if baseline is not None:
+            reference = baseline.get("shapes", {}).get(normalized, {})
+            reference_ms, reference_errors = reference.get("p50_ms"), reference.get("errors", 0)
+        else:
+            reference_ms, reference_errors = shape["logged_p50_ms"], 0
+        if shape["errors"] > reference_errors:
+            regressions.append({"normalized": normalized, "reason": f"{shape['errors']} errors"})
+        elif shape["p50_ms"] is not None and reference_ms is not None \
+                and shape["p50_ms"] > reference_ms * (1 + threshold) and shape["p50_ms"] - reference_ms >= min_ms:
+            regressions.append({"normalized": normalized, "reason": f"p50 {reference_ms:.1f} -> {shape['p50_ms']:.1f} ms"})
+    return regressions
+
+
+def main():
+    """Replay the query log against a database concurrently; exits with 1 when regressions are found"""
+    from config import config
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--log", help="Query log (default: tool_execute_sql.query_log.path)")
+    parser.add_argument("--database", help="SQLite file to replay against (default: database.default_path)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="Pace relative to the logged timestamps (1 = real time, 0 = as fast as possible)")
+    parser.add_argument("--limit", type=int, default=0, help="Replay only the last N queries")
+    parser.add_argument("--baseline", help="Replay report (--save) to compare against instead of the logged durations")
+    parser.add_argument("--threshold", type=float, default=0.5, help="Allowed relative p50 slowdown per query shape")
+    parser.add_argument("--save", help="Write this replay's report as JSON")
+    args = parser.parse_args()
+
+    database_config = dict(config.database_config)
+    if args.database:
+        database_config['default_path'] = args.database
+    log_path = args.log or config.tool_execute_sql.get('query_log', {}).get('path', 'cache/query_log.jsonl')
+    entries = load_entries(log_path, database_config.get('type', 'sqlite'), args.limit)
+    if not entries:
+        print(f"No successful queries in {log_path}")
+        return
+
+    backend = get_execution_backend(database_config)
+    batch_size = config.tool_execute_sql.get('fetch_batch_size', 1000)
+    print(f"Replaying {len(entries)} queries ({len({entry['normalized'] for entry in entries})} shapes) "
+          f"on {args.concurrency} threads at {'full speed' if args.speed <= 0 else f'{args.speed}x'}")
+    outcome = replay(backend, entries, args.concurrency, args.speed, batch_size)
+    summary = summarize(outcome["results"], outcome["elapsed"])
+
+    print(f"{summary['throughput']:.1f} queries/s over {summary['elapsed']:.2f}s, p50 {summary['p50_ms']:.1f} ms, "
+          f"p95 {summary['p95_ms']:.1f} ms, {summary['errors']} errors"
+          + (f", max lag behind the logged pacing {summary['max_lag_ms']:.0f} ms" if args.speed > 0 else ""))
+    for normalized, shape in sorted(summary["shapes"].items(), key=lambda item: -(item[1]["p50_ms"] or 0))[:15]:
+        logged = f"{shape['logged_p50_ms']:9.1f}" if shape["logged_p50_ms"] is not None else f"{'-':>9}"
+        replayed = f"{shape['p50_ms']:9.1f}" if shape["p50_ms"] is not None else f"{'-':>9}"
+        changes = f"  {shape['row_changes']} row count changes" if shape["row_changes"] else ""
+        print(f"  {shape['runs']:>5} runs  logged p50 {logged} ms  replay p50 {replayed} ms  {normalized[:70]}{changes}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+    regressions = find_regressions(summary, baseline, args.threshold)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as report_file:
+            json.dump(summary, report_file, indent=2)
+    if regressions:
+        print(f"\n{len(regressions)} regressions against {'the baseline' if baseline else 'the logged durations'}:")
+        for regression in regressions:
+            print(f"  {regression['reason']}: {regression['normalized'][:90]}")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()